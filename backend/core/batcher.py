@@ -0,0 +1,130 @@
+"""
+Dynamic micro-batching.
+
+여러 스레드에서 동시에 들어온 작은 요청(예: 요청마다 1건씩인 임베딩 인코딩)을 전용 스레드가 모아
+최대 max_wait_ms 동안 또는 max_batch_size 개가 찰 때까지 기다린 뒤 한 번의 배치 호출로 처리하고,
+각 호출자의 Future에 자기 몫의 결과를 돌려줍니다.
+
+배치 점유율(batch_size)과 요청별 대기 시간(wait_ms), 배치 처리 시간(batch_ms)은
+batcher.<name>.* 히스토그램으로 /metrics에 노출됩니다.
+"""
+from concurrent.futures import Future
+from queue import Empty, Queue
+from threading import Lock, Thread
+from typing import Callable, List, NamedTuple, Optional, Sequence
+import time
+
+from loguru import logger
+
+from backend.core import metrics
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+WAIT_MS_BUCKETS = (0.5, 1, 2, 5, 10, 25, 50, 100, 250, 1000)
+
+
+class _Request(NamedTuple):
+    items: list
+    future: Future
+    enqueued_at: float
+
+
+class MicroBatcher:
+    """
+    스레드 기반 마이크로 배처.
+
+    :param name: 메트릭 이름 접두사 (batcher.<name>.*)
+    :param process_fn: 항목 리스트를 받아 같은 순서/길이의 결과 시퀀스를 반환하는 배치 함수
+    :param max_batch_size: 한 배치에 담을 최대 항목 수
+    :param max_wait_ms: 첫 요청이 들어온 뒤 배치를 채우기 위해 기다리는 최대 시간 (0: 이미 대기 중인 요청만 묶음)
+    """
+
+    def __init__(self, name: str, process_fn: Callable[[list], Sequence], max_batch_size: int = 32, max_wait_ms: float = 5.0):
+        self.name = name
+        self.process_fn = process_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_ms = max(0.0, max_wait_ms)
+
+        self._queue: "Queue[_Request]" = Queue()
+        self._thread: Optional[Thread] = None
+        self._lock = Lock()
+
+        self.batches = metrics.counter(f"batcher.{name}.batches", "실행된 배치 수")
+        self.requests = metrics.counter(f"batcher.{name}.requests", "배치에 합쳐진 요청 수")
+        self.batch_size = metrics.histogram(f"batcher.{name}.batch_size", "배치당 항목 수 (점유율)", buckets=BATCH_SIZE_BUCKETS)
+        self.wait_ms = metrics.histogram(f"batcher.{name}.wait_ms", "요청 등록부터 배치 실행까지 대기 시간", buckets=WAIT_MS_BUCKETS)
+        self.batch_ms = metrics.histogram(f"batcher.{name}.batch_ms", "배치 처리 시간")
+
+    def _ensure_worker(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = Thread(target=self._loop, name=f"{self.name}-batcher", daemon=True)
+                self._thread.start()
+
+    def submit(self, items: Sequence) -> Future:
+        """항목들을 다음 배치에 등록합니다. Future는 배치 결과 중 items에 해당하는 구간(같은 순서)으로 완료됩니다."""
+        future: Future = Future()
+        if not items:
+            future.set_result([])
+            return future
+        self._ensure_worker()
+        self._queue.put(_Request(list(items), future, time.perf_counter()))
+        return future
+
+    def run(self, items: Sequence, timeout: Optional[float] = None) -> Sequence:
+        """submit 후 결과를 기다림 (배치 함수의 예외는 그대로 전달됨)"""
+        return self.submit(items).result(timeout)
+
+    # --- 배치 스레드 ---
+    def _loop(self) -> None:
+        pending: Optional[_Request] = None
+        while True:
+            first = pending or self._queue.get()
+            pending = None
+            batch = [first]
+            size = len(first.items)
+            # 대기 시간은 첫 요청이 등록된 시점부터 계산 (그 요청의 추가 지연 상한)
+            deadline = first.enqueued_at + self.max_wait_ms / 1000
+
+            while size < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    request = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except Empty:
+                    break
+                if size + len(request.items) > self.max_batch_size:
+                    # 넣으면 상한을 넘는 요청은 다음 배치의 첫 요청으로
+                    pending = request
+                    break
+                batch.append(request)
+                size += len(request.items)
+
+            self._run(batch, size)
+
+    def _run(self, batch: List[_Request], size: int) -> None:
+        started = time.perf_counter()
+        for request in batch:
+            self.wait_ms.observe((started - request.enqueued_at) * 1000)
+        self.batches.inc()
+        self.requests.inc(len(batch))
+        self.batch_size.observe(size)
+
+        items = [item for request in batch for item in request.items]
+        try:
+            with self.batch_ms.timer():
+                results = self.process_fn(items)
+            if len(results) != len(items):
+                raise RuntimeError(f"batch function returned {len(results)} results for {len(items)} items")
+        except Exception as e:
+            logger.warning(f"배치 처리 실패 ({self.name}, 요청 {len(batch)}건/항목 {size}개): {e}")
+            for request in batch:
+                request.future.set_exception(e)
+            return
+
+        offset = 0
+        for request in batch:
+            count = len(request.items)
+            # 배열 결과는 복사 없이 슬라이스(view)로 전달
+            request.future.set_result(results[offset:offset + count])
+            offset += count
@@ -0,0 +1,210 @@
+"""
+Two-tier cache for Gemini evaluation responses.
+
+1차: 프로세스 내 LRU (TTL 포함, 최대 항목 수 제한)
+2차: Postgres evaluation_cache 테이블 (워커/재시작 간 공유)
+
+캐시 키는 정규화된 UserProfile, 과목 ID(+과목 내용 지문), 모델명, 프롬프트 버전의 해시입니다.
+프롬프트 템플릿, 모델, 과목 내용(재임포트)이 바뀌면 키가 달라지므로 이전 항목은 자연스럽게 무효화됩니다.
+"""
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from threading import Lock
+from typing import Callable, Optional
+import hashlib
+import json
+import time
+
+from loguru import logger
+from sqlalchemy.orm import Session
+
+from backend.core import metrics
+from backend.core.config import settings
+from backend.core.schema import UserProfile, CourseInfo
+from backend.db.database import SessionLocal
+from backend.models.evaluation_cache import EvaluationCacheEntry
+
+
+def _normalize_terms(values) -> list:
+    return sorted({v.strip().casefold() for v in values or [] if v and v.strip()})
+
+
+def normalize_profile(user_profile: UserProfile) -> dict:
+    """
+    순서/대소문자/공백 차이처럼 평가 결과에 영향을 주지 않는 차이를 제거한 프로필 표현
+    """
+    return {
+        "taken_courses": sorted(
+            [int(history.course_id), (history.grade or "").strip().upper()]
+            for history in user_profile.taken_courses
+        ),
+        "eval_preference": user_profile.eval_preference,
+        "interests": _normalize_terms(user_profile.interests),
+        "team_preference": user_profile.team_preference,
+        "attendence_type": _normalize_terms(user_profile.attendence_type),
+    }
+
+
+def course_fingerprint(course_info: CourseInfo) -> str:
+    """과목 행 내용의 지문. 과목이 재임포트되어 내용이 바뀌면 키도 바뀝니다."""
+    return hashlib.sha256(course_info.model_dump_json().encode("utf-8")).hexdigest()[:16]
+
+
+def make_cache_key(
+    user_profile: UserProfile,
+    course_info: CourseInfo,
+    model_name: str,
+    prompt_version: str,
+) -> str:
+    payload = {
+        "profile": normalize_profile(user_profile),
+        "course_id": course_info.id,
+        "course": course_fingerprint(course_info),
+        "model": model_name,
+        "prompt_version": prompt_version,
+    }
+    canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class EvaluationCache:
+    """
+    Gemini 응답(JSON 문자열) 캐시.
+
+    :param max_entries: 메모리 LRU 최대 항목 수
+    :param ttl_seconds: 메모리 항목 유효 시간
+    :param db_ttl_seconds: DB 항목 유효 시간 (이보다 오래된 행은 미스로 간주)
+    :param session_factory: DB 세션 생성 함수. None이면 메모리 캐시만 사용
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: float = 3600,
+        db_ttl_seconds: float = 7 * 24 * 3600,
+        session_factory: Optional[Callable[[], Session]] = SessionLocal,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.db_ttl_seconds = db_ttl_seconds
+        self.session_factory = session_factory
+
+        # key -> (만료 시각(monotonic), 응답)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = Lock()
+
+        self.memory_hits = metrics.counter("evaluation_cache.memory_hits", "메모리 캐시 적중")
+        self.db_hits = metrics.counter("evaluation_cache.db_hits", "DB 캐시 적중")
+        self.misses = metrics.counter("evaluation_cache.misses", "캐시 미스")
+        self.stores = metrics.counter("evaluation_cache.stores", "캐시 저장")
+        self.invalidations = metrics.counter("evaluation_cache.invalidations", "무효화된 항목 수")
+
+    # --- 메모리 LRU ---
+    def _memory_get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def _memory_set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    # --- 조회/저장 ---
+    def get(self, key: str) -> Optional[str]:
+        value = self._memory_get(key)
+        if value is not None:
+            self.memory_hits.inc()
+            logger.debug(f"평가 캐시 적중(메모리): {key[:12]}")
+            return value
+
+        if self.session_factory is not None:
+            db = self.session_factory()
+            try:
+                entry = db.get(EvaluationCacheEntry, key)
+                if entry is not None and entry.created_at >= datetime.utcnow() - timedelta(seconds=self.db_ttl_seconds):
+                    self._memory_set(key, entry.response)
+                    self.db_hits.inc()
+                    logger.debug(f"평가 캐시 적중(DB): {key[:12]}")
+                    return entry.response
+            except Exception as e:
+                # 캐시 장애가 평가 자체를 막지 않도록 미스로 처리
+                logger.warning(f"평가 캐시 DB 조회 실패: {e}")
+            finally:
+                db.close()
+
+        self.misses.inc()
+        return None
+
+    def set(self, key: str, course_id: int, model_name: str, prompt_version: str, response: str) -> None:
+        self._memory_set(key, response)
+        self.stores.inc()
+
+        if self.session_factory is None:
+            return
+        db = self.session_factory()
+        try:
+            db.merge(EvaluationCacheEntry(
+                cache_key=key,
+                course_id=course_id,
+                model_name=model_name,
+                prompt_version=prompt_version,
+                response=response,
+                created_at=datetime.utcnow(),
+            ))
+            db.commit()
+        except Exception as e:
+            logger.warning(f"평가 캐시 DB 저장 실패: {e}")
+            db.rollback()
+        finally:
+            db.close()
+
+    # --- 정리 ---
+    # 과목 재임포트로 내용이 바뀐 항목은 키의 과목 지문(course_fingerprint)이 달라져 더 이상 조회되지 않으므로
+    # 별도 무효화 없이 메모리 TTL/LRU와 DB TTL로 자연히 밀려납니다.
+    def purge_stale_versions(self, prompt_version: str) -> int:
+        """현재 프롬프트 버전이 아닌 DB 항목 정리 (프롬프트 템플릿 변경 후 시작 시 호출)"""
+        if self.session_factory is None:
+            return 0
+        db = self.session_factory()
+        try:
+            removed = db.query(EvaluationCacheEntry).filter(EvaluationCacheEntry.prompt_version != prompt_version).delete()
+            db.commit()
+        finally:
+            db.close()
+
+        self.invalidations.inc(removed)
+        if removed:
+            logger.info(f"이전 프롬프트 버전의 평가 캐시 {removed}건 정리")
+        return removed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        hits = self.memory_hits.value + self.db_hits.value
+        total = hits + self.misses.value
+        return {
+            "entries": len(self._entries),
+            "memory_hits": self.memory_hits.value,
+            "db_hits": self.db_hits.value,
+            "misses": self.misses.value,
+            "hit_rate": (hits / total) if total else None,
+        }
+
+
+evaluation_cache = EvaluationCache(
+    max_entries=settings.EVAL_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.EVAL_CACHE_TTL_SECONDS,
+    db_ttl_seconds=settings.EVAL_CACHE_DB_TTL_SECONDS,
+)
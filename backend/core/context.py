@@ -0,0 +1,181 @@
+"""
+Per-request profile context.
+
+한 번의 평가 요청 안에서 과목마다 동일한 결과를 내는 계산
+(프로필 임베딩, 유사 사용자 kNN, 선배 수강 과목 집계, 기수강 과목 상세 조회)을
+요청당 한 번만 수행하고, 모든 과목 평가가 이를 재사용하도록 묶어 둡니다.
+"""
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional, Set, Union
+import time
+
+import numpy as np
+from loguru import logger
+
+from backend.core.schema import UserProfile, CourseInfo, CourseHistory
+from backend.core.utils import return_user_courses, return_course_info
+from backend.core.neighbor import embed_profile_text, get_neighbor_course_counts
+from backend.core.singleflight import SingleFlight, hash_key
+from backend.core import metrics
+from backend.db.database import session_scope
+
+# 같은 프로필 문자열로 동시에 들어온 임베딩 + kNN/과목 집계는 하나로 합침
+similar_users_flight = SingleFlight("similar_users")
+
+# 단계별 소요 시간 (부하 테스트/운영 중 병목 파악용)
+embedding_ms = metrics.histogram("stage.embedding_ms", "프로필 임베딩 생성 시간")
+knn_ms = metrics.histogram("stage.knn_ms", "유사 사용자 kNN 검색 + 수강 과목 집계 시간")
+profile_context_ms = metrics.histogram("stage.profile_context_ms", "프로필 컨텍스트 생성 전체 시간")
+
+
+def extract_profile_text(user_profile: UserProfile) -> str:
+    """
+    UserProfile 객체에서 'taken_courses'를 제외한 모든 필드를 추출하여
+    임베딩 생성을 위한 단일 문자열로 결합합니다.
+    """
+
+    # taken_courses를 제외하고 모든 데이터를 딕셔너리로 추출합니다.
+    user_data_dict = user_profile.model_dump(exclude={"taken_courses"})
+
+    parts = []
+
+    # 평가 방식 선호도 (eval_preference)
+    if 'eval_preference' in user_data_dict:
+        parts.append(f"평가 방식 선호도: {user_data_dict['eval_preference']} (1:시험선호, 5:과제선호)")
+
+    # 관심 분야 (interests) - 리스트를 쉼표로 연결
+    interests: List[str] = user_data_dict.get('interests', [])
+    if interests:
+        parts.append(f"관심 분야: {', '.join(interests)}")
+
+    # 팀 프로젝트 선호도 (team_preference)
+    if 'team_preference' in user_data_dict:
+        parts.append(f"팀 프로젝트 선호도: {user_data_dict['team_preference']} (1:매우싫음, 5:매우좋음)")
+
+    # 선호 출석 방식 (attendence_type) - 리스트를 쉼표로 연결
+    attendance: List[str] = user_data_dict.get('attendence_type', [])
+    if attendance:
+        parts.append(f"선호 출석 방식: {', '.join(attendance)}")
+
+    # 모든 정보를 쉼표와 공백으로 연결하여 최종 문자열 생성
+    user_profile_str = ", ".join(parts)
+
+    return user_profile_str
+
+
+def collect_taken_course_ids(user_profile: UserProfile) -> Set[str]:
+    """현재 사용자가 이미 수강한 과목 ID 집합 (문자열)"""
+    taken_course_ids = set()
+    for c in getattr(user_profile, "taken_courses", []) or []:
+        if hasattr(c, "course_id"):
+            cid = getattr(c, "course_id")
+        elif isinstance(c, dict):
+            cid = c.get("course_id") or c.get("id")
+        else:
+            cid = c
+        if cid is not None:
+            taken_course_ids.add(str(cid))
+    return taken_course_ids
+
+
+def count_senior_courses(senior_ids: List[int]) -> Counter:
+    """유사 선배들의 수강 과목 코드별 등장 횟수"""
+    counter = Counter()
+    if not senior_ids:
+        return counter
+    for course_id in return_user_courses(senior_ids):
+        counter[str(course_id)] += 1
+    return counter
+
+
+def pick_recommended_course(counter: Counter, excluded_course_ids: Iterable[str]) -> Optional[str]:
+    """제외 집합에 없는 과목 중 가장 많이 겹치는 과목을 반환"""
+    excluded = {str(cid) for cid in excluded_course_ids}
+    for course_id, _ in counter.most_common():
+        if course_id not in excluded:
+            return course_id
+    return None
+
+
+def resolve_taken_courses(
+    taken_courses_history: List[CourseHistory],
+) -> List[Union[CourseInfo, CourseHistory]]:
+    """
+    기수강 과목 이력을 과목 상세 정보로 변환합니다.
+    결과는 이력과 같은 순서이며, DB에서 찾지 못한 과목은 CourseHistory 그대로 남깁니다.
+    """
+    if not taken_courses_history:
+        return []
+
+    details = return_course_info([history.course_id for history in taken_courses_history])
+    details_by_id = {course.id: course for course in details}
+    return [details_by_id.get(history.course_id, history) for history in taken_courses_history]
+
+
+@dataclass
+class ProfileContext:
+    """한 요청 동안 과목별 평가가 공유하는 프로필 파생 데이터"""
+    user_profile: UserProfile
+    profile_text: str
+    embedding: Optional[np.ndarray] = field(default=None, repr=False)
+    senior_course_counts: Counter = field(default_factory=Counter)
+    taken_course_ids: Set[str] = field(default_factory=set)
+    taken_course_details: List[Union[CourseInfo, CourseHistory]] = field(default_factory=list, repr=False)
+
+    def recommend(self, exclude: Iterable[str] = ()) -> Optional[str]:
+        """
+        선배 수강 과목 집계에서 추천 과목을 산출합니다.
+        기수강 과목과 exclude로 전달된 과목(예: 평가 대상 과목)은 제외합니다.
+        """
+        excluded = set(self.taken_course_ids)
+        excluded.update(str(cid) for cid in exclude if cid is not None)
+        return pick_recommended_course(self.senior_course_counts, excluded)
+
+
+def build_profile_context(user_profile: UserProfile, k: int = 5) -> ProfileContext:
+    """
+    요청당 한 번: 프로필 임베딩 → kNN + 선배 수강 과목 집계(쿼리 한 번) → 기수강 과목 상세 조회
+    기수강 과목은 집계 쿼리에서 바로 제외되고, 과목별 평가 대상 과목은 recommend에서 제외됩니다.
+    요청 세션이 없으면(작업 워커 등) 이 함수 동안 세션 하나를 열어 모든 조회가 같은 연결을 사용합니다.
+    """
+    with session_scope():
+        return _build_profile_context(user_profile, k)
+
+
+def _build_profile_context(user_profile: UserProfile, k: int) -> ProfileContext:
+    start = time.perf_counter()
+    profile_text = extract_profile_text(user_profile)
+    taken_course_ids = collect_taken_course_ids(user_profile)
+
+    def _search():
+        with embedding_ms.timer():
+            embedding = embed_profile_text(profile_text)
+        try:
+            with knn_ms.timer():
+                ranked = get_neighbor_course_counts(embedding, k=k, exclude=taken_course_ids)
+        except Exception as e:
+            # 추천은 부가 정보이므로 실패해도 평가는 계속 진행
+            logger.error(f"선배 기수강 정보 획득 실패: {e}")
+            ranked = []
+        return embedding, ranked
+
+    logger.info("유사 사용자 검색 시작")
+    flight_key = hash_key(profile_text, str(k), ",".join(sorted(taken_course_ids)))
+    embedding, ranked = similar_users_flight.do(flight_key, _search)
+    logger.info("유사 사용자 검색 완료")
+    # 집계 결과가 이미 많은 순이므로 Counter.most_common도 같은 순서를 유지
+    senior_course_counts = Counter(dict(ranked))
+
+    context = ProfileContext(
+        user_profile=user_profile,
+        profile_text=profile_text,
+        embedding=embedding,
+        senior_course_counts=senior_course_counts,
+        taken_course_ids=taken_course_ids,
+        taken_course_details=resolve_taken_courses(user_profile.taken_courses),
+    )
+    duration_ms = (time.perf_counter() - start) * 1000
+    profile_context_ms.observe(duration_ms)
+    logger.info(f"프로필 컨텍스트 생성 완료: 선배 수강 과목={len(senior_course_counts)}개, 기수강={len(context.taken_course_details)}과목, 소요={duration_ms:.1f}ms")
+    return context
@@ -0,0 +1,192 @@
+"""
+Content-addressed embedding cache.
+
+1차: 프로세스 내 LRU (float32 배열)
+2차: SQLite 파일 (float32 바이트 BLOB, 재시작/워커 간 공유)
+
+키는 (모델 키, 정규화된 텍스트)의 SHA-256 입니다. 모델이나 임베딩 백엔드가 바뀌면 모델 키가 달라지므로
+이전 벡터가 섞이지 않습니다. 캐시 미스인 텍스트만 모델로 인코딩합니다.
+"""
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, List, Optional, Sequence
+import hashlib
+import os
+import sqlite3
+import time
+import unicodedata
+
+import numpy as np
+from loguru import logger
+
+from backend.core import metrics
+
+
+def normalize_text(text: str) -> str:
+    """유니코드 NFC + 공백 정리. 토크나이저 입력이 같아지는 차이만 제거합니다."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def embedding_key(model_key: str, normalized_text: str) -> str:
+    return hashlib.sha256(f"{model_key}\x00{normalized_text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    임베딩 벡터 캐시.
+
+    :param path: SQLite 파일 경로. None이면 메모리 캐시만 사용
+    :param max_entries: 메모리 LRU 최대 항목 수
+    """
+
+    def __init__(self, path: Optional[str], max_entries: int = 4096):
+        self.path = path
+        self.max_entries = max_entries
+
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = Lock()
+        self._db_lock = Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        # 미스 1건당 평균 인코딩 시간(ms, 지수 이동 평균) - 적중 시 절약한 시간 추정에 사용
+        self._encode_ms_per_text: Optional[float] = None
+
+        self.memory_hits = metrics.counter("embedding_cache.memory_hits", "임베딩 메모리 캐시 적중")
+        self.disk_hits = metrics.counter("embedding_cache.disk_hits", "임베딩 디스크 캐시 적중")
+        self.misses = metrics.counter("embedding_cache.misses", "임베딩 캐시 미스 (모델 인코딩)")
+        self.saved_ms = metrics.gauge("embedding_cache.saved_ms", "캐시 적중으로 절약한 인코딩 시간 추정치 (누적)")
+
+    # --- SQLite ---
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        if self.path is None:
+            return None
+        if self._conn is None:
+            try:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS embeddings ("
+                    " key TEXT PRIMARY KEY, model_key TEXT NOT NULL, dim INTEGER NOT NULL,"
+                    " vector BLOB NOT NULL, created_at REAL NOT NULL)"
+                )
+                conn.commit()
+                self._conn = conn
+                logger.info(f"임베딩 디스크 캐시 열기: {self.path}")
+            except Exception as e:
+                # 디스크 캐시를 쓸 수 없으면 메모리 캐시만 사용
+                logger.warning(f"임베딩 디스크 캐시를 열 수 없어 메모리 캐시만 사용합니다: {e}")
+                self.path = None
+                return None
+        return self._conn
+
+    def _disk_get_many(self, keys: Sequence[str]) -> Dict[str, np.ndarray]:
+        with self._db_lock:
+            conn = self._connection()
+            if conn is None or not keys:
+                return {}
+            found: Dict[str, np.ndarray] = {}
+            try:
+                # SQLite 변수 개수 제한을 피하도록 나눠서 조회
+                for i in range(0, len(keys), 500):
+                    chunk = keys[i:i + 500]
+                    rows = conn.execute(
+                        f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})",
+                        chunk,
+                    ).fetchall()
+                    for key, blob in rows:
+                        found[key] = np.frombuffer(blob, dtype=np.float32)
+            except Exception as e:
+                logger.warning(f"임베딩 디스크 캐시 조회 실패: {e}")
+            return found
+
+    def _disk_set_many(self, items: Dict[str, np.ndarray], model_key: str) -> None:
+        with self._db_lock:
+            conn = self._connection()
+            if conn is None or not items:
+                return
+            now = time.time()
+            try:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, model_key, dim, vector, created_at) VALUES (?, ?, ?, ?, ?)",
+                    [(key, model_key, int(vector.shape[0]), vector.tobytes(), now) for key, vector in items.items()],
+                )
+                conn.commit()
+            except Exception as e:
+                logger.warning(f"임베딩 디스크 캐시 저장 실패: {e}")
+
+    # --- 메모리 LRU ---
+    def _memory_get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+            return vector
+
+    def _memory_set(self, key: str, vector: np.ndarray) -> None:
+        with self._lock:
+            self._entries[key] = vector
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    # --- 조회/저장 ---
+    def get_many(self, model_key: str, texts: Sequence[str]) -> List[Optional[np.ndarray]]:
+        """texts와 같은 순서로 캐시된 벡터(없으면 None)를 반환"""
+        keys = [embedding_key(model_key, normalize_text(text)) for text in texts]
+        results: List[Optional[np.ndarray]] = [self._memory_get(key) for key in keys]
+        memory_hits = sum(1 for vector in results if vector is not None)
+
+        missing = [key for key, vector in zip(keys, results) if vector is None]
+        from_disk = self._disk_get_many(missing) if missing else {}
+        for i, key in enumerate(keys):
+            if results[i] is None and key in from_disk:
+                results[i] = from_disk[key]
+                self._memory_set(key, from_disk[key])
+
+        disk_hits = sum(1 for key in missing if key in from_disk)
+        misses = len(keys) - memory_hits - disk_hits
+        self.memory_hits.inc(memory_hits)
+        self.disk_hits.inc(disk_hits)
+        self.misses.inc(misses)
+        if self._encode_ms_per_text is not None:
+            self.saved_ms.inc((memory_hits + disk_hits) * self._encode_ms_per_text)
+        return results
+
+    def set_many(self, model_key: str, texts: Sequence[str], vectors: Sequence[np.ndarray], encode_ms: Optional[float] = None) -> None:
+        """
+        새로 인코딩한 벡터를 저장합니다.
+        :param encode_ms: 이 벡터들을 인코딩하는 데 걸린 시간 (절약 시간 추정치 갱신용)
+        """
+        items: Dict[str, np.ndarray] = {}
+        for text, vector in zip(texts, vectors):
+            key = embedding_key(model_key, normalize_text(text))
+            # 배치 결과 행렬의 view를 그대로 담으면 행렬 전체가 해제되지 않으므로 행 단위로 복사
+            vector = np.array(vector, dtype=np.float32)
+            items[key] = vector
+            self._memory_set(key, vector)
+        self._disk_set_many(items, model_key)
+
+        if encode_ms is not None and texts:
+            per_text = encode_ms / len(texts)
+            previous = self._encode_ms_per_text
+            self._encode_ms_per_text = per_text if previous is None else previous * 0.9 + per_text * 0.1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        hits = self.memory_hits.value + self.disk_hits.value
+        total = hits + self.misses.value
+        return {
+            "entries": len(self._entries),
+            "memory_hits": self.memory_hits.value,
+            "disk_hits": self.disk_hits.value,
+            "misses": self.misses.value,
+            "hit_rate": (hits / total) if total else None,
+            "saved_ms": self.saved_ms.value,
+            "encode_ms_per_text": self._encode_ms_per_text,
+        }
@@ -0,0 +1,340 @@
+"""
+Out-of-process embedding service.
+
+임베딩 모델을 전용 워커 프로세스들이 소유하고, API 프로세스는 로컬 IPC(multiprocessing.connection,
+TCP 또는 Unix 소켓)로 텍스트를 보내 float32 버퍼를 돌려받습니다.
+uvicorn 워커마다 모델을 따로 올리지 않아도 되고, 인코딩이 API 프로세스의 GIL/CPU를 점유하지 않습니다.
+
+프로토콜 (요청마다 한 번 왕복, 연결은 클라이언트가 재사용):
+- 요청: conn.send(("encode", [text, ...])) 또는 conn.send(("ping", None))
+- 응답: conn.send(("ok", ((n, dim), 모델 식별자))) 다음 conn.send_bytes(float32 버퍼)
+        ping이면 conn.send(("ok", 상태 dict)), 실패 시 conn.send(("error", 메시지))
+
+서버는 리슨 소켓을 만든 뒤 워커 프로세스를 fork하고, 각 워커가 같은 소켓에서 accept 합니다 (pre-fork).
+워커 안에서는 연결마다 스레드를 두고, 그 스레드에서 시간 제한을 둔 인증 핸드셰이크를 마친 뒤
+마이크로 배처(encoder.encode_in_process)로 동시 요청을 묶어 인코딩합니다.
+"""
+from multiprocessing.connection import Connection, answer_challenge, deliver_challenge
+from threading import Lock, Thread
+from typing import List, Optional, Tuple, Union
+import multiprocessing
+import os
+import signal
+import socket
+import struct
+import time
+
+import numpy as np
+from loguru import logger
+
+from backend.core import metrics
+
+Address = Union[str, Tuple[str, int]]
+
+
+def parse_address(address: str) -> Address:
+    """'host:port'는 TCP 주소로, 그 외는 Unix 소켓 경로로 해석"""
+    host, sep, port = address.rpartition(":")
+    if sep and host and port.isdigit():
+        return host, int(port)
+    return address
+
+
+def _authenticate(sock: socket.socket, authkey: bytes, timeout: float, server: bool) -> Connection:
+    """
+    연결된 소켓을 Connection으로 감싸고 multiprocessing.connection과 같은 상호 인증을 시간 제한 안에 수행
+    (Listener.accept/Client는 상대가 응답하지 않으면 핸드셰이크에서 무한히 기다림)
+
+    :param sock: 연결된 소켓 (성공/실패와 관계없이 소유권을 넘겨받음)
+    :param authkey: 인증 키
+    :param timeout: 핸드셰이크 시간 제한(초)
+    :param server: 서버 쪽이면 challenge를 먼저 보냄
+    :return: 인증된 Connection (소켓 시간 제한은 해제됨)
+    :raises TimeoutError: 핸드셰이크가 시간 안에 끝나지 않았을 경우
+    """
+    try:
+        # Connection은 블로킹 fd를 기대하므로 핸드셰이크 동안은 소켓 수준 송수신 시간 제한을 사용
+        sock.setblocking(True)
+        timeval = struct.pack("ll", int(timeout), int((timeout % 1) * 1_000_000))
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVTIMEO, timeval)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDTIMEO, timeval)
+        conn = Connection(sock.detach())
+    except Exception:
+        sock.close()
+        raise
+
+    try:
+        try:
+            if server:
+                deliver_challenge(conn, authkey)
+                answer_challenge(conn, authkey)
+            else:
+                answer_challenge(conn, authkey)
+                deliver_challenge(conn, authkey)
+        except BlockingIOError as e:
+            # SO_RCVTIMEO/SO_SNDTIMEO 만료는 EAGAIN으로 나타남
+            raise TimeoutError(f"authentication handshake timed out after {timeout}s") from e
+        # 이후 대기는 호출자가 제한하므로 (클라이언트는 _recv의 poll, 서버는 유휴 연결 유지) 소켓 시간 제한은 해제
+        with socket.socket(fileno=os.dup(conn.fileno())) as raw:
+            raw.setsockopt(socket.SOL_SOCKET, socket.SO_RCVTIMEO, struct.pack("ll", 0, 0))
+            raw.setsockopt(socket.SOL_SOCKET, socket.SO_SNDTIMEO, struct.pack("ll", 0, 0))
+    except Exception:
+        conn.close()
+        raise
+    return conn
+
+
+class EmbeddingServiceClient:
+    """
+    임베딩 서비스 클라이언트. 스레드 안전하며 유휴 연결을 재사용합니다.
+    연결 실패 시 retry_seconds 동안은 서비스를 사용 불가로 표시해 호출자가 즉시 프로세스 내 인코딩으로 폴백하게 합니다.
+
+    :param address: 'host:port' 또는 Unix 소켓 경로
+    :param authkey: 서버와 같은 인증 키
+    :param timeout: 요청당 응답 대기 시간(초). 연결과 인증 핸드셰이크에도 같은 시간 제한을 둠
+    :param retry_seconds: 연결 실패 후 다시 시도하기까지의 시간(초)
+    """
+
+    def __init__(self, address: str, authkey: str, timeout: float = 10.0, retry_seconds: float = 5.0):
+        self.address = address
+        self.authkey = authkey.encode("utf-8")
+        self.timeout = timeout
+        self.retry_seconds = retry_seconds
+
+        self._idle: List[Connection] = []
+        self._lock = Lock()
+        self._unavailable_until = 0.0
+
+        self.requests = metrics.counter("embedding_service.requests", "임베딩 서비스 요청 수")
+        self.failures = metrics.counter("embedding_service.failures", "임베딩 서비스 요청 실패 수 (프로세스 내 인코딩으로 폴백)")
+        self.call_ms = metrics.histogram("embedding_service.call_ms", "임베딩 서비스 왕복 시간")
+
+    def available(self) -> bool:
+        return time.monotonic() >= self._unavailable_until
+
+    def _checkout(self) -> Connection:
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        return self._connect()
+
+    def _connect(self) -> Connection:
+        """
+        multiprocessing.connection.Client와 같은 연결 + 인증이지만 시간 제한이 있음.
+        (Client는 서비스가 accept하지 않으면 인증 핸드셰이크에서 무한히 기다림)
+        """
+        address = parse_address(self.address)
+        sock = socket.socket(socket.AF_INET if isinstance(address, tuple) else socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.settimeout(self.timeout)
+            sock.connect(address)
+        except Exception:
+            sock.close()
+            raise
+        return _authenticate(sock, self.authkey, self.timeout, server=False)
+
+    def _checkin(self, conn: Connection) -> None:
+        with self._lock:
+            self._idle.append(conn)
+
+    def _recv(self, conn: Connection, receive=None):
+        if not conn.poll(self.timeout):
+            raise TimeoutError(f"embedding service did not respond within {self.timeout}s")
+        return (receive or conn.recv)()
+
+    def _call(self, op: str, payload):
+        """요청 한 번 왕복. 연결/타임아웃 오류는 ConnectionError로, 서버 측 오류는 RuntimeError로 전달"""
+        self.requests.inc()
+        try:
+            conn = self._checkout()
+        except Exception as e:
+            self._mark_unavailable()
+            raise ConnectionError(f"embedding service unavailable ({self.address}): {e}") from e
+
+        try:
+            with self.call_ms.timer():
+                conn.send((op, payload))
+                status, meta = self._recv(conn)
+                if status == "ok" and op == "encode":
+                    shape, model_key = meta
+                    buffer = self._recv(conn, conn.recv_bytes)
+                    result = np.frombuffer(buffer, dtype=np.float32).reshape(tuple(shape)), model_key
+                else:
+                    result = meta
+        except (OSError, EOFError, TimeoutError) as e:
+            # 응답이 어긋났을 수 있으므로 연결은 재사용하지 않음
+            conn.close()
+            self._mark_unavailable()
+            raise ConnectionError(f"embedding service request failed ({self.address}): {e}") from e
+
+        self._checkin(conn)
+        if status != "ok":
+            self.failures.inc()
+            raise RuntimeError(f"embedding service error: {meta}")
+        return result
+
+    def _mark_unavailable(self) -> None:
+        self.failures.inc()
+        self._unavailable_until = time.monotonic() + self.retry_seconds
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+    def encode(self, texts: List[str]) -> Tuple[np.ndarray, str]:
+        """texts의 임베딩((len(texts), dim) float32 배열)과 서비스가 실제로 사용한 모델 식별자(캐시 키용)를 반환"""
+        return self._call("encode", list(texts))
+
+    def ping(self) -> Optional[dict]:
+        """서비스 상태 dict, 연결할 수 없으면 None"""
+        try:
+            return self._call("ping", None)
+        except Exception as e:
+            logger.warning(f"임베딩 서비스 확인 실패 ({self.address}): {e}")
+            return None
+
+
+# --- 서버 (워커 프로세스) ---
+def _serve_connection(conn: Connection) -> None:
+    from backend.core.encoder import embedder_status, embedding_model_key, encode_in_process
+
+    try:
+        while True:
+            try:
+                op, payload = conn.recv()
+            except EOFError:
+                break
+            try:
+                if op == "ping":
+                    conn.send(("ok", {"pid": os.getpid(), **embedder_status()}))
+                elif op == "encode":
+                    vectors = encode_in_process(payload)
+                    if len(vectors) != len(payload):
+                        raise RuntimeError(f"encoded {len(vectors)} of {len(payload)} texts")
+                    conn.send(("ok", (vectors.shape, embedding_model_key())))
+                    conn.send_bytes(np.ascontiguousarray(vectors).data)
+                else:
+                    conn.send(("error", f"unknown operation: {op}"))
+            except (OSError, EOFError):
+                raise
+            except Exception as e:
+                logger.error(f"임베딩 서비스 요청 처리 실패: {e}")
+                conn.send(("error", str(e)))
+    except (OSError, EOFError) as e:
+        logger.debug(f"임베딩 서비스 연결 종료: {e}")
+    finally:
+        conn.close()
+
+
+def _handle_connection(sock: socket.socket, authkey: bytes, handshake_timeout: float) -> None:
+    """연결별 스레드: 인증 핸드셰이크 후 요청 처리. 인증 실패/시간 초과는 해당 연결만 버림"""
+    try:
+        conn = _authenticate(sock, authkey, handshake_timeout, server=True)
+    except Exception as e:
+        logger.warning(f"임베딩 서비스 연결 거부: {e}")
+        return
+    _serve_connection(conn)
+
+
+def _worker_main(listen_sock: socket.socket, authkey: bytes, handshake_timeout: float, threads: int) -> None:
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    from backend.core import encoder
+    from backend.core.config import settings
+
+    settings.EMBEDDING_INTRA_OP_THREADS = threads
+    # 워커가 모델을 소유하므로 서비스 클라이언트는 끔. EMBEDDING_SERVICE_ADDRESS가 설정되어 있으면
+    # 워밍업이 자기 자신(아직 accept 전인 리슨 소켓)에 연결해 기다리게 됨
+    encoder.embedding_service_client = None
+    encoder.warm_up_embedder()
+    logger.info(f"임베딩 서비스 워커 준비 완료: pid={os.getpid()}, intra-op 스레드={threads}")
+
+    # accept는 인증 없이 바로 돌려주고, 핸드셰이크는 연결별 스레드에서 시간 제한을 두고 수행
+    # (응답하지 않는 연결 하나가 워커의 accept 루프를 막지 않도록)
+    while True:
+        try:
+            sock, _ = listen_sock.accept()
+        except OSError as e:
+            logger.warning(f"임베딩 서비스 accept 실패: {e}")
+            continue
+        Thread(
+            target=_handle_connection, args=(sock, authkey, handshake_timeout),
+            name="embedding-service-conn", daemon=True,
+        ).start()
+
+
+def _bind(address: Address) -> socket.socket:
+    """TCP 또는 Unix 소켓 리슨 소켓 생성 (Unix 소켓 파일이 남아 있으면 지우고 다시 만듦)"""
+    if isinstance(address, tuple):
+        return socket.create_server(address, backlog=128)
+    if os.path.exists(address):
+        os.unlink(address)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.bind(address)
+        sock.listen(128)
+    except Exception:
+        sock.close()
+        raise
+    return sock
+
+
+def serve(
+    address: str, authkey: str, workers: int, threads: Optional[int] = None, handshake_timeout: float = 10.0,
+) -> None:
+    """
+    임베딩 서비스 실행 (블로킹). 워커 프로세스가 죽으면 다시 띄웁니다.
+
+    :param address: 'host:port' 또는 Unix 소켓 경로
+    :param authkey: 클라이언트와 같은 인증 키
+    :param workers: 모델을 소유할 워커 프로세스 수
+    :param threads: 워커당 intra-op 스레드 수 (기본값: CPU 코어 수 / workers)
+    :param handshake_timeout: 연결별 인증 핸드셰이크 시간 제한(초)
+    :raises ValueError: 인증 키가 비어 있을 경우
+    """
+    if not authkey:
+        raise ValueError("EMBEDDING_SERVICE_AUTHKEY must be set to run the embedding service.")
+    parsed = parse_address(address)
+    listen_sock = _bind(parsed)
+    threads = threads or max(1, (os.cpu_count() or 1) // workers)
+
+    # 워커는 리슨 소켓을 물려받아야 하므로 fork 사용 (모델은 fork 후 각 워커에서 로드)
+    context = multiprocessing.get_context("fork")
+    processes: List[multiprocessing.Process] = []
+
+    def spawn() -> multiprocessing.Process:
+        process = context.Process(
+            target=_worker_main, args=(listen_sock, authkey.encode("utf-8"), handshake_timeout, threads),
+            name="embedding-service-worker", daemon=True,
+        )
+        process.start()
+        return process
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    logger.info(f"임베딩 서비스 시작: {address}, 워커 {workers}개")
+    processes = [spawn() for _ in range(workers)]
+    try:
+        while not stopping:
+            for i, process in enumerate(processes):
+                if not process.is_alive():
+                    logger.warning(f"임베딩 서비스 워커 종료 감지 (pid={process.pid}, exitcode={process.exitcode}), 재시작")
+                    processes[i] = spawn()
+            time.sleep(1)
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join(timeout=5)
+        listen_sock.close()
+        if isinstance(parsed, str) and os.path.exists(parsed):
+            os.unlink(parsed)
+        logger.info("임베딩 서비스 종료")
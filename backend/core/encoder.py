@@ -1,20 +1,64 @@
-from sentence_transformers import SentenceTransformer
-from typing import List, Optional
+from typing import List, Optional, Tuple, Union, TYPE_CHECKING
+from threading import Lock, Thread
 from loguru import logger
 import time
 import numpy as np
 import os
 
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+    from backend.core.onnx_encoder import OnnxEncoder
+
+from backend.core import metrics
+from backend.core.batcher import MicroBatcher
+from backend.core.config import settings
+from backend.core.embedding_cache import EmbeddingCache
+from backend.core.embedding_service import EmbeddingServiceClient
+
 # --- 모델 설정 및 로드 ---
 EMBEDDING_MODEL_NAME = "jhgan/ko-sroberta-multitask"
 LOCAL_MODEL_PATH = "./model/"
-EMBEDDER: Optional[SentenceTransformer] = None
+EMBEDDER: Optional[Union["SentenceTransformer", "OnnxEncoder"]] = None
+
+def _model_key(backend: str) -> str:
+    """
+    임베딩 캐시 키에 쓰는 모델 식별자. 백엔드마다 벡터가 조금씩 다르므로 torch 이외의 백엔드는 구분해서 저장
+    (torch는 기존 캐시와 호환되도록 모델 이름 그대로 사용)
+    """
+    key = (
+        EMBEDDING_MODEL_NAME if backend == "torch"
+        else f"{EMBEDDING_MODEL_NAME}:{backend}{'-int8' if settings.EMBEDDING_ONNX_QUANTIZE else ''}"
+    )
+    return key + (f":seq{settings.EMBEDDING_MAX_SEQ_LENGTH}" if settings.EMBEDDING_MAX_SEQ_LENGTH > 0 else "")
+
+# max_seq_length를 넘어 잘린 입력 수 (대량 인코딩 경로에서 집계)
+truncated_texts = metrics.counter("embedding.truncated_texts", "max_seq_length를 넘어 잘린 입력 수")
+
+# 모델은 import 시점이 아니라 처음 필요할 때(또는 앱 기동 시 워밍업 스레드에서) 로드
+# status: not_loaded → loading → loaded → ready(워밍업 또는 첫 인코딩 성공) / failed
+#   (워밍업이 실패하면 loaded에 머물고 error에 사유를 기록, 인코딩이 성공할 때까지 준비 미완료로 봄)
+# service: 임베딩 서비스 모드에서 기동 시 서비스 연결 확인 결과 (connected / unavailable, 미사용 시 None)
+# model_key: 실제로 로드된 백엔드(ONNX 로드 실패 시 torch) 또는 임베딩 서비스가 보고한 모델 식별자
+_embedder_lock = Lock()
+_embedder_state = {
+    "status": "not_loaded", "model_source": None, "load_ms": None, "warmup_ms": None, "error": None,
+    "service": None, "model_key": None,
+}
+
+WARMUP_TEXTS = [
+    "평가 방식 선호도: 3 (1:시험선호, 5:과제선호), 관심 분야: 인공지능, 데이터베이스, 팀 프로젝트 선호도: 3 (1:매우싫음, 5:매우좋음), 선호 출석 방식: 대면",
+    "워밍업",
+]
 
 def initialize_embedder():
     """
     Checks for local model, downloads/saves if missing, and initializes the EMBEDDER globally.
     """
     global EMBEDDER
+    # sentence_transformers(torch) import 자체가 무거우므로 실제 로드 시점에 import
+    from sentence_transformers import SentenceTransformer
+
+    _embedder_state["status"] = "loading"
     
     # Check if the model directory exists and appears to contain model files
     local_model_exists = os.path.isdir(LOCAL_MODEL_PATH) and os.path.exists(os.path.join(LOCAL_MODEL_PATH, 'tokenizer.json'))
@@ -47,44 +91,295 @@ def initialize_embedder():
             # Fallback: Attempt to load from remote/cache directly if save failed
             model_source = EMBEDDING_MODEL_NAME
     
+    if settings.EMBEDDING_BACKEND == "onnx":
+        # ONNX Runtime 백엔드 (내보낸 파일이 없으면 여기서 내보내기 + 양자화). 실패 시 PyTorch로 계속 진행
+        try:
+            from backend.core.onnx_encoder import load_onnx_encoder
+
+            start_time = time.perf_counter()
+            EMBEDDER = load_onnx_encoder(
+                model_source, settings.EMBEDDING_ONNX_DIR,
+                quantize=settings.EMBEDDING_ONNX_QUANTIZE,
+                intra_op_threads=settings.EMBEDDING_INTRA_OP_THREADS,
+            )
+            load_duration_ms = (time.perf_counter() - start_time) * 1000
+            _apply_max_seq_length(EMBEDDER)
+            logger.info(f"ONNX 임베딩 모델 로드 성공: {EMBEDDER.onnx_path}, 소요={load_duration_ms:.1f}ms")
+            _embedder_state.update(
+                status="loaded", model_source=EMBEDDER.onnx_path, load_ms=load_duration_ms, error=None,
+                model_key=_model_key("onnx"),
+            )
+            return
+        except Exception as e:
+            logger.error(f"ONNX 임베딩 모델 로드 실패, PyTorch 백엔드로 로드합니다: {e}")
+
+    if settings.EMBEDDING_INTRA_OP_THREADS > 0:
+        import torch
+        torch.set_num_threads(settings.EMBEDDING_INTRA_OP_THREADS)
+
     # Final load attempt (will use LOCAL_MODEL_PATH if successful above, or EMBEDDING_MODEL_NAME otherwise)
     try:
         start_time = time.perf_counter()
         EMBEDDER = SentenceTransformer(model_source)
+        _apply_max_seq_length(EMBEDDER)
         load_duration_ms = (time.perf_counter() - start_time) * 1000
         logger.info(f"임베딩 모델 로드 성공: {model_source}, 소요={load_duration_ms:.1f}ms")
+        _embedder_state.update(
+            status="loaded", model_source=model_source, load_ms=load_duration_ms, error=None,
+            model_key=_model_key("torch"),
+        )
     except Exception as e:
         logger.error(f"임베딩 모델 로드 최종 실패: {e}")
         EMBEDDER = None
+        _embedder_state.update(status="failed", model_source=model_source, error=str(e))
+
+def _apply_max_seq_length(embedder) -> None:
+    """EMBEDDING_MAX_SEQ_LENGTH가 설정되어 있으면 모델의 입력 최대 토큰 수를 바꿈 (torch/onnx 공통 속성)"""
+    if settings.EMBEDDING_MAX_SEQ_LENGTH > 0 and settings.EMBEDDING_MAX_SEQ_LENGTH != embedder.max_seq_length:
+        logger.info(f"임베딩 max_seq_length 변경: {embedder.max_seq_length} → {settings.EMBEDDING_MAX_SEQ_LENGTH}")
+        embedder.max_seq_length = settings.EMBEDDING_MAX_SEQ_LENGTH
+
+def get_embedder() -> Optional["SentenceTransformer"]:
+    """
+    로드된 임베딩 모델을 반환합니다. 아직 로드 전이면 여기서 로드하고,
+    다른 스레드(워밍업)가 로드 중이면 끝날 때까지 기다립니다. 로드에 실패했으면 None.
+    """
+    if EMBEDDER is not None:
+        return EMBEDDER
+    with _embedder_lock:
+        if EMBEDDER is None and _embedder_state["status"] == "not_loaded":
+            initialize_embedder()
+    return EMBEDDER
+
+def warm_up_embedder() -> None:
+    """
+    모델을 로드하고 짧은 문장을 한 번 인코딩해 첫 요청의 초기화 비용(첫 추론 지연)을 미리 치름
+    임베딩 서비스가 설정되어 있고 응답하면 이 프로세스에는 모델을 올리지 않음 (서비스 장애 시 첫 폴백 때 로드)
+    """
+    if embedding_service_client is not None:
+        service_status = embedding_service_client.ping()
+        if service_status is not None:
+            _embedder_state.update(service="connected", model_key=service_status.get("model_key"))
+            logger.info(f"임베딩 서비스 연결 확인: {embedding_service_client.address}")
+            return
+        _embedder_state["service"] = "unavailable"
+        logger.warning("임베딩 서비스에 연결할 수 없어 프로세스 내 모델을 로드합니다.")
+
+    embedder = get_embedder()
+    if embedder is None:
+        return
+    try:
+        start_time = time.perf_counter()
+        embedder.encode(WARMUP_TEXTS, batch_size=len(WARMUP_TEXTS), convert_to_tensor=False)
+        warmup_ms = (time.perf_counter() - start_time) * 1000
+        _embedder_state.update(status="ready", warmup_ms=warmup_ms)
+        logger.info(f"임베딩 모델 워밍업 완료: 소요={warmup_ms:.1f}ms")
+    except Exception as e:
+        # 워밍업 실패는 치명적이지 않음 (실제 요청에서 다시 시도됨). 인코딩이 한 번 성공할 때까지는
+        # loaded 상태로 두어 /health/ready가 503을 반환하게 함
+        logger.warning(f"임베딩 모델 워밍업 실패: {e}")
+        _embedder_state.update(error=str(e))
+
+def start_embedder_warmup() -> Thread:
+    """백그라운드 스레드에서 모델 로드 + 워밍업 시작 (앱 기동 시 호출)"""
+    thread = Thread(target=warm_up_embedder, name="embedder-warmup", daemon=True)
+    thread.start()
+    return thread
+
+def embedder_status() -> dict:
+    return dict(_embedder_state)
+
+def embedding_model_key() -> str:
+    """
+    임베딩 캐시 조회에 쓸 모델 식별자. 실제로 로드된(또는 임베딩 서비스가 보고한) 백엔드 기준이며,
+    아직 모델을 로드하지 않았으면 설정된 백엔드 기준
+    """
+    return _embedder_state["model_key"] or _model_key(settings.EMBEDDING_BACKEND)
+
+def embedder_ready() -> bool:
+    return _embedder_state["status"] == "ready" or _embedder_state["service"] == "connected"
+
+def _mark_encode_succeeded() -> None:
+    """워밍업이 실패해 loaded에 머물러 있던 모델을 실제 인코딩이 처음 성공한 시점에 ready로 전환"""
+    if _embedder_state["status"] == "loaded":
+        with _embedder_lock:
+            if _embedder_state["status"] == "loaded":
+                _embedder_state.update(status="ready", error=None)
+                logger.info("임베딩 인코딩 성공, 모델 상태를 ready로 전환")
+
+# (모델, 정규화된 텍스트) → 벡터 캐시. 미스인 텍스트만 모델로 인코딩
+embedding_cache: Optional[EmbeddingCache] = (
+    EmbeddingCache(settings.EMBEDDING_CACHE_PATH or None, max_entries=settings.EMBEDDING_CACHE_MAX_ENTRIES)
+    if settings.EMBEDDING_CACHE_ENABLED else None
+)
+
+def _encode_batch(texts: List[str]) -> np.ndarray:
+    """마이크로 배처가 모은 텍스트를 한 번의 forward pass로 인코딩"""
+    embedder = get_embedder()
+    if embedder is None:
+        raise RuntimeError("Embedding model not initialized.")
+    embeddings = embedder.encode(texts, batch_size=len(texts), convert_to_tensor=False)
+    _mark_encode_succeeded()
+    return embeddings
 
-# 즉시 함수 실행
-initialize_embedder()
+# 동시에 들어온 소량 인코딩 요청(요청당 프로필 1건)을 모아 배치 하나로 처리
+embedding_batcher: Optional[MicroBatcher] = (
+    MicroBatcher(
+        "embedding", _encode_batch,
+        max_batch_size=settings.EMBEDDING_BATCH_MAX_SIZE,
+        max_wait_ms=settings.EMBEDDING_BATCH_MAX_WAIT_MS,
+    )
+    if settings.EMBEDDING_BATCH_ENABLED else None
+)
+
+# 임베딩 서비스 모드: 주소와 인증 키가 모두 설정되어 있으면 모델을 소유한 별도 프로세스에 인코딩을 맡김
+embedding_service_client: Optional[EmbeddingServiceClient] = (
+    EmbeddingServiceClient(
+        settings.EMBEDDING_SERVICE_ADDRESS,
+        authkey=settings.EMBEDDING_SERVICE_AUTHKEY,
+        timeout=settings.EMBEDDING_SERVICE_TIMEOUT,
+    )
+    if settings.EMBEDDING_SERVICE_ADDRESS and settings.EMBEDDING_SERVICE_AUTHKEY else None
+)
+if settings.EMBEDDING_SERVICE_ADDRESS and not settings.EMBEDDING_SERVICE_AUTHKEY:
+    logger.warning("EMBEDDING_SERVICE_AUTHKEY가 없어 임베딩 서비스를 사용하지 않고 프로세스 내에서 인코딩합니다.")
+
+def _empty_embeddings() -> np.ndarray:
+    return np.empty((0, 0), dtype=np.float32)
+
+def _encode(texts: List[str], batch_size: int) -> Tuple[np.ndarray, str]:
+    """
+    캐시 미스 텍스트 인코딩. 임베딩 서비스가 설정되어 있으면 서비스로 보내고,
+    서비스를 쓸 수 없으면 프로세스 내에서 인코딩함
+    (벡터, 실제로 인코딩한 모델의 식별자)를 반환 (캐시 저장 키가 인코딩한 백엔드와 일치하도록)
+    """
+    if embedding_service_client is not None and texts and embedding_service_client.available():
+        try:
+            vectors, model_key = embedding_service_client.encode(texts)
+            _embedder_state["model_key"] = model_key
+            return vectors, model_key
+        except Exception as e:
+            logger.warning(f"임베딩 서비스 호출 실패, 프로세스 내 인코딩으로 폴백: {e}")
+    vectors = encode_in_process(texts, batch_size=batch_size)
+    return vectors, embedding_model_key()
+
+def encode_in_process(texts: List[str], batch_size: int = 32) -> np.ndarray:
+    """
+    이 프로세스의 모델로 인코딩 (임베딩 서비스 워커도 이 함수를 사용)
+    배치 상한 이하의 소량 요청은 마이크로 배처로 다른 요청과 묶고,
+    대량 요청(시드 스크립트 등)이나 배처 실패 시에는 encode_texts_array로 직접 인코딩함
+    """
+    if embedding_batcher is not None and 0 < len(texts) <= embedding_batcher.max_batch_size:
+        try:
+            return np.asarray(embedding_batcher.run(texts), dtype=np.float32)
+        except Exception as e:
+            logger.warning(f"임베딩 마이크로 배치 실패, 직접 인코딩으로 재시도: {e}")
+    return encode_texts_array(texts, batch_size=batch_size)
+
+def generate_embeddings_array(texts: List[str], batch_size: int = 32) -> np.ndarray:
+    """
+    주어진 텍스트 리스트의 임베딩을 (len(texts), dim) float32 배열 하나로 생성
+    임베딩 캐시에 있는 텍스트는 재사용하고, 미스인 텍스트만 인코딩하여 캐시에 저장함
+    (소량 요청은 마이크로 배처에서 동시 요청과 한 배치로 묶임)
+    (인코딩 실패 시 encode_texts와 같이 앞에서부터 성공한 부분까지의 행만 반환함)
+
+    :param texts: 임베딩을 생성할 입력 텍스트 리스트
+    :param batch_size: 배치 처리 크기 (기본값: 32)
+    :return: 임베딩 행렬 (np.ndarray, float32, C-contiguous)
+    :raises RuntimeError: 캐시 미스가 있는데 임베딩 모델이 로드되지 않았을 경우
+    """
+    if embedding_cache is None or not texts:
+        return _encode(texts, batch_size=batch_size)[0]
+
+    cached = embedding_cache.get_many(embedding_model_key(), texts)
+    miss_indices = [i for i, vector in enumerate(cached) if vector is None]
+
+    if miss_indices:
+        miss_texts = [texts[i] for i in miss_indices]
+        logger.debug(f"임베딩 캐시: 적중 {len(texts) - len(miss_indices)}건, 미스 {len(miss_indices)}건")
+        start_time = time.perf_counter()
+        encoded, model_key = _encode(miss_texts, batch_size=batch_size)
+        encode_ms = (time.perf_counter() - start_time) * 1000
+        embedding_cache.set_many(model_key, miss_texts[:len(encoded)], encoded, encode_ms=encode_ms)
+        for i, vector in zip(miss_indices, encoded):
+            cached[i] = vector
+
+    # 인코딩 실패로 비어 있는 첫 위치 앞까지만 반환 (encode_texts의 부분 결과 규칙과 동일)
+    rows: List[np.ndarray] = []
+    for vector in cached:
+        if vector is None:
+            break
+        rows.append(vector)
+    return np.stack(rows).astype(np.float32, copy=False) if rows else _empty_embeddings()
 
 def generate_embeddings(texts: List[str], batch_size: int = 32) -> List[List[float]]:
     """
-    주어진 텍스트 리스트를 batch_size 단위로 청크 처리하며 임베딩 벡터 리스트를 생성
-    (배치 처리 중 오류 발생 시, 최대 2회 재시도 후 성공한 배치까지의 결과를 반환함)
+    generate_embeddings_array의 결과를 파이썬 리스트로 반환 (기존 호출부 호환용)
+    대량 작업이나 pgvector에 바로 넘기는 경우에는 generate_embeddings_array를 사용
+
+    :param texts: 임베딩을 생성할 입력 텍스트 리스트
+    :param batch_size: 배치 처리 크기 (기본값: 32)
+    :return: 임베딩 벡터 리스트 (List[List[float]])
+    """
+    return generate_embeddings_array(texts, batch_size=batch_size).tolist()
+
+def encode_texts(texts: List[str], batch_size: int = 32) -> List[List[float]]:
+    """
+    encode_texts_array의 결과를 파이썬 리스트로 반환 (캐시 미사용)
+    """
+    return encode_texts_array(texts, batch_size=batch_size).tolist()
+
+def _token_lengths(embedder, texts: List[str]) -> np.ndarray:
+    """입력별 토큰 수 (토크나이저를 쓸 수 없으면 문자 수로 대신함)"""
+    tokenizer = getattr(embedder, "tokenizer", None)
+    if tokenizer is not None:
+        try:
+            input_ids = tokenizer(texts, add_special_tokens=True, truncation=False, verbose=False)["input_ids"]
+            return np.fromiter((len(ids) for ids in input_ids), dtype=np.int64, count=len(texts))
+        except Exception as e:
+            logger.debug(f"토큰 길이 계산 실패, 문자 수로 정렬: {e}")
+    return np.fromiter((len(text) for text in texts), dtype=np.int64, count=len(texts))
+
+def encode_texts_array(texts: List[str], batch_size: int = 32) -> np.ndarray:
+    """
+    주어진 텍스트 리스트를 batch_size 단위로 청크 처리하며 미리 할당한 float32 행렬에 임베딩을 채움 (캐시 미사용)
+    EMBEDDING_LENGTH_BUCKETING이 켜져 있으면 토큰 길이순으로 정렬해 비슷한 길이끼리 배치하고 (패딩 최소화)
+    결과는 입력 순서 그대로 채움
+    (배치 처리 중 오류 발생 시, 최대 2회 재시도 후 입력 순서상 앞에서부터 성공한 행까지만 반환함)
     
     :param texts: 임베딩을 생성할 입력 텍스트 리스트
     :param batch_size: 배치 처리 크기 (기본값: 32)
-    :return: 성공적으로 처리된 임베딩 벡터 리스트 (List[List[float]])
+    :return: 성공적으로 처리된 임베딩 행렬 (np.ndarray, shape=(성공 건수, dim))
     :raises RuntimeError: 임베딩 모델이 로드되지 않았을 경우
     """
-    if EMBEDDER is None:
+    embedder = get_embedder()
+    if embedder is None:
         logger.error("임베딩 모델(EMBEDDER)이 로드되지 않아 임베딩을 생성할 수 없습니다.")
         raise RuntimeError("Embedding model not initialized.")
 
     if not texts:
         logger.warning("빈 텍스트 리스트 입력.")
-        return []
+        return _empty_embeddings()
+
+    # 인코딩 순서: 토큰 길이 오름차순 (안정 정렬, 배치가 하나뿐이면 정렬 불필요)
+    order = np.arange(len(texts))
+    if settings.EMBEDDING_LENGTH_BUCKETING and len(texts) > batch_size:
+        lengths = _token_lengths(embedder, texts)
+        order = np.argsort(lengths, kind="stable")
+        truncated = int((lengths > embedder.max_seq_length).sum())
+        if truncated:
+            truncated_texts.inc(truncated)
+            logger.debug(f"max_seq_length({embedder.max_seq_length}) 초과로 잘리는 입력 {truncated}건")
 
-    # 성공적으로 생성된 모든 임베딩을 누적할 리스트
-    all_embeddings: List[List[float]] = []
+    # 첫 배치 결과로 차원을 알게 되면 전체 크기의 결과 행렬을 한 번만 할당
+    all_embeddings: Optional[np.ndarray] = None
+    filled = np.zeros(len(texts), dtype=bool)
     MAX_RETRIES = 2  # 1번 시도 후 최대 2번 재시도 = 총 3번 시도
     
     i = 0
     while i < len(texts):
-        chunk = texts[i:i + batch_size]
+        indices = order[i:i + batch_size]
+        chunk = [texts[j] for j in indices]
         chunk_index = i // batch_size
         
         attempt = 0
@@ -98,7 +393,7 @@ def generate_embeddings(texts: List[str], batch_size: int = 32) -> List[List[flo
                 start_time = time.perf_counter()
                 
                 # 텍스트 임베딩 생성 호출
-                embeddings_np = EMBEDDER.encode(
+                embeddings_np = embedder.encode(
                     chunk, 
                     batch_size=len(chunk),
                     convert_to_tensor=False
@@ -107,9 +402,13 @@ def generate_embeddings(texts: List[str], batch_size: int = 32) -> List[List[flo
                 duration_ms = (time.perf_counter() - start_time) * 1000
                 logger.debug(f"배치 #{chunk_index} 성공, 소요={duration_ms:.1f}ms")
                 
-                # 성공 시 결과 저장 및 루프 탈출
-                all_embeddings.extend(embeddings_np.tolist())
+                # 성공 시 원래 입력 위치에 결과 저장 및 루프 탈출
+                if all_embeddings is None:
+                    all_embeddings = np.empty((len(texts), embeddings_np.shape[1]), dtype=np.float32)
+                all_embeddings[indices] = embeddings_np
+                filled[indices] = True
                 batch_success = True
+                _mark_encode_succeeded()
                 break  # 성공했으므로 재시도 루프 탈출
                 
             except Exception as e:
@@ -118,17 +417,19 @@ def generate_embeddings(texts: List[str], batch_size: int = 32) -> List[List[flo
                     logger.warning(f"배치 #{chunk_index} 처리 중 오류 발생 (시도 {attempt}/{MAX_RETRIES}): {e}. 3초 후 재시도.")
                     time.sleep(3)  # 재시도 전 3초 대기
                 else:
-                    logger.error(f"배치 #{chunk_index} 최종 실패. 누적 결과 {len(all_embeddings)}건만 반환합니다.")
+                    logger.error(f"배치 #{chunk_index} 최종 실패. 누적 결과 {int(filled.sum())}건 중 입력 순서상 연속된 앞부분만 반환합니다.")
                     break  # 최종 실패했으므로 재시도 루프 탈출
 
         # --- 외부 루프: 배치 성공/실패 확인 ---
         if not batch_success:
-            # 최종 실패했으므로, 바깥 루프를 종료하고 지금까지의 성공 결과를 반환
+            # 최종 실패했으므로, 바깥 루프를 종료하고 입력 순서상 첫 빈 위치 앞까지의 결과를 반환
             logger.error(f"배치 #{chunk_index}가 {MAX_RETRIES + 1}번의 시도 후에도 실패하여 전체 임베딩 작업을 중단합니다.")
-            return all_embeddings
+            if all_embeddings is None:
+                return _empty_embeddings()
+            return all_embeddings[:int(np.argmin(filled))]
         
         # 성공했으므로 다음 배치로 이동
         i += batch_size
 
     logger.info(f"전체 {len(texts)}건의 임베딩 성공적으로 생성 완료.")
-    return all_embeddings
\ No newline at end of file
+    return all_embeddings
@@ -0,0 +1,161 @@
+"""
+Rule-based fallback scorer.
+
+Gemini 응답이 요청의 지연 예산 안에 도착하지 않을 때 돌려줄 예비 평가를 로컬에서 계산합니다.
+UserProfile의 선호도(평가 방식, 팀 프로젝트, 출석 방식, 관심 분야)와
+과목 필드(class_time_room, remarks, english_lecture, description 등)의 키워드만 보고
+같은 입력에는 항상 같은 결과를 내는 결정적 규칙으로 1~5점을 매깁니다.
+"""
+from typing import Iterable, List, Optional
+
+from backend.core.schema import AnalysisDetail, CourseInfo, GeminiResponse, UserProfile
+
+EXAM_KEYWORDS = ("시험", "중간고사", "기말고사", "퀴즈", "exam", "quiz", "test")
+ASSIGNMENT_KEYWORDS = ("과제", "프로젝트", "보고서", "레포트", "리포트", "실습", "발표", "assignment", "project", "report")
+TEAM_KEYWORDS = ("팀", "조별", "그룹", "협업", "team", "group")
+ONLINE_KEYWORDS = ("온라인", "비대면", "원격", "사이버", "녹화", "동영상", "이러닝", "e-러닝", "online", "zoom", "webex")
+OFFLINE_KEYWORDS = ("대면", "오프라인", "강의실", "offline")
+ENGLISH_KEYWORDS = ("영어", "english")
+
+# 과목 필드 값 중 "해당 없음"으로 볼 값
+NEGATIVE_FLAGS = {"", "n", "no", "x", "0", "-", "nan", "none", "아니오", "없음"}
+
+FALLBACK_SUMMARY = "AI 평가가 지연되어 강의 정보의 키워드를 기준으로 산출한 예비 평가입니다."
+
+
+def _clamp(score: float) -> int:
+    return max(1, min(5, int(round(score))))
+
+
+def _text(*values: Optional[str]) -> str:
+    return " ".join(v for v in values if v).casefold()
+
+
+def _count(text: str, keywords: Iterable[str]) -> int:
+    return sum(1 for keyword in keywords if keyword.casefold() in text)
+
+
+def _mentions_offline(text: str) -> bool:
+    # "비대면"에 "대면"이 포함되므로 먼저 제거하고 검사
+    return _count(text.replace("비대면", ""), OFFLINE_KEYWORDS) > 0
+
+
+def _is_flag_set(value: Optional[str]) -> bool:
+    return value is not None and value.strip().casefold() not in NEGATIVE_FLAGS
+
+
+def score_eval_method(user_profile: UserProfile, course_info: CourseInfo) -> AnalysisDetail:
+    """평가 방식 선호도 (1:시험선호 ~ 5:과제선호) vs 과목의 시험/과제 비중 키워드"""
+    text = _text(course_info.remarks, course_info.description, course_info.note)
+    exam_hits = _count(text, EXAM_KEYWORDS) + (1 if _is_flag_set(course_info.exam_date) else 0)
+    assignment_hits = _count(text, ASSIGNMENT_KEYWORDS)
+
+    if exam_hits + assignment_hits == 0:
+        return AnalysisDetail(
+            criteria="평가 방식",
+            score=3,
+            reason="강의 정보에서 시험/과제 비중을 판단할 근거를 찾지 못해 중간 점수를 부여했습니다.",
+        )
+
+    # 과목 성향을 1(시험 중심) ~ 5(과제 중심) 척도로 환산
+    lean = (assignment_hits - exam_hits) / (assignment_hits + exam_hits)
+    course_position = 3 + 2 * lean
+    score = _clamp(5 - abs(user_profile.eval_preference - course_position))
+    tendency = "과제/프로젝트" if lean > 0 else ("시험" if lean < 0 else "시험과 과제가 고르게")
+    return AnalysisDetail(
+        criteria="평가 방식",
+        score=score,
+        reason=f"강의 정보상 {tendency} 중심으로 보이며, 선호도({user_profile.eval_preference}/5)와의 차이를 반영했습니다.",
+    )
+
+
+def score_interests(user_profile: UserProfile, course_info: CourseInfo) -> AnalysisDetail:
+    """관심 분야 키워드가 과목명/개요/학과에 등장하는지"""
+    interests = [interest.strip() for interest in user_profile.interests if interest and interest.strip()]
+    if not interests:
+        return AnalysisDetail(criteria="관심 분야", score=3, reason="입력된 관심 분야가 없어 중간 점수를 부여했습니다.")
+
+    text = _text(course_info.course_name, course_info.description, course_info.major, course_info.department)
+    matched = [interest for interest in interests if interest.casefold() in text]
+    if not matched:
+        return AnalysisDetail(
+            criteria="관심 분야",
+            score=2,
+            reason="강의명과 강의 개요에서 관심 분야와 직접 관련된 키워드를 찾지 못했습니다.",
+        )
+    return AnalysisDetail(
+        criteria="관심 분야",
+        score=_clamp(3 + len(matched)),
+        reason=f"강의 정보에 관심 분야({', '.join(matched)})가 언급되어 있습니다.",
+    )
+
+
+def score_team_project(user_profile: UserProfile, course_info: CourseInfo) -> AnalysisDetail:
+    """팀 프로젝트 선호도 vs 비고/개요의 팀 활동 키워드"""
+    text = _text(course_info.remarks, course_info.description, course_info.note)
+    if not text:
+        return AnalysisDetail(criteria="팀 프로젝트", score=3, reason="강의 정보가 부족해 팀 활동 여부를 판단하지 못했습니다.")
+
+    has_team = _count(text, TEAM_KEYWORDS) > 0
+    course_position = 5 if has_team else 2
+    score = _clamp(5 - abs(user_profile.team_preference - course_position))
+    reason = "팀/조별 활동이 언급된 강의입니다." if has_team else "팀/조별 활동에 대한 언급이 없는 강의입니다."
+    return AnalysisDetail(
+        criteria="팀 프로젝트",
+        score=score,
+        reason=f"{reason} 팀 프로젝트 선호도({user_profile.team_preference}/5)를 반영했습니다.",
+    )
+
+
+def score_attendance(user_profile: UserProfile, course_info: CourseInfo) -> AnalysisDetail:
+    """선호 출석 방식 vs 수업 시간/강의실, 비고의 온라인/대면 키워드 (+ 영어 강의 여부)"""
+    course_text = _text(course_info.class_time_room, course_info.remarks)
+    course_online = _count(course_text, ONLINE_KEYWORDS) > 0
+    course_offline = _mentions_offline(course_text) or bool((course_info.class_time_room or "").strip())
+
+    preference_text = _text(*user_profile.attendence_type)
+    wants_online = _count(preference_text, ONLINE_KEYWORDS) > 0
+    wants_offline = _mentions_offline(preference_text)
+
+    reasons: List[str] = []
+    if not (wants_online or wants_offline):
+        score = 3
+        reasons.append("선호 출석 방식이 명확하지 않아 중간 점수를 부여했습니다.")
+    elif course_online and wants_online:
+        score = 5
+        reasons.append("온라인/비대면 요소가 있어 선호 출석 방식과 일치합니다.")
+    elif course_online and not course_offline:
+        # 여기서는 wants_online이 항상 False (대면 수업 선호)
+        score = 2
+        reasons.append("대면 수업을 선호하지만 비대면 중심 강의로 보입니다.")
+    elif course_offline:
+        score = 5 if wants_offline else 2
+        reasons.append("강의실이 배정된 대면 강의로 보입니다.")
+    else:
+        score = 3
+        reasons.append("강의 정보에서 수업 방식을 판단할 근거를 찾지 못했습니다.")
+
+    if _is_flag_set(course_info.english_lecture):
+        if _count(_text(*user_profile.interests), ENGLISH_KEYWORDS) == 0:
+            score -= 1
+        reasons.append("영어 강의입니다.")
+
+    return AnalysisDetail(criteria="출석 및 수업 방식", score=_clamp(score), reason=" ".join(reasons))
+
+
+def score_fallback(user_profile: UserProfile, course_info: CourseInfo) -> GeminiResponse:
+    """
+    규칙 기반 예비 평가. Gemini 응답과 같은 GeminiResponse 형식을 반환합니다.
+    """
+    details = [
+        score_eval_method(user_profile, course_info),
+        score_interests(user_profile, course_info),
+        score_team_project(user_profile, course_info),
+        score_attendance(user_profile, course_info),
+    ]
+    average = sum(detail.score for detail in details) / len(details)
+    return GeminiResponse(
+        course_id=course_info.id,
+        details=details,
+        summary=f"{FALLBACK_SUMMARY} 항목별 평균 적합도는 {average:.1f}/5입니다.",
+    )
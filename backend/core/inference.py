@@ -3,13 +3,27 @@ from google.genai import types
 from os import getenv
 from dotenv import load_dotenv
 from backend.core.schema import GeminiResponse, AnalysisRequest, UserProfile, CourseInfo, CourseHistory
-from typing import List, Optional
-import time
-from collections import Counter
-from backend.core.utils import return_user_courses, return_course_info
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Union
+import asyncio
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from backend.core.context import (
+    ProfileContext,
+    build_profile_context,
+    collect_taken_course_ids,
+    count_senior_courses,
+    extract_profile_text,
+    pick_recommended_course,
+)
+from backend.core.prompt import create_gemini_prompt, create_batch_gemini_prompt, estimate_tokens
+from backend.core.ratelimit import AdaptiveRateLimiter, call_with_retry
+from backend.core.singleflight import SingleFlight, hash_key
+from backend.core import metrics
 import json
 from loguru import logger
-from backend.core.neighbor import get_similar_users
+from backend.core.config import settings
+from backend.core.cache import evaluation_cache, make_cache_key
+from backend.core.fallback import score_fallback
 
 load_dotenv()
 
@@ -30,6 +44,14 @@ Candidate courses and the student's individual information will be provided belo
 Write all text content in Korean.
 """
 
+# 프롬프트 템플릿(backend/core/prompt.py)을 변경하면 이 값을 올려 평가 캐시를 무효화합니다.
+# SYSPROMPT와 프롬프트 토큰 예산 변경은 자동 반영됩니다.
+PROMPT_TEMPLATE_VERSION = "1"
+PROMPT_VERSION = (
+    f"{PROMPT_TEMPLATE_VERSION}-{hashlib.sha256(SYSPROMPT.encode('utf-8')).hexdigest()[:8]}"
+    f"-b{settings.PROMPT_TOKEN_BUDGET}"
+)
+
 GOOGLE_API_KEY = getenv("GOOGLE_API_KEY")
 
 try:
@@ -39,6 +61,59 @@ except Exception as e:
     logger.error(f"Gemini 클라이언트 초기화 실패: {e}")
     client = None
 
+# Gemini 호출은 블로킹 I/O이므로 전용 스레드 풀에서 실행 (프로세스 전체의 동시 호출 상한)
+GEMINI_EXECUTOR = ThreadPoolExecutor(
+    max_workers=settings.GEMINI_MAX_CONCURRENCY,
+    thread_name_prefix="gemini",
+)
+
+# 모든 Gemini 호출이 공유하는 RPM/TPM 리미터 (동시성은 스로틀링에 따라 자동 조절)
+gemini_limiter = AdaptiveRateLimiter(
+    requests_per_minute=settings.GEMINI_RPM,
+    tokens_per_minute=settings.GEMINI_TPM,
+    max_concurrency=settings.GEMINI_MAX_CONCURRENCY,
+)
+
+# 동일한 프롬프트로 동시에 들어온 Gemini 호출은 하나로 합침
+gemini_flight = SingleFlight("gemini")
+
+# 단계별 소요 시간 (부하 테스트/운영 중 병목 파악용)
+cache_lookup_ms = metrics.histogram("stage.cache_lookup_ms", "평가 캐시 조회 시간")
+prompt_build_ms = metrics.histogram("stage.prompt_build_ms", "프롬프트 생성 시간")
+gemini_call_ms = metrics.histogram("stage.gemini_ms", "Gemini 호출 시간 (리미터 대기, 재시도 포함)")
+evaluate_total_ms = metrics.histogram("stage.evaluate_total_ms", "요청 전체 평가 시간")
+fallbacks = metrics.counter("evaluation.fallbacks", "지연 예산 초과로 규칙 기반 평가를 반환한 과목 수")
+
+# 응답(출력) 토큰 추정치 - 과목 1개 평가 기준
+OUTPUT_TOKENS_PER_COURSE = 800
+
+def prompt_hash(prompt_str: str, config: types.GenerateContentConfig) -> str:
+    """모델, 시스템 프롬프트, 응답 스키마, 사용자 프롬프트를 모두 반영한 정규 프롬프트 해시"""
+    return hash_key(settings.GEMINI_MODEL, SYSPROMPT, str(config.response_schema), prompt_str)
+
+def generate_content(prompt_str: str, config: types.GenerateContentConfig, course_count: int = 1):
+    """
+    리미터와 재시도 스케줄러를 거쳐 generate_content를 호출합니다.
+    같은 프롬프트의 호출이 이미 진행 중이면 새로 호출하지 않고 그 결과를 함께 받습니다.
+    """
+    tokens = estimate_tokens(SYSPROMPT) + estimate_tokens(prompt_str) + OUTPUT_TOKENS_PER_COURSE * course_count
+    with gemini_call_ms.timer():
+        return gemini_flight.do(
+            prompt_hash(prompt_str, config),
+            lambda: call_with_retry(
+                lambda: client.models.generate_content(
+                    model=settings.GEMINI_MODEL,
+                    contents=prompt_str,
+                    # Structured Response config
+                    config=config),
+                limiter=gemini_limiter,
+                tokens=tokens,
+                max_retries=settings.GEMINI_MAX_RETRIES,
+                base_delay=settings.GEMINI_RETRY_BASE_DELAY,
+                max_delay=settings.GEMINI_RETRY_MAX_DELAY,
+            ),
+        )
+
 # TODO: 직접 db 접근하지 않고 BE에서 제공하는 함수로 연결
 def find_recommended_course(
     current_user: UserProfile,
@@ -48,16 +123,7 @@ def find_recommended_course(
     logger.info("추천 과목 산출 시작")
 
     # 1) 현재 사용자가 이미 수강한 과목 ID 집합 생성
-    taken_course_ids = set()
-    for c in getattr(current_user, "taken_courses", []) or []:
-        if hasattr(c, "course_id"):
-            cid = getattr(c, "course_id")
-        elif isinstance(c, dict):
-            cid = c.get("course_id") or c.get("id") or c.get("course_id")
-        else:
-            cid = c
-        if cid is not None:
-            taken_course_ids.add(str(cid))
+    taken_course_ids = collect_taken_course_ids(current_user)
     logger.debug(f"기수강 과목 수: {len(taken_course_ids)}")
 
     # 2) User가 수강 예정인 과목도 제외 집합에 추가
@@ -65,133 +131,35 @@ def find_recommended_course(
     for target_cid in user_target_courses:
         excluded_course_ids.add(str(target_cid))
 
-    # 3) 선배 UserProfile 리스트 가져오기(return_course_info를 사용해)
-    # TODO: senior를 UserProfile로 받은 상태에서, id 추출 해서 arg로 전달
-    senior_course_infors = []
+    # 3) 선배들의 수강 과목을 겹치는 횟수로 집계
     try:
-        senior_course_infors = return_user_courses(senior_ids)
+        counter = count_senior_courses(senior_ids)
     except Exception as e:
         logger.error(f"선배 기수강 정보 획득 실패: {e}")
         return None
 
-    # 4) 겹치는 횟수 cnt
-    counter = Counter()
-    for course_id in senior_course_infors:
-        course_id_str = str(course_id)
-        if course_id_str not in excluded_course_ids:
-            counter[course_id_str] += 1
-
-    # 5) 가장 많이 겹치는 과목 반환
-    if not counter:
+    # 4) 가장 많이 겹치는 과목 반환
+    most_common_course_id = pick_recommended_course(counter, excluded_course_ids)
+    if most_common_course_id is None:
         logger.info("겹치는 과목 없음")
         return None
 
-    most_common_course_id, _ = counter.most_common(1)[0]
     logger.info(f"추천 과목: {most_common_course_id}")
     return most_common_course_id
 
-# Prompt 문자열로 변경
-def create_gemini_prompt(request_data: AnalysisRequest) -> str:
-    """
-    Formats the user profile and course information into a single string prompt
-    for the Gemini model to analyze.
-    """
-    
-    taken_courses_history: List[CourseHistory] = request_data.user_profile.taken_courses
-
-    taken_courses_id_list: List[str] = [history.course_id for history in taken_courses_history]
-
-    taken_courses_detail: List[CourseInfo] = return_course_info(taken_courses_id_list)
-
-    course_strings = []
-
-    for course, history in zip(taken_courses_detail, taken_courses_history):
-        # 각 CourseInfo 객체에서 분석에 필요한 핵심 정보 추출
-        
-        # CourseInfo 객체인지 확인 (course_code가 있는 경우)
-        if hasattr(course, "course_code") and course.course_code:
-            
-            # 1. 기본 정보 섹션
-            base_info = (
-                f"[{course.course_code}] {course.course_name} (개설년도/학기: {course.year or '미상'}/{course.semester or '미상'} | "
-                f"{course.credits or '미상'}학점 | {course.hours or '미상'}시수) "
-                f"개설: {course.department or '미상'} ({course.major or '미상'}) | 담당교수: {course.professor or '미상'}. "
-                f"강의 시간/장소: {course.class_time_room or '미상'} (정원: {course.capacity or '미상'}). "
-            )
-            
-            # 2. 강의 특징 섹션
-            feature_info = (
-                f"특징: {course.target_students or course.recommended_year or '전학년'} 대상. "
-                f"영어강의: {course.english_lecture or 'N'} | 중국어강의: {course.chinese_lecture or 'N'} | "
-                f"인증교과목: {course.approved_course or 'N'} | 우등생과정: {course.honors_course or 'N'}. "
-            )
-
-            # 3. 시험 및 성적 섹션 (CourseHistory에서 성적 정보를 가져옴)
-            # taken_courses_history의 성적 정보를 가져와 추가
-            grade_info = f"성적: {history.grade or '미상'}."
-            exam_info = f"시험일정: {course.exam_date or '미상'}."
-            
-            # 4. 상세 정보 섹션 (비고/개요 등)
-            detail_info = f"상세설명(개요/비고): {course.description or course.remarks or '내용 없음'}."
-            
-            course_string = base_info + feature_info + grade_info + exam_info + detail_info
-            
-        else:
-            # CourseHistory 객체 폴백 (CourseInfo가 아닌 경우)
-            course_string = f"[ID: {course.course_id}] 성적: {course.grade}"
-            
-        course_strings.append(course_string)
-
-    # 모든 과목 정보를 줄바꿈으로 구분하여 하나의 문자열로 결합
-    taken_courses_detail_str = "\n".join(course_strings) or "없음"
-
-    # 1. User Profile Details (similar to extract_profile_text but for the prompt)
-    user_info = f"""
-    --- 학생 정보 ---
-    - 기수강 과목: {taken_courses_detail_str}
-    - 평가 방식 선호 (1:시험, 5:과제): {request_data.user_profile.eval_preference}
-    - 관심 분야: {', '.join(request_data.user_profile.interests)}
-    - 팀 프로젝트 선호 (1:매우 싫음, 5:매우 좋음): {request_data.user_profile.team_preference}
-    - 선호 출석/수업 방식: {', '.join(request_data.user_profile.attendence_type)}
-    """
-
-    # 2. Course Information
-    course_info_parts = [
-        f"--- 분석 대상 과목 정보 ---",
-        f"- 과목 코드: {request_data.course_info.course_code or '정보 없음'}",
-        f"- 과목명: {request_data.course_info.course_name or '정보 없음'}",
-    ]
-    
-    # Add optional fields if they exist
-    if request_data.course_info.department:
-        course_info_parts.append(f"- 개설 학부: {request_data.course_info.department}")
-    if request_data.course_info.major:
-        course_info_parts.append(f"- 개설 학과: {request_data.course_info.major}")
-    if request_data.course_info.professor:
-        course_info_parts.append(f"- 담당 교수: {request_data.course_info.professor}")
-    if request_data.course_info.credits:
-        course_info_parts.append(f"- 학점: {request_data.course_info.credits}")
-    if request_data.course_info.description:
-        course_info_parts.append(f"- 강의 개요: {request_data.course_info.description}")
-    if request_data.course_info.remarks:
-        course_info_parts.append(f"- 비고: {request_data.course_info.remarks}")
-    
-    course_info = "\n    ".join(course_info_parts) + "\n    "
-    
-    # 3. Final instruction
-    final_instruction = "\n\n위 학생 정보를 바탕으로 아래 과목에 대한 적합도를 분석하고 JSON 형식으로 결과를 반환하시오."
-    
-    return user_info + course_info + final_instruction
-
 # 개별 요청 함수
-def call_gemini(user_prompt: AnalysisRequest):
+def call_gemini(
+    user_prompt: AnalysisRequest,
+    taken_courses_detail: Optional[List[Union[CourseInfo, CourseHistory]]] = None,
+):
     if client is None:
         logger.error("Gemini 클라이언트가 초기화되지 않았습니다.")
         raise RuntimeError("Gemini client not initialized")
 
     logger.info("Gemini 요청 시작")
 
-    prompt_str = create_gemini_prompt(user_prompt)
+    with prompt_build_ms.timer():
+        prompt_str = create_gemini_prompt(user_prompt, taken_courses_detail)
 
     # Define config
     config = types.GenerateContentConfig(
@@ -201,83 +169,350 @@ def call_gemini(user_prompt: AnalysisRequest):
     )
 
     # Make request
-    response = client.models.generate_content(
-        model="gemini-2.5-flash",
-        contents=prompt_str,
-        # Structured Response config
-        config=config)
+    response = generate_content(prompt_str, config)
     logger.info(f"Gemini 응답 수신: 길이={len(response.text) if hasattr(response, 'text') and response.text else 0}")
 
     return response.text
 
-def extract_profile_text(user_profile: UserProfile) -> str:
+# 여러 과목 배치 요청 함수
+def call_gemini_batch(
+    user_profile: UserProfile,
+    course_infos: List[CourseInfo],
+    taken_courses_detail: Optional[List[Union[CourseInfo, CourseHistory]]] = None,
+) -> Dict[int, str]:
+    """
+    여러 과목을 한 번의 generate_content 호출로 평가합니다 (List[GeminiResponse] 스키마).
+
+    :return: course_id → 평가 JSON 문자열. 응답에서 빠졌거나 스키마에 맞지 않는 과목은 포함되지 않습니다.
+    """
+    if client is None:
+        logger.error("Gemini 클라이언트가 초기화되지 않았습니다.")
+        raise RuntimeError("Gemini client not initialized")
+
+    logger.info(f"Gemini 배치 요청 시작: 과목 {len(course_infos)}개")
+
+    with prompt_build_ms.timer():
+        prompt_str = create_batch_gemini_prompt(user_profile, course_infos, taken_courses_detail)
+
+    config = types.GenerateContentConfig(
+        system_instruction=SYSPROMPT,
+        response_mime_type="application/json",
+        response_schema=list[GeminiResponse]
+    )
+
+    response = generate_content(prompt_str, config, course_count=len(course_infos))
+    logger.info(f"Gemini 배치 응답 수신: 길이={len(response.text) if hasattr(response, 'text') and response.text else 0}")
+
+    requested_ids = {course.id for course in course_infos}
+    results: Dict[int, str] = {}
+    for item in json.loads(response.text or "[]"):
+        try:
+            evaluation = GeminiResponse.model_validate(item)
+        except Exception as e:
+            logger.warning(f"배치 응답 항목 검증 실패: {e}")
+            continue
+        if evaluation.course_id in requested_ids and evaluation.course_id not in results:
+            results[evaluation.course_id] = evaluation.model_dump_json()
+
+    missing = requested_ids - results.keys()
+    if missing:
+        logger.warning(f"배치 응답에 누락된 과목: {sorted(missing)}")
+    return results
+
+# --- 평가 캐시 연동 ---
+def lookup_cached_evaluation(user_prompt: AnalysisRequest) -> Tuple[Optional[str], Optional[str]]:
+    """(캐시 키, 캐시된 응답)을 반환. 캐시가 꺼져 있으면 (None, None)"""
+    if not settings.EVAL_CACHE_ENABLED:
+        return None, None
+
+    with cache_lookup_ms.timer():
+        key = make_cache_key(user_prompt.user_profile, user_prompt.course_info, settings.GEMINI_MODEL, PROMPT_VERSION)
+        cached = evaluation_cache.get(key)
+    if cached is not None:
+        logger.info(f"평가 캐시 사용: course_id={user_prompt.course_info.id}")
+    return key, cached
+
+def store_cached_evaluation(key: Optional[str], user_prompt: AnalysisRequest, result: str) -> None:
+    if key is None:
+        return
+
+    # 스키마에 맞는 응답만 캐싱 (잘못된 응답이 캐시에 고정되지 않도록)
+    try:
+        GeminiResponse.model_validate_json(result)
+    except Exception as e:
+        logger.warning(f"Gemini 응답 검증 실패로 캐싱하지 않음: {e}")
+        return
+
+    evaluation_cache.set(key, user_prompt.course_info.id, settings.GEMINI_MODEL, PROMPT_VERSION, result)
+
+def call_gemini_cached(
+    user_prompt: AnalysisRequest,
+    taken_courses_detail: Optional[List[Union[CourseInfo, CourseHistory]]] = None,
+) -> str:
+    """
+    평가 캐시를 거쳐 Gemini를 호출합니다. 동일한 (프로필, 과목, 모델, 프롬프트 버전)이면 캐시된 응답을 반환합니다.
+    """
+    key, cached = lookup_cached_evaluation(user_prompt)
+    if cached is not None:
+        return cached
+
+    result = call_gemini(user_prompt, taken_courses_detail)
+    store_cached_evaluation(key, user_prompt, result)
+    return result
+
+def call_gemini_batch_cached(
+    context: ProfileContext,
+    course_infos: List[CourseInfo],
+) -> Dict[int, str]:
+    """
+    캐시 적중 과목은 제외하고, 나머지만 하나의 배치 요청으로 평가한 뒤 과목별로 캐시에 저장합니다.
+    """
+    requests = {course.id: AnalysisRequest(user_profile=context.user_profile, course_info=course) for course in course_infos}
+    results: Dict[int, str] = {}
+    keys: Dict[int, Optional[str]] = {}
+
+    for course_id, request_data in requests.items():
+        keys[course_id], cached = lookup_cached_evaluation(request_data)
+        if cached is not None:
+            results[course_id] = cached
+
+    misses = [course for course in course_infos if course.id not in results]
+    if misses:
+        batch_results = call_gemini_batch(context.user_profile, misses, context.taken_course_details)
+        for course_id, result in batch_results.items():
+            store_cached_evaluation(keys[course_id], requests[course_id], result)
+            results[course_id] = result
+
+    return results
+
+def _result_item(
+    course_info: CourseInfo,
+    evaluation: Optional[str] = None,
+    recommendation: Optional[str] = None,
+    error: Optional[str] = None,
+    fallback: bool = False,
+) -> dict:
+    return {
+        "course_id": course_info.id,
+        "evaluation": evaluation,
+        "recommendation": recommendation,
+        "error": error,
+        "fallback": fallback,
+    }
+
+def _fallback_item(context: ProfileContext, course_info: CourseInfo) -> dict:
+    """지연 예산 초과 시 반환할 규칙 기반 예비 평가"""
+    fallbacks.inc()
+    evaluation = score_fallback(context.user_profile, course_info).model_dump_json()
+    most_common_course = context.recommend(exclude=[course_info.course_code])
+    return _result_item(course_info, evaluation=evaluation, recommendation=most_common_course, fallback=True)
+
+async def _await_until(future: asyncio.Future, deadline: Optional[float]):
+    """
+    deadline(loop.time() 기준)까지 future를 기다립니다. 시간이 지나면 TimeoutError를 던지지만
+    future 자체는 취소하지 않으므로, executor에서 진행 중인 Gemini 호출은 끝까지 실행되어 결과가 캐시에 저장됩니다.
+    """
+    if deadline is None:
+        return await future
+    remaining = deadline - asyncio.get_running_loop().time()
+    return await asyncio.wait_for(asyncio.shield(future), timeout=max(remaining, 0))
+
+# 과목 1개에 대한 평가 + 추천 과목 산출
+async def evaluate_target_course(
+    context: ProfileContext,
+    course_info: CourseInfo,
+    semaphore: asyncio.Semaphore,
+    deadline: Optional[float] = None,
+) -> dict:
     """
-    UserProfile 객체에서 'taken_courses'를 제외한 모든 필드를 추출하여
-    임베딩 생성을 위한 단일 문자열로 결합합니다.
+    단일 과목에 대해 Gemini 평가를 수행하고, 요청 단위로 미리 계산된 ProfileContext에서 추천 과목을 고릅니다.
+    실패하더라도 예외를 전파하지 않고 error 필드에 기록하므로,
+    한 과목의 실패가 같은 요청의 다른 과목 평가에 영향을 주지 않습니다.
+    deadline(loop.time() 기준)이 지나면 규칙 기반 예비 평가(fallback=True)를 반환합니다.
     """
-    
-    # taken_courses를 제외하고 모든 데이터를 딕셔너리로 추출합니다.
-    user_data_dict = user_profile.model_dump(exclude={"taken_courses"}) 
-    
-    parts = []
-    
-    # 평가 방식 선호도 (eval_preference)
-    if 'eval_preference' in user_data_dict:
-        parts.append(f"평가 방식 선호도: {user_data_dict['eval_preference']} (1:시험선호, 5:과제선호)")
-    
-    # 관심 분야 (interests) - 리스트를 쉼표로 연결
-    interests: List[str] = user_data_dict.get('interests', [])
-    if interests:
-        parts.append(f"관심 분야: {', '.join(interests)}")
-        
-    # 팀 프로젝트 선호도 (team_preference)
-    if 'team_preference' in user_data_dict:
-        parts.append(f"팀 프로젝트 선호도: {user_data_dict['team_preference']} (1:매우싫음, 5:매우좋음)")
-    
-    # 선호 출석 방식 (attendence_type) - 리스트를 쉼표로 연결
-    attendance: List[str] = user_data_dict.get('attendence_type', [])
-    if attendance:
-        parts.append(f"선호 출석 방식: {', '.join(attendance)}")
-    
-    # 모든 정보를 쉼표와 공백으로 연결하여 최종 문자열 생성
-    user_profile_str = ", ".join(parts)
-    
-    return user_profile_str
-
-# BE에서 호출할 함수
-def return_total_result(count: int, user_profile: UserProfile, target_courses: List[CourseInfo]):
-    logger.info(f"총 결과 생성 시작: count={count}")
-
-    total_results: List[GeminiResponse] = []
-    
-    # 일단은 async 아니고 무식하게
-    for i in range(1, count + 1):
-        logger.debug(f"{i}번째 요청 처리")
-        if i > 1:
-            logger.debug("대기 0.3초")
-            time.sleep(0.3) 
-            
-        # 개별 요청 Argument 구성, 과목 정보는 지금은 생략
-        request_data = AnalysisRequest(user_profile=user_profile, course_info=target_courses[i-1])
-        
-        # Gemini 호출 및 결과 취합
-        result = call_gemini(request_data)
-        # 선배들로부터 추천 과목 찾기
-        user_profile_str = extract_profile_text(user_profile)
-
-        logger.info("유사 사용자 검색 시작")
-        senior_ids: List[int] = get_similar_users(user_profile_str, k=5)
-        logger.info("유사 사용자 검색 완료")
-
-        most_common_course = find_recommended_course(user_profile, senior_ids)
-        logger.info(f"추천 과목: {most_common_course}")
-
-        total_results.append({
-            "evaluation": result,
-            "recommendation": most_common_course
-        })
+    loop = asyncio.get_running_loop()
+    request_data = AnalysisRequest(user_profile=context.user_profile, course_info=course_info)
+
+    async with semaphore:
+        if deadline is not None and loop.time() >= deadline:
+            # 예산을 이미 다 쓴 경우 Gemini 호출 자체를 생략
+            logger.warning(f"지연 예산 소진, 규칙 기반 평가 반환: course_id={course_info.id}")
+            return _fallback_item(context, course_info)
+
+        logger.debug(f"과목 평가 시작: course_id={course_info.id}")
+        future = loop.run_in_executor(
+            GEMINI_EXECUTOR, call_gemini_cached, request_data, context.taken_course_details
+        )
+        try:
+            result = await _await_until(future, deadline)
+        except Exception as e:
+            if not future.done():
+                logger.warning(f"지연 예산 초과, 규칙 기반 평가 반환 (Gemini 응답은 도착 시 캐시에 저장): course_id={course_info.id}")
+                return _fallback_item(context, course_info)
+            logger.error(f"과목 평가 실패: course_id={course_info.id}, 오류={e}")
+            return _result_item(course_info, error=str(e))
+
+    # 선배들로부터 추천 과목 찾기 (평가 대상 과목 자신은 제외)
+    most_common_course = context.recommend(exclude=[course_info.course_code])
+    logger.info(f"추천 과목: {most_common_course}")
+    return _result_item(course_info, evaluation=result, recommendation=most_common_course)
+
+# 여러 과목을 한 번의 Gemini 호출로 평가 + 추천 과목 산출
+async def evaluate_target_course_batch(
+    context: ProfileContext,
+    course_infos: List[CourseInfo],
+    semaphore: asyncio.Semaphore,
+    deadline: Optional[float] = None,
+) -> List[dict]:
+    """
+    과목 묶음을 배치 프롬프트 한 번으로 평가합니다. 배치 호출이 실패했거나
+    응답에서 빠진 과목은 개별 호출(evaluate_target_course)로 다시 평가합니다.
+    deadline이 지나면 묶음 전체에 규칙 기반 예비 평가를 반환합니다.
+    """
+    loop = asyncio.get_running_loop()
+
+    async with semaphore:
+        if deadline is not None and loop.time() >= deadline:
+            logger.warning(f"지연 예산 소진, 규칙 기반 평가 반환: course_ids={[course.id for course in course_infos]}")
+            return [_fallback_item(context, course) for course in course_infos]
+
+        logger.debug(f"배치 평가 시작: course_ids={[course.id for course in course_infos]}")
+        future = loop.run_in_executor(
+            GEMINI_EXECUTOR, call_gemini_batch_cached, context, course_infos
+        )
+        try:
+            batch_results = await _await_until(future, deadline)
+        except Exception as e:
+            if not future.done():
+                logger.warning("지연 예산 초과, 배치 전체에 규칙 기반 평가 반환 (Gemini 응답은 도착 시 캐시에 저장)")
+                return [_fallback_item(context, course) for course in course_infos]
+            logger.error(f"배치 평가 실패, 개별 평가로 전환: {e}")
+            batch_results = {}
+
+    async def _resolve(course_info: CourseInfo) -> dict:
+        if course_info.id in batch_results:
+            most_common_course = context.recommend(exclude=[course_info.course_code])
+            return _result_item(course_info, evaluation=batch_results[course_info.id], recommendation=most_common_course)
+        return await evaluate_target_course(context, course_info, semaphore, deadline)
+
+    return list(await asyncio.gather(*(_resolve(course) for course in course_infos)))
+
+async def iter_total_results(
+    count: int,
+    user_profile: UserProfile,
+    target_courses: List[CourseInfo],
+    max_concurrency: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    deadline_seconds: Optional[float] = None,
+    context: Optional[ProfileContext] = None,
+) -> AsyncIterator[Tuple[int, dict]]:
+    """
+    대상 과목들의 평가를 한 번에 팬아웃하고, 완료되는 순서대로 (입력 인덱스, 결과)를 내보냅니다.
+    제너레이터가 중간에 닫히면(예: 스트리밍 클라이언트 연결 종료) 남은 평가는 취소됩니다.
+
+    :param count: 평가할 과목 수 (target_courses 앞에서부터 count개)
+    :param user_profile: 평가 대상 학생 프로필
+    :param target_courses: 평가할 과목 리스트
+    :param max_concurrency: 동시에 진행할 Gemini 호출 수 상한 (기본값: settings.GEMINI_MAX_CONCURRENCY)
+    :param batch_size: 한 번의 Gemini 호출에 묶을 최대 과목 수. 1 이하이면 과목별 개별 호출
+                       (기본값: settings.GEMINI_BATCH_SIZE)
+    :param deadline_seconds: 요청 시작부터의 지연 예산(초). 넘기면 남은 과목은 규칙 기반 예비 평가로 대체.
+                             0 이하이면 무제한 (기본값: settings.EVAL_DEADLINE_SECONDS)
+    :param context: 미리 만든 ProfileContext. 스트리밍 엔드포인트는 응답을 시작하기 전에 만들어 넘기므로
+                    스트리밍 중에는 요청 세션을 쓰지 않음 (None이면 여기서 생성)
+    """
+    courses = target_courses[:count]
+    limit = max_concurrency or settings.GEMINI_MAX_CONCURRENCY
+    batch_size = batch_size if batch_size is not None else settings.GEMINI_BATCH_SIZE
+    deadline_seconds = deadline_seconds if deadline_seconds is not None else settings.EVAL_DEADLINE_SECONDS
+    logger.info(f"총 결과 생성 시작: count={len(courses)}, 동시성={limit}, 배치크기={batch_size}, 지연예산={deadline_seconds}s")
 
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + deadline_seconds if deadline_seconds > 0 else None
+
+    # 임베딩, kNN, 선배 과목 집계, 기수강 과목 조회는 과목과 무관하므로 요청당 한 번만 계산
+    # (to_thread는 컨텍스트를 복사하므로 요청 세션(db.database.session_scope)이 그대로 전달됨)
+    try:
+        if context is None:
+            context = await asyncio.to_thread(build_profile_context, user_profile)
+    except Exception as e:
+        logger.error(f"프로필 컨텍스트 생성 실패: {e}")
+        for index, course in enumerate(courses):
+            yield index, _result_item(course, error=str(e))
+        return
+
+    semaphore = asyncio.Semaphore(limit)
+
+    async def _single(index: int, course: CourseInfo) -> List[Tuple[int, dict]]:
+        return [(index, await evaluate_target_course(context, course, semaphore, deadline))]
+
+    async def _batch(offset: int, chunk: List[CourseInfo]) -> List[Tuple[int, dict]]:
+        items = await evaluate_target_course_batch(context, chunk, semaphore, deadline)
+        return [(offset + i, item) for i, item in enumerate(items)]
+
+    if batch_size > 1 and len(courses) > 1:
+        tasks = [
+            asyncio.ensure_future(_batch(i, courses[i:i + batch_size]))
+            for i in range(0, len(courses), batch_size)
+        ]
+    else:
+        tasks = [asyncio.ensure_future(_single(i, course)) for i, course in enumerate(courses)]
+
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            for index, item in await next_done:
+                yield index, item
+    finally:
+        for task in tasks:
+            task.cancel()
+
+async def return_total_result_async(
+    count: int,
+    user_profile: UserProfile,
+    target_courses: List[CourseInfo],
+    max_concurrency: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    deadline_seconds: Optional[float] = None,
+) -> List[dict]:
+    """
+    대상 과목들의 평가를 동시에 실행하고 모두 끝나면 결과를 모아 반환합니다.
+
+    :return: 입력 순서와 동일한 순서의 결과 리스트.
+             각 항목은 {"course_id", "evaluation", "recommendation", "error", "fallback"} 형태이며,
+             실패한 과목은 evaluation=None, error에 오류 메시지가 담깁니다.
+             지연 예산을 넘긴 과목은 규칙 기반 예비 평가가 담기고 fallback=True입니다.
+    """
+    total_results: List[Optional[dict]] = [None] * len(target_courses[:count])
+    with evaluate_total_ms.timer():
+        async for index, item in iter_total_results(
+            count, user_profile, target_courses,
+            max_concurrency=max_concurrency, batch_size=batch_size, deadline_seconds=deadline_seconds,
+        ):
+            total_results[index] = item
+
+    failed = sum(1 for r in total_results if r["error"])
+    fallback_count = sum(1 for r in total_results if r["fallback"])
+    logger.info(f"총 결과 생성 완료: 성공={len(total_results) - failed}, 실패={failed}, 예비 평가={fallback_count}")
     return total_results
 
+# BE에서 호출할 함수 (동기 진입점)
+def return_total_result(
+    count: int,
+    user_profile: UserProfile,
+    target_courses: List[CourseInfo],
+    max_concurrency: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    deadline_seconds: Optional[float] = None,
+) -> List[dict]:
+    """
+    return_total_result_async의 동기 래퍼. 이벤트 루프가 없는 스레드(동기 라우터, 스크립트)에서 사용합니다.
+    """
+    return asyncio.run(
+        return_total_result_async(
+            count, user_profile, target_courses,
+            max_concurrency=max_concurrency, batch_size=batch_size, deadline_seconds=deadline_seconds,
+        )
+    )
+
 if __name__=="__main__":
     pass
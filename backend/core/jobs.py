@@ -0,0 +1,302 @@
+"""
+Asynchronous evaluation job workers.
+
+POST /evaluations로 들어온 평가 요청은 evaluation_jobs 테이블에 저장되고,
+앱 이벤트 루프 위에서 도는 고정 크기 워커 풀이 이를 하나씩 가져가 처리합니다.
+
+- 작업 획득은 SELECT ... FOR UPDATE SKIP LOCKED 이므로 여러 워커/프로세스가 안전하게 나눠 가집니다.
+- 작업이 Postgres에 있으므로 재시작 후에도 남아 있으며, 처리 중인 워커는 heartbeat_at을 주기적으로 갱신해
+  임대(lease)를 연장합니다. 임대 시간 동안 갱신이 없는 running 작업은 중단된 것으로 보고 다시 큐에 넣습니다
+  (최대 시도 횟수 초과 시 failed).
+- 임대는 (작업 ID, 시도 횟수)로 식별하므로, 임대를 잃은 워커는 평가를 중단하고 결과도 쓰지 않습니다.
+- 평가 자체는 비동기 팬아웃(return_total_result_async)이라 워커가 스레드를 붙잡지 않습니다.
+  DB 접근만 짧게 executor에서 실행합니다.
+"""
+from typing import Dict, List, Optional, Tuple
+import asyncio
+
+from loguru import logger
+
+from backend.core import metrics
+from backend.core.config import settings
+from backend.core.inference import return_total_result_async
+from backend.core.schema import CourseInfo, CourseHistory, UserProfile
+from backend.db.database import SessionLocal
+from backend.models.evaluation_job import EvaluationJob, JOB_SUCCEEDED, JOB_FAILED
+from backend.repositories.repository import CourseRepository, EvaluationJobRepository
+
+FINISHED_STATUSES = (JOB_SUCCEEDED, JOB_FAILED)
+
+
+def _with_repository(fn, *args):
+    """새 세션으로 EvaluationJobRepository 메서드를 실행 (executor 스레드에서 호출)"""
+    db = SessionLocal()
+    try:
+        return fn(EvaluationJobRepository(db), *args)
+    finally:
+        db.close()
+
+
+def _job_snapshot(job: Optional[EvaluationJob]) -> Optional[dict]:
+    """세션 밖에서 쓸 수 있도록 ORM 객체를 dict로 복사"""
+    if job is None:
+        return None
+    return {
+        "id": job.id,
+        "status": job.status,
+        "course_ids": job.course_ids,
+        "request": job.request,
+        "results": job.results,
+        "error": job.error,
+        "attempts": job.attempts,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
+
+
+def load_job(job_id: str) -> Optional[dict]:
+    return _with_repository(lambda repo: _job_snapshot(repo.get_job(job_id)))
+
+
+def load_course_infos(course_ids: List[int]) -> List[CourseInfo]:
+    db = SessionLocal()
+    try:
+        return [CourseInfo.model_validate(course) for course in CourseRepository(db).get_courses_by_ids(course_ids)]
+    finally:
+        db.close()
+
+
+def job_user_profile(request: dict) -> UserProfile:
+    return UserProfile(
+        taken_courses=[CourseHistory(**taken) for taken in request.get("taken_courses", [])],
+        eval_preference=request.get("eval_preference", 3),
+        interests=request.get("interests", []),
+        team_preference=request.get("team_preference", 3),
+        attendence_type=request.get("attendence_type", []),
+    )
+
+
+class EvaluationWorkerPool:
+    """
+    evaluation_jobs 테이블을 소비하는 워커 풀.
+
+    :param workers: 동시에 처리할 작업 수
+    :param poll_seconds: 알림이 없을 때 큐를 다시 확인하는 주기 (다른 프로세스가 넣은 작업 대비)
+    :param lease_seconds: running 작업의 임대 시간 (처리 중에는 1/3 주기로 연장)
+    :param max_attempts: 작업당 최대 시도 횟수
+    """
+
+    def __init__(self, workers: int, poll_seconds: float, lease_seconds: float, max_attempts: int):
+        self.workers = workers
+        self.poll_seconds = poll_seconds
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._finished: Dict[str, asyncio.Event] = {}
+
+        self.enqueued = metrics.counter("evaluation_jobs.enqueued", "등록된 평가 작업 수")
+        self.succeeded = metrics.counter("evaluation_jobs.succeeded", "완료된 평가 작업 수")
+        self.failed = metrics.counter("evaluation_jobs.failed", "실패한 평가 작업 수")
+        self.requeued = metrics.counter("evaluation_jobs.requeued", "다시 큐에 넣은 작업 수")
+        self.lease_lost = metrics.counter("evaluation_jobs.lease_lost", "임대를 잃어 결과를 쓰지 않은 작업 수")
+        self.busy = metrics.gauge("evaluation_jobs.busy_workers", "작업 처리 중인 워커 수")
+        self.queue_wait_ms = metrics.histogram("evaluation_jobs.queue_wait_ms", "등록부터 처리 시작까지 대기 시간")
+        self.run_ms = metrics.histogram("evaluation_jobs.run_ms", "작업 처리 시간")
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    # --- 수명 주기 ---
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        self._wakeup = asyncio.Event()
+        await self._recover()
+        self._tasks = [asyncio.create_task(self._worker(i), name=f"evaluation-worker-{i}") for i in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._maintenance(), name="evaluation-job-maintenance"))
+        logger.info(f"평가 작업 워커 {self.workers}개 시작")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        logger.info("평가 작업 워커 종료")
+
+    # --- 등록/대기 ---
+    async def enqueue(self, request) -> dict:
+        """작업을 등록하고 워커를 깨웁니다. 등록된 작업의 스냅샷을 반환"""
+        loop = asyncio.get_running_loop()
+        job = await loop.run_in_executor(None, _with_repository, lambda repo: _job_snapshot(repo.create_job(request)))
+        self.enqueued.inc()
+        if self._wakeup is not None:
+            self._wakeup.set()
+        logger.info(f"평가 작업 등록: job_id={job['id']}, 과목 {len(job['course_ids'])}개")
+        return job
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[dict]:
+        """
+        작업이 끝나거나 timeout이 지날 때까지 기다린 뒤 최신 상태를 반환합니다.
+        같은 프로세스의 워커가 처리하면 즉시 깨어나고, 다른 프로세스가 처리하는 경우에 대비해 주기적으로 DB를 확인합니다.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        # DB를 확인하기 전에 등록해야 그 사이에 끝난 작업의 알림을 놓치지 않음
+        event = self._finished.setdefault(job_id, asyncio.Event())
+        try:
+            while True:
+                job = await loop.run_in_executor(None, load_job, job_id)
+                remaining = deadline - loop.time()
+                if job is None or job["status"] in FINISHED_STATUSES or remaining <= 0:
+                    return job
+                try:
+                    await asyncio.wait_for(event.wait(), timeout=min(remaining, self.poll_seconds))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            if self._finished.get(job_id) is event:
+                del self._finished[job_id]
+
+    # --- 워커 ---
+    async def _recover(self) -> None:
+        loop = asyncio.get_running_loop()
+        requeued, failed = await loop.run_in_executor(
+            None, _with_repository,
+            lambda repo: repo.requeue_expired_jobs(self.lease_seconds, self.max_attempts),
+        )
+        if requeued or failed:
+            self.requeued.inc(requeued)
+            self.failed.inc(failed)
+            logger.warning(f"임대 시간이 지난 평가 작업 정리: 재등록={requeued}, 실패 처리={failed}")
+            if requeued and self._wakeup is not None:
+                self._wakeup.set()
+
+    async def _maintenance(self) -> None:
+        while True:
+            await asyncio.sleep(max(self.lease_seconds / 2, self.poll_seconds))
+            try:
+                await self._recover()
+            except Exception as e:
+                logger.error(f"평가 작업 임대 정리 실패: {e}")
+
+    async def _worker(self, worker_id: int) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            self._wakeup.clear()
+            try:
+                job = await loop.run_in_executor(None, _with_repository, lambda repo: _job_snapshot(repo.claim_next_job()))
+            except Exception as e:
+                logger.error(f"평가 작업 획득 실패 (worker={worker_id}): {e}")
+                job = None
+
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            self.busy.inc()
+            try:
+                await self._run(job)
+            except Exception as e:
+                # 결과 저장 실패 등: 작업은 running으로 남아 임대 만료 후 다시 처리됨
+                logger.error(f"평가 작업 처리 중 오류: job_id={job['id']}, 오류={e}")
+            except asyncio.CancelledError:
+                # 종료 중에 처리하던 작업은 다음 기동 때 바로 다시 처리되도록 큐로 되돌림
+                try:
+                    if _with_repository(lambda repo: repo.requeue_job(job["id"], job["attempts"])):
+                        self.requeued.inc()
+                except Exception as e:
+                    logger.error(f"종료 중 평가 작업 재등록 실패: job_id={job['id']}, 오류={e}")
+                raise
+            finally:
+                self.busy.dec()
+
+    async def _heartbeat(self, job_id: str, attempt: int) -> None:
+        """임대를 주기적으로 연장합니다. 임대를 잃으면(만료 후 재등록됨) 반환"""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                renewed = await loop.run_in_executor(
+                    None, _with_repository, lambda repo: repo.renew_lease(job_id, attempt)
+                )
+            except Exception as e:
+                # 일시적인 DB 오류: 임대가 끝나기 전에 다음 주기에서 다시 시도
+                logger.warning(f"평가 작업 임대 연장 실패: job_id={job_id}, 오류={e}")
+                continue
+            if not renewed:
+                return
+
+    async def _evaluate(self, job: dict) -> Tuple[Optional[list], Optional[str]]:
+        """작업의 과목들을 평가합니다. (과목별 결과 목록, 오류 메시지)를 반환"""
+        loop = asyncio.get_running_loop()
+        try:
+            course_infos = await loop.run_in_executor(None, load_course_infos, job["course_ids"])
+            items = await return_total_result_async(
+                count=len(course_infos),
+                user_profile=job_user_profile(job["request"]),
+                target_courses=course_infos,
+            )
+        except Exception as e:
+            logger.error(f"평가 작업 실패: job_id={job['id']}, 오류={e}")
+            return None, str(e)
+
+        items_by_id = {item["course_id"]: item for item in items}
+        results = [
+            items_by_id.get(course_id) or {
+                "course_id": course_id, "evaluation": None, "recommendation": None,
+                "error": "Course not found", "fallback": False,
+            }
+            for course_id in job["course_ids"]
+        ]
+        return results, None
+
+    async def _run(self, job: dict) -> None:
+        loop = asyncio.get_running_loop()
+        job_id, attempt = job["id"], job["attempts"]
+        self.queue_wait_ms.observe((job["started_at"] - job["created_at"]).total_seconds() * 1000)
+        logger.info(f"평가 작업 시작: job_id={job_id}, 시도={attempt}")
+
+        with self.run_ms.timer():
+            heartbeat = asyncio.create_task(self._heartbeat(job_id, attempt))
+            evaluation = asyncio.create_task(self._evaluate(job))
+            try:
+                await asyncio.wait((heartbeat, evaluation), return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                heartbeat.cancel()
+                if not evaluation.done():
+                    evaluation.cancel()
+
+        if not evaluation.done() or evaluation.cancelled():
+            # 임대를 잃음: 다른 워커가 같은 작업을 다시 처리하므로 Gemini 호출을 더 하지 않고 결과도 쓰지 않음
+            self.lease_lost.inc()
+            logger.warning(f"평가 작업 임대 상실로 중단: job_id={job_id}, 시도={attempt}")
+            return
+
+        results, error = evaluation.result()
+        finished = await loop.run_in_executor(
+            None, _with_repository, lambda repo: repo.finish_job(job_id, attempt, results, error)
+        )
+        if not finished:
+            self.lease_lost.inc()
+            logger.warning(f"평가 작업 결과 저장 생략 (임대를 잃어 다른 워커가 처리 중이거나 완료): job_id={job_id}")
+            return
+        (self.failed if error else self.succeeded).inc()
+        logger.info(f"평가 작업 완료: job_id={job_id}, 상태={'failed' if error else 'succeeded'}")
+
+        event = self._finished.get(job_id)
+        if event is not None:
+            event.set()
+
+evaluation_workers = EvaluationWorkerPool(
+    workers=settings.EVAL_JOB_WORKERS,
+    poll_seconds=settings.EVAL_JOB_POLL_SECONDS,
+    lease_seconds=settings.EVAL_JOB_LEASE_SECONDS,
+    max_attempts=settings.EVAL_JOB_MAX_ATTEMPTS,
+)
@@ -0,0 +1,177 @@
+"""
+Lightweight in-process metrics registry.
+
+카운터/게이지/히스토그램을 이름으로 등록하고, /metrics 엔드포인트에서 스냅샷(JSON)으로 노출합니다.
+모든 메트릭은 스레드 안전하며 프로세스(uvicorn 워커) 단위로 집계됩니다.
+"""
+from bisect import bisect_left
+from contextlib import contextmanager
+from threading import Lock
+from typing import Dict, List, Optional, Sequence
+import time
+
+# 기본 히스토그램 버킷 (ms 단위 지연 시간 기준)
+DEFAULT_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+
+class Counter:
+    """단조 증가 카운터"""
+
+    def __init__(self, name: str, description: str = ""):
+        self.name = name
+        self.description = description
+        self._value = 0
+        self._lock = Lock()
+
+    def inc(self, amount: int = 1) -> None:
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> int:
+        return self._value
+
+    def snapshot(self) -> dict:
+        return {"type": "counter", "value": self._value}
+
+
+class Gauge:
+    """현재 값을 나타내는 게이지"""
+
+    def __init__(self, name: str, description: str = ""):
+        self.name = name
+        self.description = description
+        self._value = 0.0
+        self._lock = Lock()
+
+    def set(self, value: float) -> None:
+        with self._lock:
+            self._value = value
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        with self._lock:
+            self._value -= amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+    def snapshot(self) -> dict:
+        return {"type": "gauge", "value": self._value}
+
+
+class Histogram:
+    """고정 버킷 히스토그램 (count/sum/min/max 및 버킷 기반 근사 분위수)"""
+
+    def __init__(self, name: str, description: str = "", buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.buckets: List[float] = sorted(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)  # 마지막 칸은 +Inf
+        self._count = 0
+        self._sum = 0.0
+        self._min: Optional[float] = None
+        self._max: Optional[float] = None
+        self._lock = Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self._counts[bisect_left(self.buckets, value)] += 1
+            self._count += 1
+            self._sum += value
+            self._min = value if self._min is None else min(self._min, value)
+            self._max = value if self._max is None else max(self._max, value)
+
+    @contextmanager
+    def timer(self):
+        """블록 실행 시간(ms)을 기록"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe((time.perf_counter() - start) * 1000)
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    def quantile(self, q: float) -> Optional[float]:
+        """버킷 경계 사이를 선형 보간한 근사 분위수"""
+        with self._lock:
+            if self._count == 0:
+                return None
+            rank = q * self._count
+            seen = 0
+            for i, bucket_count in enumerate(self._counts):
+                if bucket_count and seen + bucket_count >= rank:
+                    lower = self.buckets[i - 1] if i > 0 else (self._min or 0.0)
+                    upper = self.buckets[i] if i < len(self.buckets) else (self._max or lower)
+                    fraction = (rank - seen) / bucket_count
+                    return min(lower + (upper - lower) * fraction, self._max)
+                seen += bucket_count
+            return self._max
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            count, total = self._count, self._sum
+            minimum, maximum = self._min, self._max
+            buckets = {
+                (str(bound) if i < len(self.buckets) else "+Inf"): self._counts[i]
+                for i, bound in enumerate(list(self.buckets) + [None])
+            }
+        return {
+            "type": "histogram",
+            "count": count,
+            "sum": total,
+            "avg": (total / count) if count else None,
+            "min": minimum,
+            "max": maximum,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "buckets": buckets,
+        }
+
+
+class MetricsRegistry:
+    """이름 → 메트릭 객체. 같은 이름으로 다시 요청하면 기존 객체를 반환합니다."""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = Lock()
+
+    def _get_or_create(self, cls, name: str, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = cls(name, *args, **kwargs)
+                self._metrics[name] = metric
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric '{name}' is already registered as {type(metric).__name__}")
+            return metric
+
+    def counter(self, name: str, description: str = "") -> Counter:
+        return self._get_or_create(Counter, name, description)
+
+    def gauge(self, name: str, description: str = "") -> Gauge:
+        return self._get_or_create(Gauge, name, description)
+
+    def histogram(self, name: str, description: str = "", buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, description, buckets=buckets)
+
+    def snapshot(self) -> Dict[str, dict]:
+        with self._lock:
+            metrics = dict(self._metrics)
+        return {name: metric.snapshot() for name, metric in sorted(metrics.items())}
+
+
+registry = MetricsRegistry()
+
+counter = registry.counter
+gauge = registry.gauge
+histogram = registry.histogram
+snapshot = registry.snapshot
@@ -1,104 +1,460 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.orm import Session
 from pgvector.sqlalchemy import Vector
-from os import getenv
-from dotenv import load_dotenv
-from typing import List
+from sqlalchemy import bindparam, func, select, text
+from sqlalchemy.dialects.postgresql import ARRAY
+from typing import Iterable, List, Optional, Sequence, Tuple, Union
 import time
-from backend.models.user import User
+import numpy as np
+from backend.core.config import settings
+from backend.core import metrics
+from backend.db.database import SessionLocal, session_scope
+from backend.models.user import User, UserCourse
 from loguru import logger
-from backend.core.encoder import generate_embeddings
-
-load_dotenv()
+from backend.core.encoder import generate_embeddings_array
+from backend.core.vector_index import user_vector_index
 
 # --- DB 연결 ---
-DATABASE_URL = getenv("DATABASE_URL")
-if not DATABASE_URL:
-    logger.error("DATABASE_URL 환경 변수가 설정되지 않았습니다. 애플리케이션을 종료합니다.")
-    raise EnvironmentError("DATABASE_URL 환경 변수를 설정해야 합니다.")
-
-engine = create_engine(DATABASE_URL)
-logger.info("데이터베이스 엔진 초기화 완료")
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
+# 별도 엔진을 만들지 않고 db/database.py의 프로세스 공용 커넥션 풀을 사용
 def get_db_session():
-    """DB 세션을 관리하는 제너레이터 함수"""
-    db = SessionLocal()
-    logger.debug("DB 세션 생성")
-    try:
+    """
+    DB 세션을 관리하는 제너레이터 함수.
+    요청 세션(db.database.session_scope)이 있으면 그 세션을 재사용하고, 없을 때만 새로 열고 닫습니다.
+    """
+    with session_scope() as db:
         yield db
-    finally:
-        try:
-            db.close()
-            logger.debug("DB 세션 종료")
-        except Exception as e:
-            logger.error(f"DB 세션 종료 중 오류: {e}")
+
+# 조건 검색에서 ANN 후보가 필터에 걸러져 k개를 못 채워 정확 검색으로 다시 실행한 횟수
+filtered_exact_fallbacks = metrics.counter("knn.filtered_exact_fallbacks", "전공/학년 조건 kNN에서 정확 검색으로 재실행한 횟수")
+
+# pgvector 확장 버전 (DB당 한 번 조회). iterative index scan은 0.8.0부터 지원
+_vector_extension_version: Optional[Tuple[int, ...]] = None
+
+def vector_extension_version(db: Session) -> Tuple[int, ...]:
+    """설치된 pgvector 확장 버전 (예: (0, 8, 0)), 없으면 ()"""
+    global _vector_extension_version
+    if _vector_extension_version is None:
+        version = db.execute(text("SELECT extversion FROM pg_extension WHERE extname = 'vector'")).scalar()
+        _vector_extension_version = tuple(int(part) for part in version.split(".") if part.isdigit()) if version else ()
+        logger.info(f"pgvector 확장 버전: {version}")
+    return _vector_extension_version
+
+def supports_iterative_scan(db: Session) -> bool:
+    return vector_extension_version(db) >= (0, 8)
 
 # --- kNN 검색 ---
-def find_similar_users(db: Session, query_vector: List[float], k: int = 5) -> List[int]:
+def set_vector_search_params(
+    db: Session,
+    k: int,
+    ef_search: Optional[int] = None,
+    probes: Optional[int] = None,
+    iterative: bool = False,
+) -> None:
+    """
+    현재 트랜잭션에만 적용되는(SET LOCAL) 벡터 인덱스 검색 파라미터를 설정합니다.
+    HNSW는 ef_search보다 많은 결과를 돌려주지 못하므로 k 이상으로 맞춥니다.
+    iterative=True면 필터로 걸러진 만큼 인덱스를 계속 탐색하는 iterative scan(relaxed_order)을 켭니다 (pgvector 0.8+).
+    """
+    ef_search = max(ef_search or settings.VECTOR_HNSW_EF_SEARCH, k)
+    probes = probes or settings.VECTOR_IVFFLAT_PROBES
+    # SET LOCAL은 바인드 파라미터를 받지 않으므로 set_config(..., is_local => true) 사용
+    statement = "SELECT set_config('hnsw.ef_search', :ef_search, true), set_config('ivfflat.probes', :probes, true)"
+    if iterative:
+        statement += (
+            ", set_config('hnsw.iterative_scan', 'relaxed_order', true)"
+            ", set_config('ivfflat.iterative_scan', 'relaxed_order', true)"
+        )
+    db.execute(text(statement), {"ef_search": str(ef_search), "probes": str(probes)})
+
+def user_filter_conditions(
+    major: Optional[str] = None,
+    min_grade_level: Optional[int] = None,
+    max_grade_level: Optional[int] = None,
+) -> list:
+    """전공/학년 조건을 users WHERE 조건 목록으로 변환"""
+    conditions = []
+    if major is not None:
+        conditions.append(User.major == major)
+    if min_grade_level is not None:
+        conditions.append(User.grade_level >= min_grade_level)
+    if max_grade_level is not None:
+        conditions.append(User.grade_level <= max_grade_level)
+    return conditions
+
+def filtered_exact_search(
+    db: Session,
+    query_vector: Union[np.ndarray, Sequence[float]],
+    k: int,
+    conditions: list,
+) -> List[int]:
+    """
+    조건으로 좁힌 행만 정확히 정렬하는 검색 (ANN 후보가 조건에 걸러져 k개가 안 될 때의 폴백).
+    정렬식에 + 0을 붙이면 벡터 인덱스를 쓰지 못하므로 전공/학년 인덱스로 좁힌 뒤 순차 정렬합니다.
+    """
+    filtered_exact_fallbacks.inc()
+    distance = User.embedding.cosine_distance(query_vector)
+    return list(db.scalars(
+        select(User.id).where(User.embedding.isnot(None), *conditions).order_by(distance + 0).limit(k)
+    ).all())
+
+def find_similar_users(
+    db: Session,
+    query_vector: Union[np.ndarray, Sequence[float]],
+    k: int = 5,
+    ef_search: Optional[int] = None,
+    probes: Optional[int] = None,
+    major: Optional[str] = None,
+    min_grade_level: Optional[int] = None,
+    max_grade_level: Optional[int] = None,
+) -> List[int]:
     """
-    User.feature_vector 컬럼을 사용하여 PostgreSQL에서 kNN 검색을 실행하고 
-    유사 유저 목록 (User 객체 리스트)을 반환합니다.
+    User.embedding 컬럼을 사용하여 PostgreSQL에서 kNN 검색을 실행하고
+    유사 유저 ID 목록을 반환합니다 (id 컬럼만 조회하므로 User 객체/임베딩은 읽지 않음).
+    (query_vector는 float32 배열 그대로 pgvector에 전달되어 파이썬 float 리스트로 변환하지 않음)
+    검색은 ef_search/probes를 SET LOCAL로 설정한 같은 트랜잭션 안에서 실행됩니다 (기본값: 설정 파일).
+
+    전공/학년 조건이 있으면:
+    - 해당 전공의 부분 인덱스(db/migrations.ensure_major_vector_indexes)가 있으면 플래너가 그 인덱스를 사용
+    - pgvector 0.8+면 iterative scan으로 조건에 맞는 결과가 k개 찰 때까지 인덱스를 계속 탐색
+    - 그래도 k개가 안 되면 (구버전에서 ANN 후보가 필터에 걸러진 경우) 조건으로 좁힌 뒤 정확 검색으로 다시 실행
     """
-    if not query_vector:
+    if query_vector is None or len(query_vector) == 0:
         logger.warning("빈 query_vector가 전달되어 유사 사용자 검색을 건너뜁니다.")
         return []
 
-    logger.debug(f"kNN 검색 준비: k={k}, 벡터차원={len(query_vector)}")
+    conditions = user_filter_conditions(major, min_grade_level, max_grade_level)
+    logger.debug(f"kNN 검색 준비: k={k}, 벡터차원={len(query_vector)}, 조건={len(conditions)}개")
     start = time.perf_counter()
     try:
+        iterative = bool(conditions) and supports_iterative_scan(db)
+        set_vector_search_params(db, k, ef_search=ef_search, probes=probes, iterative=iterative)
         # 코사인 거리 연산자 (<=>) 사용
-        similar_users = (
-            db.query(User)
-            .order_by(User.embedding.cosine_distance(query_vector))
-            .limit(k)
-            .all()
-        )
+        distance = User.embedding.cosine_distance(query_vector)
+        if iterative:
+            # relaxed_order는 결과 순서가 조금 어긋날 수 있으므로 후보를 구체화한 뒤 거리로 다시 정렬
+            candidates = (
+                select(User.id, distance.label("distance")).where(User.embedding.isnot(None), *conditions)
+                .order_by(distance).limit(k)
+                .cte("candidates").prefix_with("MATERIALIZED")
+            )
+            ids = db.scalars(select(candidates.c.id).order_by(candidates.c.distance)).all()
+        else:
+            ids = db.scalars(select(User.id).where(User.embedding.isnot(None), *conditions).order_by(distance).limit(k)).all()
+
+        if conditions and len(ids) < k:
+            ids = filtered_exact_search(db, query_vector, k, conditions)
         duration_ms = (time.perf_counter() - start) * 1000
-        logger.info(f"kNN 검색 완료: k={k}, 결과={len(similar_users)}건, 소요={duration_ms:.1f}ms")
-        ids = []
-        if similar_users:
-            try:
-                ids = [u.id for u in similar_users if hasattr(u, 'id')]
-                logger.debug(f"유사 사용자 ID: {ids}")
-            except Exception:
-                logger.debug("유사 사용자 ID를 로깅하는 중 오류가 발생했지만 검색 결과에는 영향이 없습니다.")
-        return ids
+        logger.info(f"kNN 검색 완료: k={k}, 결과={len(ids)}건, 소요={duration_ms:.1f}ms")
+        logger.debug(f"유사 사용자 ID: {ids}")
+        return list(ids)
     except Exception as e:
         logger.error(f"kNN 검색 중 오류 발생 : {e}")
         raise
 
+def refresh_memory_index() -> None:
+    """
+    메모리 인덱스가 비어 있으면 적재하고, VECTOR_MEMORY_REFRESH_SECONDS가 지났으면 변경분만 반영합니다.
+    요청 세션과 분리된 짧은 세션에서 실행하므로 실패해도 요청 트랜잭션(스냅샷, 로드된 ORM 객체)에 영향이 없습니다.
+    (갱신할 필요가 없으면 쿼리를 실행하지 않으므로 연결도 체크아웃하지 않음)
+    """
+    db = SessionLocal()
+    try:
+        user_vector_index.refresh_if_stale(db, settings.VECTOR_MEMORY_REFRESH_SECONDS)
+    finally:
+        db.close()
+
+def find_similar_users_in_memory(
+    query_vector: Union[np.ndarray, Sequence[float]],
+    k: int = 5,
+    major: Optional[str] = None,
+    min_grade_level: Optional[int] = None,
+    max_grade_level: Optional[int] = None,
+) -> List[int]:
+    """
+    프로세스 내 NumPy 인덱스(core/vector_index.py)로 kNN 검색을 실행합니다 (refresh_memory_index로 적재/갱신).
+    전공/학년 조건은 조건에 맞지 않는 행을 마스킹해 처리합니다.
+    """
+    if query_vector is None or len(query_vector) == 0:
+        logger.warning("빈 query_vector가 전달되어 유사 사용자 검색을 건너뜁니다.")
+        return []
+
+    refresh_memory_index()
+    start = time.perf_counter()
+    ids, _ = user_vector_index.search(
+        query_vector, k=k, major=major, min_grade_level=min_grade_level, max_grade_level=max_grade_level,
+    )
+    logger.info(f"메모리 kNN 검색 완료: k={k}, 결과={len(ids)}건, 소요={(time.perf_counter() - start) * 1000:.2f}ms")
+    return ids.tolist()
+
+def find_similar_users_batch(
+    db: Session,
+    query_vectors: Union[np.ndarray, Sequence[Sequence[float]]],
+    k: int = 5,
+    ef_search: Optional[int] = None,
+    probes: Optional[int] = None,
+    major: Optional[str] = None,
+    min_grade_level: Optional[int] = None,
+    max_grade_level: Optional[int] = None,
+) -> List[List[int]]:
+    """
+    여러 쿼리 벡터의 kNN 검색을 쿼리 한 번으로 실행합니다.
+    쿼리 벡터 배열을 unnest한 각 행마다 LATERAL 서브쿼리로 ORDER BY <=> LIMIT k를 실행하므로
+    쿼리별로 벡터 인덱스를 그대로 사용합니다. 전공/학년 조건은 find_similar_users와 같게 처리합니다
+    (pgvector 0.8+ iterative scan, 결과가 k개가 안 되는 쿼리만 조건으로 좁힌 정확 검색으로 다시 실행).
+
+    :param query_vectors: (n, dim) 쿼리 벡터
+    :param k: 쿼리당 찾을 유사 유저의 수
+    :param major: 이 전공의 유저만 검색
+    :param min_grade_level: 이 학년 이상인 유저만 검색
+    :param max_grade_level: 이 학년 이하인 유저만 검색
+    :return: 쿼리 순서대로 유사 유저 ID 리스트의 리스트
+    """
+    if len(query_vectors) == 0:
+        return []
+
+    filters = {"major": major, "min_grade_level": min_grade_level, "max_grade_level": max_grade_level}
+    predicates = {
+        "major": "u.major = :major",
+        "min_grade_level": "u.grade_level >= :min_grade_level",
+        "max_grade_level": "u.grade_level <= :max_grade_level",
+    }
+    where = ["u.embedding IS NOT NULL"] + [predicates[name] for name, value in filters.items() if value is not None]
+    params = {name: value for name, value in filters.items() if value is not None}
+    conditions = user_filter_conditions(**filters)
+
+    start = time.perf_counter()
+    set_vector_search_params(
+        db, k, ef_search=ef_search, probes=probes, iterative=bool(conditions) and supports_iterative_scan(db),
+    )
+    statement = text(
+        "SELECT q.ord, n.id FROM unnest(CAST(:queries AS vector[])) WITH ORDINALITY AS q(embedding, ord) "
+        "CROSS JOIN LATERAL ("
+        " SELECT u.id, u.embedding <=> q.embedding AS distance FROM users u"
+        f" WHERE {' AND '.join(where)}"
+        " ORDER BY u.embedding <=> q.embedding LIMIT :k"
+        ") n "
+        "ORDER BY q.ord, n.distance"
+    ).bindparams(bindparam("queries", type_=ARRAY(Vector())))
+    rows = db.execute(statement, {"queries": list(query_vectors), "k": k, **params}).all()
+
+    results: List[List[int]] = [[] for _ in range(len(query_vectors))]
+    for ordinality, user_id in rows:
+        results[ordinality - 1].append(user_id)
+    if conditions:
+        for i, ids in enumerate(results):
+            if len(ids) < k:
+                results[i] = filtered_exact_search(db, query_vectors[i], k, conditions)
+    logger.info(f"배치 kNN 검색 완료: 쿼리={len(results)}건, k={k}, 소요={(time.perf_counter() - start) * 1000:.1f}ms")
+    return results
+
+# --- 유사 사용자 수강 과목 집계 ---
+def _rank_courses_query(neighbor_ids, exclude: Iterable[str]):
+    """neighbor_ids(서브쿼리/CTE 컬럼 또는 ID 목록) 사용자들의 수강 과목별 인원 수, 많은 순 (동률은 과목 코드순)"""
+    count = func.count(UserCourse.id).label("count")
+    query = select(UserCourse.course_code, count)
+    if isinstance(neighbor_ids, (list, tuple)):
+        query = query.where(UserCourse.user_id.in_(neighbor_ids))
+    else:
+        query = query.join(neighbor_ids, UserCourse.user_id == neighbor_ids.c.id)
+    excluded = sorted({str(cid) for cid in exclude if cid is not None})
+    if excluded:
+        query = query.where(UserCourse.course_code.notin_(excluded))
+    return query.group_by(UserCourse.course_code).order_by(count.desc(), UserCourse.course_code)
+
+def rank_neighbor_courses(
+    db: Session,
+    query_vector: Union[np.ndarray, Sequence[float]],
+    k: int = 5,
+    exclude: Iterable[str] = (),
+    ef_search: Optional[int] = None,
+    probes: Optional[int] = None,
+) -> List[Tuple[str, int]]:
+    """
+    kNN 검색과 유사 사용자 수강 과목 집계를 쿼리 한 번으로 실행합니다.
+    (kNN CTE → user_courses 조인 → exclude 과목 제외 → 과목별 GROUP BY, ORM 객체 생성 없음)
+
+    :param query_vector: 검색 기준 임베딩 벡터
+    :param k: 유사 사용자 수
+    :param exclude: 집계에서 제외할 과목 코드 (기수강/평가 대상 과목 등)
+    :return: (과목 코드, 수강한 유사 사용자 수) 목록, 많은 순
+    """
+    if query_vector is None or len(query_vector) == 0:
+        logger.warning("빈 query_vector가 전달되어 유사 사용자 과목 집계를 건너뜁니다.")
+        return []
+
+    start = time.perf_counter()
+    set_vector_search_params(db, k, ef_search=ef_search, probes=probes)
+    neighbors = (
+        select(User.id)
+        .where(User.embedding.isnot(None))
+        .order_by(User.embedding.cosine_distance(query_vector))
+        .limit(k)
+        .cte("neighbors")
+    )
+    rows = db.execute(_rank_courses_query(neighbors, exclude)).all()
+    logger.info(f"유사 사용자 과목 집계 완료: k={k}, 과목={len(rows)}개, 소요={(time.perf_counter() - start) * 1000:.1f}ms")
+    return [(course_code, count) for course_code, count in rows]
+
+def rank_courses_of_users(db: Session, user_ids: List[int], exclude: Iterable[str] = ()) -> List[Tuple[str, int]]:
+    """이미 찾은 사용자 ID들의 수강 과목별 인원 수 (메모리 kNN 경로용, 쿼리 한 번)"""
+    if not user_ids:
+        return []
+    rows = db.execute(_rank_courses_query(list(user_ids), exclude)).all()
+    return [(course_code, count) for course_code, count in rows]
+
+# --- 프로필 임베딩 ---
+def embed_profile_text(user_profile_data: str) -> np.ndarray:
+    """
+    유저 프로필 문자열 하나에 대한 임베딩 벡터(float32 1차원 배열)를 생성합니다.
+    """
+    try:
+        return generate_embeddings_array([user_profile_data])[0]
+    except Exception:
+        logger.error("임베딩 생성 중 오류 발생")
+        raise
+
+# --- 임베딩 벡터로 Top K 검색 ---
+def get_similar_users_by_vector(
+    query_vector: Union[np.ndarray, Sequence[float]],
+    k: int = 5,
+    major: Optional[str] = None,
+    min_grade_level: Optional[int] = None,
+    max_grade_level: Optional[int] = None,
+) -> List[int]:
+    """
+    이미 계산된 임베딩 벡터로 kNN 검색을 실행하여 Top K 유사 유저 ID 리스트를 반환
+    (같은 프로필로 여러 번 검색할 때 임베딩 재계산을 피하기 위해 사용)
+    
+    :param query_vector: 검색 기준 임베딩 벡터
+    :param k: 찾을 유사 유저의 수
+    :param major: 이 전공의 유저만 검색
+    :param min_grade_level: 이 학년 이상인 유저만 검색
+    :param max_grade_level: 이 학년 이하인 유저만 검색
+    :return: Top K 유저 ID 리스트 (List[int])
+    """
+    filters = {"major": major, "min_grade_level": min_grade_level, "max_grade_level": max_grade_level}
+    logger.info(f"kNN 검색 실행 (k={k}, 경로={settings.VECTOR_SEARCH_BACKEND})")
+    similar_users: Optional[List[int]] = None
+    if settings.VECTOR_SEARCH_BACKEND == "memory":
+        try:
+            similar_users = find_similar_users_in_memory(query_vector, k=k, **filters)
+        except Exception as e:
+            # 인덱스 적재/갱신 실패 시 pgvector 검색으로 폴백 (요청 세션은 건드리지 않았으므로 그대로 사용)
+            logger.warning(f"메모리 kNN 검색 실패, pgvector로 검색합니다: {e}")
+    if similar_users is None:
+        # DB 세션 확보 (요청 세션이 있으면 재사용)
+        with session_scope() as db:
+            similar_users = find_similar_users(db, query_vector, k=k, **filters)
+    logger.info(f"유사 사용자 검색 종료: 결과={len(similar_users)}건")
+    return similar_users
+
 # --- 통합 메인 파이프라인 함수 (Top K User 반환) ---
-def get_similar_users(user_profile_data: str, k: int = 5) -> List[int]:
+def get_similar_users(
+    user_profile_data: str,
+    k: int = 5,
+    major: Optional[str] = None,
+    min_grade_level: Optional[int] = None,
+    max_grade_level: Optional[int] = None,
+) -> List[int]:
     """
     유저 입력 데이터를 받아 임베딩을 생성하고 kNN 검색,
     Top K 유사 유저 객체 리스트를 반환
     
     :param user_profile_data: 현재 검색하는 유저 프로필
     :param k: 찾을 유사 유저의 수
+    :param major: 이 전공의 유저만 검색 (예: 같은 전공 선배)
+    :param min_grade_level: 이 학년 이상인 유저만 검색
+    :param max_grade_level: 이 학년 이하인 유저만 검색
     :return: Top K User 객체 리스트 (List[User])
     """
     logger.info(f"유사 사용자 검색 시작: k={k}, 입력길이={len(user_profile_data) if user_profile_data else 0}")
     # 유저 입력 임베딩 생성
-    try:
-        query_vector = generate_embeddings([user_profile_data])[0]
-    except Exception:
-        logger.error("임베딩 생성 중 오류 발생")
-        raise
+    query_vector = embed_profile_text(user_profile_data)
 
-    # DB 세션 확보
-    db_session_generator = get_db_session()
-    db = next(db_session_generator)
-    
-    try:
-        logger.info(f"kNN 검색 실행 (k={k})")
-        similar_users: List[int] = find_similar_users(db, query_vector, k=k)
-        logger.info(f"유사 사용자 검색 종료: 결과={len(similar_users)}건")
-        return similar_users
-    finally:
-        # DB 세션 명시적으로 닫기
+    return get_similar_users_by_vector(
+        query_vector, k=k, major=major, min_grade_level=min_grade_level, max_grade_level=max_grade_level,
+    )
+
+# --- 임베딩 벡터로 유사 사용자 수강 과목 집계 ---
+def get_neighbor_course_counts(
+    query_vector: Union[np.ndarray, Sequence[float]],
+    k: int = 5,
+    exclude: Iterable[str] = (),
+) -> List[Tuple[str, int]]:
+    """
+    임베딩 벡터의 유사 사용자 k명이 수강한 과목을 인원 수 순으로 집계합니다 (DB 왕복 한 번).
+    VECTOR_SEARCH_BACKEND=memory면 kNN은 메모리 인덱스에서, 과목 집계만 DB에서 실행합니다.
+
+    :param query_vector: 검색 기준 임베딩 벡터
+    :param k: 유사 사용자 수
+    :param exclude: 제외할 과목 코드
+    :return: (과목 코드, 인원 수) 목록, 많은 순
+    """
+    user_ids: Optional[List[int]] = None
+    if settings.VECTOR_SEARCH_BACKEND == "memory":
         try:
-            db.close()
-            logger.debug("get_similar_users: DB 세션 종료")
+            user_ids = find_similar_users_in_memory(query_vector, k=k)
         except Exception as e:
-            logger.error(f"get_similar_users: DB 세션 종료 중 오류: {e}")
+            logger.warning(f"메모리 kNN 검색 실패, pgvector로 검색합니다: {e}")
+    with session_scope() as db:
+        if user_ids is not None:
+            return rank_courses_of_users(db, user_ids, exclude)
+        return rank_neighbor_courses(db, query_vector, k=k, exclude=exclude)
+
+# --- 여러 프로필 일괄 검색 ---
+def get_similar_users_batch_by_vectors(
+    query_vectors: Union[np.ndarray, Sequence[Sequence[float]]],
+    k: int = 5,
+    major: Optional[str] = None,
+    min_grade_level: Optional[int] = None,
+    max_grade_level: Optional[int] = None,
+) -> List[List[int]]:
+    """
+    이미 계산된 임베딩 벡터들로 Top K 유사 유저를 한 번에 검색합니다.
+    VECTOR_SEARCH_BACKEND=memory면 행렬곱 한 번, 아니면 LATERAL 조인 쿼리 한 번으로 처리합니다.
+    전공/학년 조건은 모든 쿼리에 같이 적용됩니다 (get_similar_users_by_vector와 같은 결과).
+
+    :param query_vectors: (n, dim) 쿼리 벡터
+    :param k: 쿼리당 찾을 유사 유저의 수
+    :param major: 이 전공의 유저만 검색
+    :param min_grade_level: 이 학년 이상인 유저만 검색
+    :param max_grade_level: 이 학년 이하인 유저만 검색
+    :return: 쿼리 순서대로 Top K 유저 ID 리스트의 리스트
+    """
+    filters = {"major": major, "min_grade_level": min_grade_level, "max_grade_level": max_grade_level}
+    if settings.VECTOR_SEARCH_BACKEND == "memory":
+        try:
+            refresh_memory_index()
+            ids, _ = user_vector_index.search_many(query_vectors, k=k, **filters)
+            return ids.tolist()
+        except Exception as e:
+            logger.warning(f"메모리 배치 kNN 검색 실패, pgvector로 검색합니다: {e}")
+    with session_scope() as db:
+        return find_similar_users_batch(db, query_vectors, k=k, **filters)
+
+def get_similar_users_batch(
+    user_profiles: List[str],
+    k: int = 5,
+    major: Optional[str] = None,
+    min_grade_level: Optional[int] = None,
+    max_grade_level: Optional[int] = None,
+) -> List[List[int]]:
+    """
+    여러 유저 프로필을 인코더 호출 한 번으로 임베딩하고, 각각의 Top K 유사 유저를 한 번에 검색합니다.
+    (코호트 추천, 이웃 목록 사전 계산 등 대량 작업용)
+
+    :param user_profiles: 유저 프로필 문자열 리스트
+    :param k: 프로필당 찾을 유사 유저의 수
+    :param major: 이 전공의 유저만 검색
+    :param min_grade_level: 이 학년 이상인 유저만 검색
+    :param max_grade_level: 이 학년 이하인 유저만 검색
+    :return: 입력 순서대로 Top K 유저 ID 리스트의 리스트
+    """
+    if not user_profiles:
+        return []
+    logger.info(f"유사 사용자 일괄 검색 시작: 프로필={len(user_profiles)}건, k={k}")
+    query_vectors = generate_embeddings_array(user_profiles)
+    if len(query_vectors) != len(user_profiles):
+        raise RuntimeError(f"embedded {len(query_vectors)} of {len(user_profiles)} profiles")
+    return get_similar_users_batch_by_vectors(
+        query_vectors, k=k, major=major, min_grade_level=min_grade_level, max_grade_level=max_grade_level,
+    )
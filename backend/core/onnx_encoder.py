@@ -0,0 +1,175 @@
+"""
+ONNX Runtime CPU backend for the sentence embedding model.
+
+SentenceTransformer 모델 디렉터리(트랜스포머 + mean pooling)를 ONNX로 내보내고, 동적 int8 양자화를 적용해
+ONNX Runtime으로 추론합니다. OnnxEncoder.encode는 SentenceTransformer.encode와 같은 형태의
+float32 배열을 반환하므로 encoder.py의 인코딩 경로를 그대로 사용할 수 있습니다.
+
+onnxruntime, onnx는 선택 의존성입니다 (pip install "backend[onnx]").
+"""
+from typing import Dict, List
+import json
+import os
+import time
+
+import numpy as np
+from loguru import logger
+
+ONNX_FILE = "model.onnx"
+QUANTIZED_ONNX_FILE = "model.int8.onnx"
+
+
+def _pooling_mode(model_dir: str) -> str:
+    """1_Pooling/config.json의 pooling 방식 (구/신 형식 모두 지원, 기본값 mean)"""
+    path = os.path.join(model_dir, "1_Pooling", "config.json")
+    if not os.path.exists(path):
+        return "mean"
+    with open(path, encoding="utf-8") as f:
+        config = json.load(f)
+    if "pooling_mode" in config:
+        return config["pooling_mode"]
+    if config.get("pooling_mode_cls_token"):
+        return "cls"
+    if config.get("pooling_mode_max_tokens"):
+        return "max"
+    return "mean"
+
+
+def _max_seq_length(model_dir: str, tokenizer) -> int:
+    """sentence_bert_config.json의 max_seq_length, 없으면 토크나이저 상한 (최대 512)"""
+    path = os.path.join(model_dir, "sentence_bert_config.json")
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            value = json.load(f).get("max_seq_length")
+        if value:
+            return int(value)
+    return min(int(tokenizer.model_max_length), 512)
+
+
+def export_onnx(model_dir: str, output_dir: str, quantize: bool = True, opset: int = 17) -> str:
+    """
+    모델 디렉터리의 트랜스포머를 ONNX로 내보내고(배치/시퀀스 길이 동적 축), 필요하면 int8 동적 양자화를 적용합니다.
+
+    :param model_dir: SentenceTransformer로 저장된 모델 디렉터리 (예: ./model/)
+    :param output_dir: ONNX 파일을 저장할 디렉터리
+    :param quantize: True면 가중치를 int8로 동적 양자화한 파일도 생성
+    :param opset: ONNX opset 버전
+    :return: 추론에 사용할 ONNX 파일 경로 (양자화 시 int8 파일)
+    """
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    os.makedirs(output_dir, exist_ok=True)
+    onnx_path = os.path.join(output_dir, ONNX_FILE)
+
+    start_time = time.perf_counter()
+    tokenizer = AutoTokenizer.from_pretrained(model_dir)
+    model = AutoModel.from_pretrained(model_dir)
+    model.eval()
+
+    sample = tokenizer(["ONNX 내보내기용 예시 문장입니다.", "두 번째 문장"], padding=True, return_tensors="pt")
+    input_names = list(sample.keys())
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    class _Transformer(torch.nn.Module):
+        """토크나이저 출력 순서대로 위치 인자를 받아 last_hidden_state만 반환하는 래퍼"""
+
+        def __init__(self, inner):
+            super().__init__()
+            self.inner = inner
+
+        def forward(self, *inputs):
+            return self.inner(**dict(zip(input_names, inputs))).last_hidden_state
+
+    with torch.no_grad():
+        torch.onnx.export(
+            _Transformer(model),
+            tuple(sample[name] for name in input_names),
+            onnx_path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+            dynamo=False,
+        )
+    tokenizer.save_pretrained(output_dir)
+    logger.info(f"ONNX 내보내기 완료: {onnx_path}, 소요={(time.perf_counter() - start_time) * 1000:.1f}ms")
+
+    if not quantize:
+        return onnx_path
+
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantized_path = os.path.join(output_dir, QUANTIZED_ONNX_FILE)
+    quantize_dynamic(onnx_path, quantized_path, weight_type=QuantType.QInt8)
+    logger.info(
+        f"int8 동적 양자화 완료: {quantized_path} "
+        f"({os.path.getsize(onnx_path) / 1e6:.1f}MB → {os.path.getsize(quantized_path) / 1e6:.1f}MB)"
+    )
+    return quantized_path
+
+
+class OnnxEncoder:
+    """
+    ONNX Runtime 기반 문장 임베딩 인코더 (SentenceTransformer.encode 호환 부분집합).
+
+    :param model_dir: 원본 SentenceTransformer 모델 디렉터리 (pooling/max_seq_length 설정)
+    :param onnx_path: 추론할 ONNX 파일 경로
+    :param intra_op_threads: 연산자 내부 병렬 스레드 수 (0: ONNX Runtime 기본값)
+    """
+
+    def __init__(self, model_dir: str, onnx_path: str, intra_op_threads: int = 0):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        self.model_dir = model_dir
+        self.onnx_path = onnx_path
+        self.tokenizer = AutoTokenizer.from_pretrained(os.path.dirname(onnx_path) or model_dir)
+        self.max_seq_length = _max_seq_length(model_dir, self.tokenizer)
+        self.pooling_mode = _pooling_mode(model_dir)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        # 요청 동시성은 마이크로 배처/서비스 워커가 담당하므로 세션은 순차 실행 + 연산자 내부 병렬화만 사용
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.inter_op_num_threads = 1
+        if intra_op_threads > 0:
+            options.intra_op_num_threads = intra_op_threads
+        self.session = ort.InferenceSession(onnx_path, sess_options=options, providers=["CPUExecutionProvider"])
+        self.input_names = [node.name for node in self.session.get_inputs()]
+
+    def _pool(self, token_embeddings: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        if self.pooling_mode == "cls":
+            return token_embeddings[:, 0]
+        mask = attention_mask[..., None].astype(np.float32)
+        if self.pooling_mode == "max":
+            return np.where(mask > 0, token_embeddings, -1e9).max(axis=1)
+        return (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+    def encode(self, sentences: List[str], batch_size: int = 32, convert_to_tensor: bool = False, **kwargs) -> np.ndarray:
+        """sentences의 임베딩을 (len(sentences), dim) float32 배열로 반환"""
+        if not sentences:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        outputs: List[np.ndarray] = []
+        for i in range(0, len(sentences), batch_size):
+            chunk = sentences[i:i + batch_size]
+            tokens = self.tokenizer(
+                chunk, padding=True, truncation=True, max_length=self.max_seq_length, return_tensors="np",
+            )
+            feed: Dict[str, np.ndarray] = {name: tokens[name].astype(np.int64) for name in self.input_names if name in tokens}
+            token_embeddings = self.session.run(["last_hidden_state"], feed)[0]
+            outputs.append(self._pool(token_embeddings, tokens["attention_mask"]).astype(np.float32))
+        return np.concatenate(outputs, axis=0)
+
+
+def load_onnx_encoder(model_dir: str, onnx_dir: str, quantize: bool = True, intra_op_threads: int = 0) -> OnnxEncoder:
+    """
+    onnx_dir에 내보낸 파일이 없으면 먼저 내보낸 뒤 OnnxEncoder를 생성합니다.
+    """
+    onnx_path = os.path.join(onnx_dir, QUANTIZED_ONNX_FILE if quantize else ONNX_FILE)
+    if not os.path.exists(onnx_path):
+        logger.warning(f"ONNX 모델({onnx_path})이 없습니다. {model_dir}에서 내보냅니다.")
+        onnx_path = export_onnx(model_dir, onnx_dir, quantize=quantize)
+    return OnnxEncoder(model_dir, onnx_path, intra_op_threads=intra_op_threads)
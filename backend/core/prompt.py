@@ -0,0 +1,355 @@
+"""
+Token-budgeted prompt builder for Gemini evaluations.
+
+학생 정보/대상 과목/지시문은 그대로 두고, 가장 길어지는 기수강 과목 이력 섹션을
+토큰 예산에 맞춰 줄입니다. 대상 과목과 관련성이 낮은 과목부터
+상세 → 요약 → 최소 정보 → 생략 순으로 단계적으로 압축합니다.
+"""
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Set, Union
+import re
+
+from loguru import logger
+
+from backend.core import metrics
+from backend.core.config import settings
+from backend.core.schema import AnalysisRequest, UserProfile, CourseInfo, CourseHistory
+from backend.core.context import resolve_taken_courses
+
+# --- 토큰 추정 ---
+# Gemini 토크나이저를 호출하지 않고 문자 종류별 평균값으로 보수적으로 추정합니다.
+ASCII_CHARS_PER_TOKEN = 4.0   # 영문/숫자/기호
+NON_ASCII_TOKENS_PER_CHAR = 1.0  # 한글 등 (음절 하나를 토큰 하나로 계산)
+
+# 압축 단계
+LEVEL_FULL = 0      # 전체 정보
+LEVEL_COMPACT = 1   # 핵심 정보 + 짧은 개요
+LEVEL_MINIMAL = 2   # 과목 코드/이름/성적
+LEVEL_DROPPED = 3   # 생략
+
+COMPACT_DESCRIPTION_CHARS = 120
+
+_WORD_PATTERN = re.compile(r"[0-9A-Za-z가-힣]{2,}")
+
+prompt_tokens_histogram = metrics.histogram(
+    "gemini.prompt_tokens",
+    "최종 프롬프트 추정 토큰 수",
+    buckets=(250, 500, 1000, 2000, 4000, 8000, 16000, 32000, 64000),
+)
+compacted_prompts = metrics.counter("gemini.prompt_compactions", "토큰 예산 때문에 이력을 압축한 프롬프트 수")
+
+
+def estimate_tokens(text: str) -> int:
+    """문자열의 대략적인 토큰 수"""
+    if not text:
+        return 0
+    ascii_chars = 0
+    non_ascii_chars = 0
+    for ch in text:
+        if ch.isspace():
+            continue
+        if ord(ch) < 128:
+            ascii_chars += 1
+        else:
+            non_ascii_chars += 1
+    return int(ascii_chars / ASCII_CHARS_PER_TOKEN + non_ascii_chars * NON_ASCII_TOKENS_PER_CHAR) + 1
+
+
+def _keywords(*texts: Optional[str]) -> Set[str]:
+    words = set()
+    for text in texts:
+        if text:
+            words.update(w.casefold() for w in _WORD_PATTERN.findall(text))
+    return words
+
+
+def _is_course_info(course) -> bool:
+    return bool(getattr(course, "course_code", None))
+
+
+# --- 섹션 포매터 ---
+def format_taken_course(
+    course: Union[CourseInfo, CourseHistory],
+    history: CourseHistory,
+    level: int = LEVEL_FULL,
+) -> str:
+    """기수강 과목 하나를 압축 단계에 맞춰 문자열로 변환"""
+
+    # CourseInfo 객체인지 확인 (course_code가 있는 경우)
+    if not _is_course_info(course):
+        # CourseHistory 객체 폴백 (CourseInfo가 아닌 경우)
+        return f"[ID: {course.course_id}] 성적: {course.grade}"
+
+    if level >= LEVEL_MINIMAL:
+        return f"[{course.course_code}] {course.course_name} | 성적: {history.grade or '미상'}."
+
+    if level == LEVEL_COMPACT:
+        detail = course.description or course.remarks or ""
+        if len(detail) > COMPACT_DESCRIPTION_CHARS:
+            detail = detail[:COMPACT_DESCRIPTION_CHARS].rstrip() + "…"
+        return (
+            f"[{course.course_code}] {course.course_name} "
+            f"({course.credits or '미상'}학점, {course.major or course.department or '미상'}) | "
+            f"성적: {history.grade or '미상'}. "
+            f"개요: {detail or '내용 없음'}."
+        )
+
+    # 1. 기본 정보 섹션
+    base_info = (
+        f"[{course.course_code}] {course.course_name} (개설년도/학기: {course.year or '미상'}/{course.semester or '미상'} | "
+        f"{course.credits or '미상'}학점 | {course.hours or '미상'}시수) "
+        f"개설: {course.department or '미상'} ({course.major or '미상'}) | 담당교수: {course.professor or '미상'}. "
+        f"강의 시간/장소: {course.class_time_room or '미상'} (정원: {course.capacity or '미상'}). "
+    )
+
+    # 2. 강의 특징 섹션
+    feature_info = (
+        f"특징: {course.target_students or course.recommended_year or '전학년'} 대상. "
+        f"영어강의: {course.english_lecture or 'N'} | 중국어강의: {course.chinese_lecture or 'N'} | "
+        f"인증교과목: {course.approved_course or 'N'} | 우등생과정: {course.honors_course or 'N'}. "
+    )
+
+    # 3. 시험 및 성적 섹션 (CourseHistory에서 성적 정보를 가져옴)
+    grade_info = f"성적: {history.grade or '미상'}."
+    exam_info = f"시험일정: {course.exam_date or '미상'}."
+
+    # 4. 상세 정보 섹션 (비고/개요 등)
+    detail_info = f"상세설명(개요/비고): {course.description or course.remarks or '내용 없음'}."
+
+    return base_info + feature_info + grade_info + exam_info + detail_info
+
+
+def format_taken_courses(
+    taken_courses_detail: List[Union[CourseInfo, CourseHistory]],
+    taken_courses_history: List[CourseHistory],
+) -> str:
+    """기수강 과목 이력 → 프롬프트 문자열 (압축 없음)"""
+    course_strings = [
+        format_taken_course(course, history)
+        for course, history in zip(taken_courses_detail, taken_courses_history)
+    ]
+
+    # 모든 과목 정보를 줄바꿈으로 구분하여 하나의 문자열로 결합
+    return "\n".join(course_strings) or "없음"
+
+
+def format_student_section(user_profile: UserProfile, taken_courses_detail_str: str) -> str:
+    """학생 정보 섹션"""
+    # User Profile Details (similar to extract_profile_text but for the prompt)
+    return f"""
+    --- 학생 정보 ---
+    - 기수강 과목: {taken_courses_detail_str}
+    - 평가 방식 선호 (1:시험, 5:과제): {user_profile.eval_preference}
+    - 관심 분야: {', '.join(user_profile.interests)}
+    - 팀 프로젝트 선호 (1:매우 싫음, 5:매우 좋음): {user_profile.team_preference}
+    - 선호 출석/수업 방식: {', '.join(user_profile.attendence_type)}
+    """
+
+
+def format_course_section(course_info: CourseInfo, include_id: bool = False) -> str:
+    """분석 대상 과목 섹션"""
+    course_info_parts = [f"--- 분석 대상 과목 정보 ---"]
+    # 배치 모드에서는 결과를 과목별로 되돌려 받기 위해 PK를 함께 전달
+    if include_id:
+        course_info_parts.append(f"- 과목 ID: {course_info.id}")
+    course_info_parts += [
+        f"- 과목 코드: {course_info.course_code or '정보 없음'}",
+        f"- 과목명: {course_info.course_name or '정보 없음'}",
+    ]
+
+    # Add optional fields if they exist
+    if course_info.department:
+        course_info_parts.append(f"- 개설 학부: {course_info.department}")
+    if course_info.major:
+        course_info_parts.append(f"- 개설 학과: {course_info.major}")
+    if course_info.professor:
+        course_info_parts.append(f"- 담당 교수: {course_info.professor}")
+    if course_info.credits:
+        course_info_parts.append(f"- 학점: {course_info.credits}")
+    if course_info.description:
+        course_info_parts.append(f"- 강의 개요: {course_info.description}")
+    if course_info.remarks:
+        course_info_parts.append(f"- 비고: {course_info.remarks}")
+
+    return "\n    ".join(course_info_parts) + "\n    "
+
+
+# --- 관련도 기반 이력 압축 ---
+def score_relevance(
+    course: Union[CourseInfo, CourseHistory],
+    history: CourseHistory,
+    target_courses: Iterable[CourseInfo],
+) -> float:
+    """
+    기수강 과목이 대상 과목(들)의 평가에 얼마나 참고가 되는지에 대한 점수.
+    같은 학과/학부, 과목명·개요 키워드 겹침, 성적이 극단적인 과목(강점/약점 신호)에 가중치를 둡니다.
+    """
+    if not _is_course_info(course):
+        return 0.0
+
+    course_words = _keywords(course.course_name, course.description, course.remarks)
+    best = 0.0
+    for target in target_courses:
+        target_words = _keywords(target.course_name, target.description, target.remarks)
+        overlap = len(course_words & target_words) / (len(target_words) or 1)
+        score = 3.0 * overlap
+        if course.major and course.major == target.major:
+            score += 1.0
+        if course.department and course.department == target.department:
+            score += 0.5
+        best = max(best, score)
+
+    grade = (history.grade or "").strip().upper()
+    if grade.startswith("A") or grade in ("D", "D+", "F"):
+        best += 0.5
+    return best
+
+
+@dataclass
+class HistoryFragment:
+    course: Union[CourseInfo, CourseHistory]
+    history: CourseHistory
+    relevance: float
+    level: int = LEVEL_FULL
+
+    def render(self) -> str:
+        return format_taken_course(self.course, self.history, self.level)
+
+    @property
+    def tokens(self) -> int:
+        if self.level >= LEVEL_DROPPED:
+            return 0
+        return estimate_tokens(self.render())
+
+
+def build_taken_courses_section(
+    taken_courses_detail: List[Union[CourseInfo, CourseHistory]],
+    taken_courses_history: List[CourseHistory],
+    target_courses: List[CourseInfo],
+    budget: Optional[int],
+) -> str:
+    """
+    기수강 과목 이력 섹션을 budget(토큰) 안에 맞춥니다. budget이 None이면 압축하지 않습니다.
+    출력 순서는 이력 순서를 유지하고, 압축/생략 순서만 관련도를 따릅니다.
+    """
+    if budget is None:
+        return format_taken_courses(taken_courses_detail, taken_courses_history)
+
+    fragments = [
+        HistoryFragment(course, history, score_relevance(course, history, target_courses))
+        for course, history in zip(taken_courses_detail, taken_courses_history)
+    ]
+    total = sum(fragment.tokens for fragment in fragments)
+    if total <= budget:
+        return "\n".join(fragment.render() for fragment in fragments) or "없음"
+
+    by_relevance = sorted(fragments, key=lambda f: f.relevance)
+    # 관련도 낮은 과목부터 한 단계씩 압축: 전체 → 요약 → 최소 → 생략
+    for level in (LEVEL_COMPACT, LEVEL_MINIMAL, LEVEL_DROPPED):
+        for fragment in by_relevance:
+            if total <= budget:
+                break
+            if fragment.level >= level:
+                continue
+            before = fragment.tokens
+            fragment.level = level
+            total += fragment.tokens - before
+        if total <= budget:
+            break
+
+    dropped = sum(1 for fragment in fragments if fragment.level >= LEVEL_DROPPED)
+    lines = [fragment.render() for fragment in fragments if fragment.level < LEVEL_DROPPED]
+    if dropped:
+        lines.append(f"(관련도가 낮은 기수강 과목 {dropped}개 생략)")
+
+    compacted_prompts.inc()
+    logger.info(f"기수강 이력 압축: 과목 {len(fragments)}개, 생략 {dropped}개, 이력 토큰≈{total} (예산 {budget})")
+    return "\n".join(lines) or "없음"
+
+
+def _history_budget(total_budget: Optional[int], fixed_text: str) -> Optional[int]:
+    if not total_budget or total_budget <= 0:
+        return None
+    return max(total_budget - estimate_tokens(fixed_text), 0)
+
+
+def _observe(prompt: str) -> str:
+    tokens = estimate_tokens(prompt)
+    prompt_tokens_histogram.observe(tokens)
+    logger.debug(f"프롬프트 추정 토큰 수: {tokens}")
+    return prompt
+
+
+# --- 최종 프롬프트 ---
+def create_gemini_prompt(
+    request_data: AnalysisRequest,
+    taken_courses_detail: Optional[List[Union[CourseInfo, CourseHistory]]] = None,
+    token_budget: Optional[int] = None,
+) -> str:
+    """
+    Formats the user profile and course information into a single string prompt
+    for the Gemini model to analyze.
+
+    taken_courses_detail가 주어지면 (ProfileContext에서 미리 조회한 값) DB 조회를 생략합니다.
+    token_budget(기본값: settings.PROMPT_TOKEN_BUDGET, 0 이하: 무제한)을 넘으면 기수강 이력을 압축합니다.
+    """
+    taken_courses_history: List[CourseHistory] = request_data.user_profile.taken_courses
+
+    if taken_courses_detail is None:
+        taken_courses_detail = resolve_taken_courses(taken_courses_history)
+    if token_budget is None:
+        token_budget = settings.PROMPT_TOKEN_BUDGET
+
+    # 2. Course Information
+    course_info = format_course_section(request_data.course_info)
+
+    # 3. Final instruction
+    final_instruction = "\n\n위 학생 정보를 바탕으로 아래 과목에 대한 적합도를 분석하고 JSON 형식으로 결과를 반환하시오."
+
+    # 1. User Profile Details (이력 외 고정 부분을 뺀 나머지가 이력 예산)
+    fixed = format_student_section(request_data.user_profile, "") + course_info + final_instruction
+    history_str = build_taken_courses_section(
+        taken_courses_detail,
+        taken_courses_history,
+        [request_data.course_info],
+        _history_budget(token_budget, fixed),
+    )
+    user_info = format_student_section(request_data.user_profile, history_str)
+
+    return _observe(user_info + course_info + final_instruction)
+
+
+def create_batch_gemini_prompt(
+    user_profile: UserProfile,
+    course_infos: List[CourseInfo],
+    taken_courses_detail: Optional[List[Union[CourseInfo, CourseHistory]]] = None,
+    token_budget: Optional[int] = None,
+) -> str:
+    """
+    학생 정보(기수강 이력 포함)는 한 번만 넣고, 여러 대상 과목 블록을 이어 붙인 배치용 프롬프트.
+    """
+    taken_courses_history: List[CourseHistory] = user_profile.taken_courses
+
+    if taken_courses_detail is None:
+        taken_courses_detail = resolve_taken_courses(taken_courses_history)
+    if token_budget is None:
+        token_budget = settings.PROMPT_TOKEN_BUDGET
+
+    course_info = "\n    ".join(format_course_section(course, include_id=True) for course in course_infos)
+
+    final_instruction = (
+        f"\n\n위 학생 정보를 바탕으로 위 {len(course_infos)}개 과목 각각에 대한 적합도를 분석하고, "
+        "과목마다 하나의 결과를 담은 JSON 배열로 반환하시오. "
+        "각 결과의 course_id에는 해당 과목의 '과목 ID' 값을 그대로 사용하시오."
+    )
+
+    fixed = format_student_section(user_profile, "") + course_info + final_instruction
+    history_str = build_taken_courses_section(
+        taken_courses_detail,
+        taken_courses_history,
+        course_infos,
+        _history_budget(token_budget, fixed),
+    )
+    user_info = format_student_section(user_profile, history_str)
+
+    return _observe(user_info + course_info + final_instruction)
@@ -0,0 +1,240 @@
+"""
+Shared rate limiter and retry scheduler for Gemini calls.
+
+- 분당 요청 수(RPM)와 분당 토큰 수(TPM) 토큰 버킷을 모든 Gemini 호출이 공유합니다.
+- 동시 호출 수는 AIMD 방식으로 조절합니다: 429를 받으면 절반으로 줄이고, 연속 성공 시 하나씩 늘립니다.
+- 재시도 가능한 오류(429, 5xx, 네트워크 오류)는 지수 백오프 + 지터로 재시도합니다.
+
+Gemini 호출은 전용 스레드 풀에서 실행되므로(이벤트 루프는 요청마다 다를 수 있음)
+모든 대기는 threading 기반의 블로킹 대기입니다.
+"""
+from contextlib import contextmanager
+from threading import Condition, Lock
+from typing import Callable, Optional, TypeVar
+import random
+import re
+import time
+
+from loguru import logger
+
+from backend.core import metrics
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """분당 rate_per_minute만큼 채워지는 토큰 버킷 (용량 = 1분 분량)"""
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate_per_second = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate_per_second)
+        self._updated_at = now
+
+    def try_acquire(self, amount: float = 1) -> float:
+        """
+        amount만큼 차감을 시도합니다.
+        :return: 0이면 성공, 양수이면 그만큼(초) 기다린 뒤 다시 시도해야 함
+        """
+        amount = min(amount, self.capacity)
+        with self._lock:
+            self._refill()
+            if self._tokens >= amount:
+                self._tokens -= amount
+                return 0.0
+            return (amount - self._tokens) / self.rate_per_second
+
+    def drain(self) -> None:
+        """서버가 스로틀링을 알려 오면 남은 토큰을 비워 잠시 요청을 멈춤"""
+        with self._lock:
+            self._refill()
+            self._tokens = 0.0
+
+
+class AdaptiveRateLimiter:
+    """
+    RPM/TPM 토큰 버킷 + 적응형 동시성 제한.
+
+    :param requests_per_minute: 분당 최대 요청 수
+    :param tokens_per_minute: 분당 최대 (입력+출력) 토큰 수
+    :param max_concurrency: 동시 호출 수 상한
+    :param min_concurrency: 스로틀링 시 줄어들 수 있는 동시 호출 수 하한
+    :param increase_after: 동시성을 1 늘리기 전에 필요한 연속 성공 수
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float,
+        tokens_per_minute: float,
+        max_concurrency: int,
+        min_concurrency: int = 1,
+        increase_after: int = 10,
+        name: str = "gemini",
+    ):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min(min_concurrency, max_concurrency)
+        self.increase_after = increase_after
+
+        self._limit = max_concurrency
+        self._in_flight = 0
+        self._successes = 0
+        self._condition = Condition()
+
+        self.limit_gauge = metrics.gauge(f"{name}.concurrency_limit", "현재 허용 동시 호출 수")
+        self.in_flight_gauge = metrics.gauge(f"{name}.in_flight", "진행 중인 호출 수")
+        self.throttled = metrics.counter(f"{name}.throttled", "429 응답 수")
+        self.wait_ms = metrics.histogram(f"{name}.limiter_wait_ms", "리미터 대기 시간")
+        self.limit_gauge.set(self._limit)
+
+    @property
+    def concurrency_limit(self) -> int:
+        return self._limit
+
+    def acquire(self, tokens: int = 0) -> None:
+        """동시성 슬롯과 RPM/TPM 예산을 확보할 때까지 대기"""
+        start = time.perf_counter()
+        with self._condition:
+            while self._in_flight >= self._limit:
+                self._condition.wait()
+            self._in_flight += 1
+            self.in_flight_gauge.set(self._in_flight)
+
+        try:
+            for bucket, amount in ((self.requests, 1), (self.tokens, tokens)):
+                if amount <= 0:
+                    continue
+                while True:
+                    delay = bucket.try_acquire(amount)
+                    if delay <= 0:
+                        break
+                    time.sleep(min(delay, 1.0))
+        except BaseException:
+            self.release()
+            raise
+
+        self.wait_ms.observe((time.perf_counter() - start) * 1000)
+
+    def release(self) -> None:
+        with self._condition:
+            self._in_flight -= 1
+            self.in_flight_gauge.set(self._in_flight)
+            self._condition.notify_all()
+
+    @contextmanager
+    def slot(self, tokens: int = 0):
+        self.acquire(tokens)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def on_success(self) -> None:
+        """연속 성공이 쌓이면 동시성 1 증가 (additive increase)"""
+        with self._condition:
+            self._successes += 1
+            if self._successes >= self.increase_after and self._limit < self.max_concurrency:
+                self._limit += 1
+                self._successes = 0
+                self.limit_gauge.set(self._limit)
+                logger.info(f"Gemini 동시성 증가: {self._limit}")
+                self._condition.notify_all()
+
+    def on_throttle(self) -> None:
+        """429 수신 시 동시성 절반으로 감소 (multiplicative decrease) + 요청 버킷 비우기"""
+        self.throttled.inc()
+        self.requests.drain()
+        with self._condition:
+            self._successes = 0
+            new_limit = max(self.min_concurrency, self._limit // 2)
+            if new_limit != self._limit:
+                self._limit = new_limit
+                self.limit_gauge.set(self._limit)
+                logger.warning(f"Gemini 스로틀링 감지, 동시성 감소: {self._limit}")
+
+
+def error_status_code(error: Exception) -> Optional[int]:
+    code = getattr(error, "code", None)
+    if isinstance(code, int):
+        return code
+    return getattr(error, "status_code", None)
+
+
+def is_retryable(error: Exception) -> bool:
+    code = error_status_code(error)
+    if code is not None:
+        return code in RETRYABLE_STATUS_CODES
+    # 상태 코드가 없는 네트워크 계열 오류
+    return isinstance(error, (ConnectionError, TimeoutError)) or type(error).__name__ in (
+        "ConnectError", "ReadTimeout", "ConnectTimeout", "RemoteProtocolError",
+    )
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """서버가 알려 준 재시도 대기 시간 (Retry-After 헤더 또는 RetryInfo.retryDelay)"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if headers:
+        value = headers.get("retry-after")
+        if value:
+            try:
+                return float(value)
+            except ValueError:
+                pass
+
+    details = getattr(error, "details", None)
+    if isinstance(details, dict):
+        for item in (details.get("error", {}) or {}).get("details", []) or []:
+            if str(item.get("@type", "")).endswith("RetryInfo"):
+                match = re.match(r"([\d.]+)s", str(item.get("retryDelay", "")))
+                if match:
+                    return float(match.group(1))
+    return None
+
+
+def call_with_retry(
+    fn: Callable[[], T],
+    limiter: AdaptiveRateLimiter,
+    tokens: int = 0,
+    max_retries: int = 4,
+    base_delay: float = 1.0,
+    max_delay: float = 30.0,
+) -> T:
+    """
+    limiter를 거쳐 fn을 호출하고, 재시도 가능한 오류는 지수 백오프(full jitter)로 재시도합니다.
+    """
+    retries = metrics.counter("gemini.retries", "재시도 횟수")
+    attempt = 0
+    while True:
+        with limiter.slot(tokens):
+            try:
+                result = fn()
+            except Exception as e:
+                error = e
+            else:
+                limiter.on_success()
+                return result
+
+        if error_status_code(error) == 429:
+            limiter.on_throttle()
+        if not is_retryable(error) or attempt >= max_retries:
+            raise error
+
+        delay = random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+        server_delay = retry_after_seconds(error)
+        if server_delay is not None:
+            delay = max(delay, min(server_delay, max_delay))
+
+        attempt += 1
+        retries.inc()
+        logger.warning(f"Gemini 호출 실패 (시도 {attempt}/{max_retries}): {error}. {delay:.2f}초 후 재시도.")
+        time.sleep(delay)
@@ -0,0 +1,67 @@
+"""
+Single-flight request coalescing.
+
+같은 키로 동시에 들어온 호출 중 첫 번째(leader)만 실제로 실행하고,
+나머지는 그 결과(또는 예외)를 기다렸다가 함께 받습니다.
+결과를 보관하지 않으므로 캐시와 달리 "진행 중인" 중복만 합쳐집니다.
+"""
+from concurrent.futures import Future
+from threading import Lock
+from typing import Callable, Dict, TypeVar
+import hashlib
+
+from backend.core import metrics
+
+T = TypeVar("T")
+
+
+def hash_key(*parts: str) -> str:
+    """여러 문자열을 구분자와 함께 이어 붙인 SHA-256 키"""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class SingleFlight:
+    """
+    스레드 안전한 single-flight 그룹.
+
+    :param name: 메트릭 이름 접두사 (singleflight.<name>.executed / .coalesced)
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[str, Future] = {}
+        self._lock = Lock()
+        self.executed = metrics.counter(f"singleflight.{name}.executed", "실제로 실행된 호출 수")
+        self.coalesced = metrics.counter(f"singleflight.{name}.coalesced", "진행 중인 호출에 합쳐진 호출 수")
+
+    def do(self, key: str, fn: Callable[[], T]) -> T:
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+
+        if not leader:
+            self.coalesced.inc()
+            return future.result()
+
+        self.executed.inc()
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def in_flight(self) -> int:
+        return len(self._calls)
@@ -4,7 +4,7 @@ Uses Pydantic's from_attributes feature for seamless conversion.
 """
 from typing import Optional, List
 from sqlalchemy.orm import Session
-from backend.models.user import User as UserModel
+from backend.models.user import User as UserModel, UserCourse as UserCourseModel
 from backend.models.course import Course as CourseModel
 from backend.core.schema import UserProfile, CourseHistory, CourseInfo
 
@@ -92,20 +92,14 @@ def return_user_courses(user_ids: List[int]) -> List[str]:
     Returns:
         List of course_codes taken by these users (flattened list, duplicates preserved)
     """
-    from backend.db.database import SessionLocal
-    db = SessionLocal()
-    try:
-        # Query users by integer ID
-        users = db.query(UserModel).filter(UserModel.id.in_(user_ids)).all()
-    
-        all_courses = []
-        for user in users:
-            for course in user.courses:
-                all_courses.append(course.course_code)
-            
-        return all_courses
-    finally:
-        db.close()
+    from backend.db.database import session_scope
+    if not user_ids:
+        return []
+    # 요청 세션이 있으면 재사용 (요청당 연결 하나)
+    with session_scope() as db:
+        # user_courses에서 course_code 컬럼만 한 번에 조회 (사용자별 courses 지연 로딩 N+1 방지)
+        rows = db.query(UserCourseModel.course_code).filter(UserCourseModel.user_id.in_(user_ids)).all()
+        return [course_code for (course_code,) in rows]
 
 
 def return_course_info(courses: List[int]) -> List[CourseInfo]:
@@ -118,10 +112,10 @@ def return_course_info(courses: List[int]) -> List[CourseInfo]:
     Returns:
         List of CourseInfo objects
     """
-    from backend.db.database import SessionLocal
-    
-    db = SessionLocal()
-    try:
+    from backend.db.database import session_scope
+
+    # 요청 세션이 있으면 재사용 (요청당 연결 하나)
+    with session_scope() as db:
         # Query courses by integer ID
         course_models = db.query(CourseModel).filter(CourseModel.id.in_(courses)).all()
         
@@ -160,5 +154,3 @@ def return_course_info(courses: List[int]) -> List[CourseInfo]:
             course_infos.append(info)
             
         return course_infos
-    finally:
-        db.close()
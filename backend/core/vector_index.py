@@ -0,0 +1,282 @@
+"""
+In-process vector index for similar-user search.
+
+users 테이블의 (id, embedding)을 L2 정규화한 연속 float32 행렬로 메모리에 올려 두고,
+top-k 코사인 검색을 행렬곱 + argpartition 한 번으로 처리합니다 (DB 왕복 없음).
+반환하는 거리는 pgvector의 코사인 거리(<=>, 1 - 코사인 유사도)와 같은 값입니다.
+
+갱신:
+- POST /users 시 라우터가 sync_user로 새 사용자 행을 즉시 반영 (수강 이력 추가는 임베딩을 다시 계산하지 않음;
+  임베딩은 seed_user_vectors.py가 다시 계산하며 그 변경은 아래 증분 갱신으로 반영)
+- 다른 프로세스(다른 uvicorn 워커, seed 스크립트)의 변경은 refresh_if_stale이
+  updated_at 워터마크 이후의 행만 다시 읽어 반영 (VECTOR_MEMORY_REFRESH_SECONDS 주기)
+- 사용자 삭제는 API에 없으므로 워터마크 갱신으로는 반영되지 않습니다 (load로 전체 재적재)
+
+major / grade_level도 함께 보관하므로 전공·학년 조건 검색은 조건에 맞지 않는 행을 마스킹한 뒤
+같은 행렬곱으로 처리합니다 (필터 때문에 결과가 k개보다 적어지지 않음).
+
+settings.VECTOR_SEARCH_BACKEND=memory일 때 neighbor.get_similar_users*가 이 인덱스를 사용합니다.
+"""
+from datetime import datetime
+from threading import Lock
+from typing import Optional, Sequence, Tuple, Union
+import time
+
+import numpy as np
+from loguru import logger
+from sqlalchemy.orm import Session
+
+from backend.core import metrics
+from backend.models.user import User
+
+
+# 인덱스에 적재하는 users 컬럼 (_apply_rows의 행 형식)
+_COLUMNS = (User.id, User.embedding, User.updated_at, User.major, User.grade_level)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """행별 L2 정규화 (영벡터는 그대로 0으로 둠)"""
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1.0)
+
+
+class VectorIndex:
+    """
+    사용자 임베딩 메모리 인덱스. 갱신은 잠금으로 직렬화하고, 검색은 잠금 안에서 배열 참조와 크기만 잡은 뒤
+    (스냅샷) 행렬곱은 잠금 밖에서 동시에 실행합니다. 갱신은 스냅샷의 행 번호 → 사용자 ID 대응을 바꾸지 않습니다
+    (추가는 스냅샷 크기 뒤에만 쓰고, 배열 확장과 삭제는 새 배열을 만들어 교체).
+
+    :param initial_capacity: 처음 확보할 행 수 (부족하면 두 배씩 늘림)
+    """
+
+    def __init__(self, initial_capacity: int = 1024):
+        self.initial_capacity = initial_capacity
+
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._majors = np.zeros(0, dtype=object)
+        # 학년이 없는 사용자는 NaN (학년 조건이 있으면 항상 제외)
+        self._grade_levels = np.zeros(0, dtype=np.float64)
+        self._matrix: Optional[np.ndarray] = None
+        self._size = 0
+        self._rows = {}
+        self._watermark: Optional[datetime] = None
+        self._refreshed_at = 0.0
+        self._loaded = False
+        self._lock = Lock()
+
+        self.users = metrics.gauge("vector_index.users", "메모리 벡터 인덱스에 적재된 사용자 수")
+        self.refreshes = metrics.counter("vector_index.refreshes", "updated_at 기준 증분 갱신 횟수")
+        self.search_ms = metrics.histogram("vector_index.search_ms", "메모리 kNN 검색 시간")
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def __len__(self) -> int:
+        return self._size
+
+    # --- 갱신 (잠금 안에서 호출) ---
+    def _ensure_capacity(self, dim: int, needed: int) -> None:
+        if self._matrix is not None and self._matrix.shape[1] != dim:
+            raise ValueError(f"embedding dimension changed: {self._matrix.shape[1]} -> {dim}")
+        capacity = 0 if self._matrix is None else len(self._matrix)
+        if needed <= capacity:
+            return
+        capacity = max(self.initial_capacity, capacity)
+        while capacity < needed:
+            capacity *= 2
+        matrix = np.zeros((capacity, dim), dtype=np.float32)
+        ids = np.zeros(capacity, dtype=np.int64)
+        majors = np.full(capacity, None, dtype=object)
+        grade_levels = np.full(capacity, np.nan)
+        if self._matrix is not None:
+            matrix[:self._size] = self._matrix[:self._size]
+            ids[:self._size] = self._ids[:self._size]
+            majors[:self._size] = self._majors[:self._size]
+            grade_levels[:self._size] = self._grade_levels[:self._size]
+        # 새 배열을 만든 뒤 교체하므로 진행 중인 검색은 이전 배열을 그대로 사용
+        self._matrix, self._ids, self._majors, self._grade_levels = matrix, ids, majors, grade_levels
+
+    def _set_row(self, row: int, vector: np.ndarray, attributes: Tuple) -> None:
+        major, grade_level = attributes
+        self._matrix[row] = vector
+        self._majors[row] = major
+        self._grade_levels[row] = np.nan if grade_level is None else grade_level
+
+    def _upsert(self, user_ids: Sequence[int], vectors: np.ndarray, attributes: Sequence[Tuple]) -> None:
+        vectors = _normalize(np.asarray(vectors, dtype=np.float32))
+        new = [i for i, user_id in enumerate(user_ids) if user_id not in self._rows]
+        self._ensure_capacity(vectors.shape[1], self._size + len(new))
+
+        for i, user_id in enumerate(user_ids):
+            row = self._rows.get(user_id)
+            if row is not None:
+                self._set_row(row, vectors[i], attributes[i])
+        for i in new:
+            self._set_row(self._size, vectors[i], attributes[i])
+            self._ids[self._size] = user_ids[i]
+            self._rows[user_ids[i]] = self._size
+            # 행을 다 쓴 뒤 크기를 늘려야 검색이 채워지지 않은 행을 보지 않음
+            self._size += 1
+        self.users.set(self._size)
+
+    def _remove(self, user_id: int) -> None:
+        row = self._rows.pop(user_id, None)
+        if row is None:
+            return
+        last = self._size - 1
+        if row != last:
+            # 진행 중인 검색이 같은 배열을 보고 있으므로 제자리에서 행을 옮기지 않고 복사본에서 옮긴 뒤 교체
+            # (삭제는 임베딩이 지워진 경우에만 일어나므로 복사 비용은 드묾)
+            matrix, ids, majors, grade_levels = (
+                array.copy() for array in (self._matrix, self._ids, self._majors, self._grade_levels)
+            )
+            matrix[row], ids[row], majors[row], grade_levels[row] = matrix[last], ids[last], majors[last], grade_levels[last]
+            self._rows[int(ids[row])] = row
+            self._matrix, self._ids, self._majors, self._grade_levels = matrix, ids, majors, grade_levels
+        self._size = last
+        self.users.set(self._size)
+
+    def _apply_rows(self, rows) -> int:
+        user_ids, vectors, attributes = [], [], []
+        for user_id, embedding, updated_at, major, grade_level in rows:
+            if updated_at is not None and (self._watermark is None or updated_at > self._watermark):
+                self._watermark = updated_at
+            if embedding is None:
+                self._remove(user_id)
+                continue
+            user_ids.append(user_id)
+            vectors.append(np.asarray(embedding, dtype=np.float32))
+            attributes.append((major, grade_level))
+        if user_ids:
+            self._upsert(user_ids, np.stack(vectors), attributes)
+        return len(user_ids)
+
+    # --- 공개 API ---
+    def load(self, db: Session) -> int:
+        """users 테이블 전체를 다시 적재합니다. 적재한 사용자 수를 반환"""
+        start = time.perf_counter()
+        rows = db.query(*_COLUMNS).filter(User.embedding.isnot(None)).all()
+        with self._lock:
+            self._matrix, self._ids, self._size, self._rows, self._watermark = None, np.zeros(0, dtype=np.int64), 0, {}, None
+            if rows:
+                self._ensure_capacity(len(rows[0][1]), len(rows))
+            self._apply_rows(rows)
+            self._refreshed_at = time.monotonic()
+            self._loaded = True
+        logger.info(f"메모리 벡터 인덱스 적재: 사용자 {self._size}명, 소요={(time.perf_counter() - start) * 1000:.1f}ms")
+        return self._size
+
+    def refresh(self, db: Session) -> int:
+        """마지막으로 본 updated_at 이후(같은 시각 포함)에 바뀐 행만 반영합니다. 반영한 행 수를 반환"""
+        if not self.loaded:
+            return self.load(db)
+        query = db.query(*_COLUMNS)
+        if self._watermark is not None:
+            # 같은 시각에 커밋된 행을 놓치지 않도록 >= 로 읽음 (다시 반영해도 결과는 같음)
+            query = query.filter(User.updated_at >= self._watermark)
+        rows = query.all()
+        with self._lock:
+            applied = self._apply_rows(rows)
+            self._refreshed_at = time.monotonic()
+        self.refreshes.inc()
+        if applied:
+            logger.debug(f"메모리 벡터 인덱스 증분 갱신: {applied}건")
+        return applied
+
+    def refresh_if_stale(self, db: Session, max_age_seconds: float) -> None:
+        """적재되지 않았거나 마지막 갱신 후 max_age_seconds가 지났으면 갱신 (0 이하: 적재만)"""
+        if not self.loaded:
+            self.load(db)
+        elif max_age_seconds > 0 and time.monotonic() - self._refreshed_at >= max_age_seconds:
+            self.refresh(db)
+
+    def sync_user(self, user: User) -> None:
+        """라우터에서 커밋한 사용자 행을 즉시 반영합니다 (인덱스가 적재되지 않았으면 무시)"""
+        if not self.loaded:
+            return
+        with self._lock:
+            self._apply_rows([(user.id, user.embedding, user.updated_at, user.major, user.grade_level)])
+
+    @staticmethod
+    def _filter_mask(
+        majors: np.ndarray,
+        grade_levels: np.ndarray,
+        major: Optional[str],
+        min_grade_level: Optional[int],
+        max_grade_level: Optional[int],
+    ) -> Optional[np.ndarray]:
+        """조건에 맞는 행의 마스크 (조건이 없으면 None)"""
+        if major is None and min_grade_level is None and max_grade_level is None:
+            return None
+        mask = np.ones(len(majors), dtype=bool)
+        if major is not None:
+            mask &= majors == major
+        with np.errstate(invalid="ignore"):
+            if min_grade_level is not None:
+                mask &= grade_levels >= min_grade_level
+            if max_grade_level is not None:
+                mask &= grade_levels <= max_grade_level
+        return mask
+
+    def search(
+        self,
+        query_vector: Union[np.ndarray, Sequence[float]],
+        k: int = 5,
+        major: Optional[str] = None,
+        min_grade_level: Optional[int] = None,
+        max_grade_level: Optional[int] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        코사인 거리 기준 top-k 검색.
+
+        :param query_vector: 검색 기준 임베딩 벡터
+        :param k: 찾을 사용자 수
+        :param major: 이 전공의 사용자만 검색
+        :param min_grade_level: 이 학년 이상인 사용자만 검색
+        :param max_grade_level: 이 학년 이하인 사용자만 검색
+        :return: (사용자 ID 배열, 코사인 거리 배열), 거리 오름차순
+        """
+        ids, distances = self.search_many(
+            np.asarray(query_vector, dtype=np.float32).reshape(1, -1), k=k,
+            major=major, min_grade_level=min_grade_level, max_grade_level=max_grade_level,
+        )
+        return ids[0], distances[0]
+
+    def search_many(
+        self,
+        query_vectors: Union[np.ndarray, Sequence[Sequence[float]]],
+        k: int = 5,
+        major: Optional[str] = None,
+        min_grade_level: Optional[int] = None,
+        max_grade_level: Optional[int] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        여러 쿼리 벡터의 top-k를 행렬곱 한 번으로 검색합니다 (전공/학년 조건은 search와 같음).
+
+        :param query_vectors: (n, dim) 쿼리 벡터
+        :param k: 쿼리당 찾을 사용자 수
+        :return: (사용자 ID 배열 (n, k'), 코사인 거리 배열 (n, k')), 행마다 거리 오름차순 (k' = min(k, 조건에 맞는 사용자 수))
+        """
+        queries = np.asarray(query_vectors, dtype=np.float32)
+        with self._lock:
+            matrix, ids, majors, grade_levels, size = self._matrix, self._ids, self._majors, self._grade_levels, self._size
+        mask = self._filter_mask(majors[:size], grade_levels[:size], major, min_grade_level, max_grade_level)
+        candidates = size if mask is None else int(mask.sum())
+        if matrix is None or candidates == 0 or k <= 0 or len(queries) == 0:
+            return np.zeros((len(queries), 0), dtype=np.int64), np.zeros((len(queries), 0), dtype=np.float32)
+
+        with self.search_ms.timer():
+            similarities = _normalize(queries.reshape(len(queries), -1)) @ matrix[:size].T
+            if mask is not None:
+                similarities[:, ~mask] = -np.inf
+            k = min(k, candidates)
+            top = np.argpartition(-similarities, k - 1, axis=1)[:, :k] if k < size else np.tile(np.arange(size), (len(queries), 1))
+            top_similarities = np.take_along_axis(similarities, top, axis=1)
+            order = np.argsort(-top_similarities, axis=1, kind="stable")
+            top = np.take_along_axis(top, order, axis=1)
+            return ids[top], (1.0 - np.take_along_axis(top_similarities, order, axis=1)).astype(np.float32)
+
+
+# 프로세스 전체에서 공유하는 사용자 임베딩 인덱스 (VECTOR_SEARCH_BACKEND=memory일 때 첫 검색 시 적재)
+user_vector_index = VectorIndex()
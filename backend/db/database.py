@@ -1,13 +1,82 @@
-from sqlalchemy import create_engine
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from fastapi import Depends
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import QueuePool
+import time
+
+from backend.core import metrics
 from backend.core.config import settings
 
 SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+# --- 커넥션 풀 계측 (/metrics의 db.pool.*) ---
+# 워커 프로세스당 최대 연결 수 = DB_POOL_SIZE + DB_MAX_OVERFLOW
+# Postgres max_connections는 uvicorn 워커 수 x 이 값 + (스크립트 등 다른 접속)보다 여유 있게 잡아야 함
+pool_in_use = metrics.gauge("db.pool.in_use", "체크아웃되어 사용 중인 DB 연결 수")
+pool_waiting = metrics.gauge("db.pool.waiting", "연결 체크아웃을 기다리는 스레드 수")
+pool_checkout_wait_ms = metrics.histogram("db.pool.checkout_wait_ms", "풀에서 연결을 받기까지 대기 시간")
+pool_timeouts = metrics.counter("db.pool.timeouts", "DB_POOL_TIMEOUT 안에 연결을 받지 못한 횟수")
+
+
+class InstrumentedQueuePool(QueuePool):
+    """체크아웃 대기 시간과 대기 중인 스레드 수를 기록하는 QueuePool"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        pool_waiting.inc()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            pool_timeouts.inc()
+            raise
+        finally:
+            pool_waiting.dec()
+            pool_checkout_wait_ms.observe((time.perf_counter() - start) * 1000)
+
+
+# 프로세스 전체가 공유하는 유일한 엔진/커넥션 풀 (core/neighbor.py 등 모든 DB 접근이 사용)
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    poolclass=InstrumentedQueuePool,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+# checkin 이벤트는 풀 내부 카운트가 갱신되기 전에 호출되므로 사용 중 연결 수는 이벤트로 직접 셈
+@event.listens_for(engine, "checkout")
+def _on_checkout(dbapi_connection, connection_record, connection_proxy) -> None:
+    pool_in_use.inc()
+
+
+@event.listens_for(engine, "checkin")
+def _on_checkin(dbapi_connection, connection_record) -> None:
+    pool_in_use.dec()
+
+
+def pool_stats() -> dict:
+    """현재 풀 상태와 설정 (프로세스당 최대 연결 수 포함)"""
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "max_connections": settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW,
+        "in_use": engine.pool.checkedout(),
+        "idle": engine.pool.checkedin(),
+        "overflow": engine.pool.overflow(),
+        "status": engine.pool.status(),
+    }
+
+
 Base = declarative_base()
 
 def get_db():
@@ -16,3 +85,66 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# --- 요청 단위 세션 (unit of work) ---
+# 라우터가 get_request_db/get_read_db로 요청 세션을 등록하면 core/utils.py, core/neighbor.py 등의 헬퍼는
+# session_scope()로 같은 세션(= 같은 연결 하나)을 재사용합니다. 등록된 세션이 없으면(작업 워커, 스크립트)
+# session_scope가 새 세션을 열고, 그 블록 안의 헬퍼 호출은 다시 그 세션을 공유합니다.
+# Session은 스레드 안전하지 않으므로 순차 실행되는 작업(asyncio.to_thread 등 컨텍스트를 복사하는 호출)에만 전파되며,
+# Gemini 실행기처럼 여러 스레드가 동시에 도는 곳에서는 각자 세션을 엽니다.
+_request_session: ContextVar[Optional[Session]] = ContextVar("request_session", default=None)
+
+
+def current_session() -> Optional[Session]:
+    """현재 컨텍스트에 등록된 요청 세션 (없으면 None)"""
+    return _request_session.get()
+
+
+@contextmanager
+def session_scope() -> Iterator[Session]:
+    """
+    현재 컨텍스트의 세션을 사용하는 블록. 등록된 세션이 있으면 그대로 쓰고(닫지 않음),
+    없으면 새 세션을 열어 블록 동안 등록한 뒤 블록이 끝나면 닫습니다.
+    """
+    db = _request_session.get()
+    if db is not None:
+        yield db
+        return
+
+    db = SessionLocal()
+    token = _request_session.set(db)
+    try:
+        yield db
+    finally:
+        _request_session.reset(token)
+        db.close()
+
+
+@event.listens_for(SessionLocal, "after_begin")
+def _begin_snapshot(session: Session, transaction, connection) -> None:
+    # 첫 쿼리 직전(BEGIN 직후)에 트랜잭션 속성을 지정하므로 연결을 미리 체크아웃하지 않음
+    if session.info.get("snapshot"):
+        connection.exec_driver_sql("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY")
+
+
+async def get_request_db(db: Session = Depends(get_db)):
+    """
+    get_db 세션을 요청 세션으로 등록하는 의존성. 엔드포인트와 헬퍼가 요청당 연결 하나를 공유합니다.
+    (async 의존성이어야 엔드포인트와 같은 컨텍스트에 등록됨)
+    """
+    token = _request_session.set(db)
+    try:
+        yield db
+    finally:
+        _request_session.reset(token)
+
+
+async def get_read_db(db: Session = Depends(get_request_db)):
+    """
+    읽기 전용 요청용 get_request_db. DB_READ_SNAPSHOT이 켜져 있으면 요청의 모든 조회를
+    REPEATABLE READ READ ONLY 트랜잭션 하나(같은 스냅샷)에서 실행합니다.
+    """
+    if settings.DB_READ_SNAPSHOT:
+        db.info["snapshot"] = True
+    yield db
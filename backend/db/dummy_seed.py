@@ -13,7 +13,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspa
 from backend.db.database import engine, SessionLocal, Base
 from backend.models.user import User, UserCourse
 from backend.db.dummy_data_user import get_dummy_users
-from backend.core.encoder import generate_embeddings
+from backend.core.encoder import generate_embeddings_array
 
 load_dotenv()
 
@@ -44,22 +44,27 @@ def seed_data():
         dummy_profiles = get_dummy_users()
         print(f"총 {len(dummy_profiles)}명의 프로필을 변환하여 DB에 저장합니다.")
 
+        # --- A. 텍스트 임베딩 생성 (전체 프로필을 한 번에, (N, 768) float32 행렬) ---
+        summary_texts = [
+            f"관심분야: {', '.join(p.interests)}. "
+            f"평가방식선호: {p.eval_preference}점 (1:시험~5:과제). "
+            f"팀플선호: {p.team_preference}점 (1:싫음~5:좋음). "
+            f"선호출석: {', '.join(p.attendence_type)}."
+            for p in dummy_profiles
+        ]
+        try:
+            print(f"   {len(summary_texts)}개 프로필 벡터화 중...")
+            vectors = generate_embeddings_array(summary_texts)
+        except Exception as e:
+            print(f"임베딩 실패: {e}")
+            return
+
         for i, p in enumerate(dummy_profiles):
-            
-            # --- A. 텍스트 임베딩 생성 ---
-            summary_text = (
-                f"관심분야: {', '.join(p.interests)}. "
-                f"평가방식선호: {p.eval_preference}점 (1:시험~5:과제). "
-                f"팀플선호: {p.team_preference}점 (1:싫음~5:좋음). "
-                f"선호출석: {', '.join(p.attendence_type)}."
-            )
-            
-            try:
-                print(f"   [{i+1}/{len(dummy_profiles)}] User_{i+1} 벡터화 중...")
-                vector = generate_embeddings([summary_text])[0]
-            except Exception as e:
-                print(f"임베딩 실패: {e}")
+            # 인코딩이 중간에 실패하면 앞에서부터 성공한 행까지만 반환됨
+            if i >= len(vectors):
+                print(f"   [{i+1}/{len(dummy_profiles)}] User_{i+1} 임베딩 없음, 건너뜀")
                 continue
+            vector = vectors[i]
 
             # --- B. User 객체 생성 ---
             db_user = User(
@@ -0,0 +1,244 @@
+"""
+Versioned schema migrations.
+
+Base.metadata.create_all은 없는 테이블만 만들고 인덱스 추가/변경은 하지 않으므로,
+그 이후의 스키마 변경은 여기에 버전 순서대로 추가합니다.
+적용된 버전은 schema_migrations 테이블에 기록되며, 앱 기동 시 run_migrations가 미적용 버전만 실행합니다.
+
+- 각 마이그레이션은 자기 트랜잭션 안에서 실행되고, 성공하면 버전 기록과 함께 커밋됩니다.
+- 여러 uvicorn 워커가 동시에 기동해도 advisory lock으로 한 프로세스만 실행합니다.
+- 이미 배포된 마이그레이션은 수정하지 말고 새 버전을 추가합니다.
+"""
+from typing import Callable, List, NamedTuple, Optional, Tuple, Union
+import hashlib
+import re
+
+from loguru import logger
+from sqlalchemy import literal, text
+from sqlalchemy.engine import Connection, Engine
+
+from backend.core.config import settings
+
+# schema_migrations 동시 실행 방지용 advisory lock 키 (임의의 고정값)
+MIGRATION_LOCK_KEY = 2025_10_00
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    # SQL 문 목록 또는 Connection을 받아 직접 실행하는 함수
+    steps: Union[List[str], Callable[[Connection], None]]
+
+
+# users.embedding 전체 벡터 인덱스 이름
+USER_EMBEDDING_INDEX = "ix_users_embedding_cosine"
+# 벡터 인덱스 재구성(scripts/build_vector_index.py) 동시 실행 방지용 advisory lock 키
+VECTOR_INDEX_LOCK_KEY = 2025_10_01
+
+
+def _create_user_embedding_index(conn: Connection) -> None:
+    """
+    users.embedding 코사인 거리(<=>) kNN용 벡터 인덱스.
+    VECTOR_INDEX_TYPE=hnsw(기본값)는 빈 테이블에서도 점진적으로 채워지므로 여기서 만듭니다.
+    ivfflat은 생성 시점의 데이터로 리스트(centroid)를 만들고 기동 중 비동시(non-concurrent) 생성은 쓰기를 막으므로,
+    데이터를 적재한 뒤 scripts/build_vector_index.py로 만듭니다 (CREATE INDEX CONCURRENTLY).
+    """
+    if settings.VECTOR_INDEX_TYPE == "ivfflat":
+        logger.warning(
+            "VECTOR_INDEX_TYPE=ivfflat: 기동 시에는 벡터 인덱스를 만들지 않습니다. "
+            "사용자 임베딩 적재 후 scripts/build_vector_index.py를 실행하세요."
+        )
+        return
+    conn.execute(text(
+        f"CREATE INDEX IF NOT EXISTS {USER_EMBEDDING_INDEX} ON users "
+        "USING hnsw (embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64)"
+    ))
+    logger.info("users.embedding HNSW 인덱스 생성 (m=16, ef_construction=64)")
+
+
+def _ivfflat_lists(rows: int) -> int:
+    """IVFFlat 리스트 수 (행 수 / 1000, 최소 1)"""
+    return max(1, rows // 1000)
+
+
+def _vector_index_method(rows: int) -> str:
+    """VECTOR_INDEX_TYPE에 따른 인덱스 방식"""
+    if settings.VECTOR_INDEX_TYPE == "ivfflat":
+        return f"ivfflat (embedding vector_cosine_ops) WITH (lists = {_ivfflat_lists(rows)})"
+    return "hnsw (embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64)"
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "users_embedding_vector_index", _create_user_embedding_index),
+    # 전공/학년 조건 kNN에서 벡터 인덱스 대신 조건으로 먼저 좁힐 때 사용
+    Migration(2, "users_major_grade_level_index", [
+        "CREATE INDEX IF NOT EXISTS ix_users_major_grade_level ON users (major, grade_level)",
+    ]),
+    # 평가 작업 임대 연장 (create_all로 새로 만든 테이블에는 이미 있음)
+    Migration(3, "evaluation_jobs_heartbeat", [
+        "ALTER TABLE evaluation_jobs ADD COLUMN IF NOT EXISTS heartbeat_at TIMESTAMP WITHOUT TIME ZONE",
+    ]),
+]
+
+
+def run_migrations(engine: Engine) -> List[int]:
+    """
+    미적용 마이그레이션을 버전 순서대로 실행합니다.
+
+    :param engine: 대상 DB 엔진
+    :return: 이번에 적용한 버전 목록
+    """
+    applied_now: List[int] = []
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_migrations ("
+            " version INTEGER PRIMARY KEY, name TEXT NOT NULL, applied_at TIMESTAMPTZ NOT NULL DEFAULT now())"
+        ))
+
+    for migration in sorted(MIGRATIONS, key=lambda m: m.version):
+        with engine.begin() as conn:
+            # 트랜잭션 범위 lock: 다른 프로세스는 여기서 기다렸다가 이미 적용된 것을 확인하고 건너뜀
+            conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+            already = conn.execute(
+                text("SELECT 1 FROM schema_migrations WHERE version = :version"), {"version": migration.version}
+            ).first()
+            if already:
+                continue
+
+            logger.info(f"마이그레이션 적용: {migration.version} {migration.name}")
+            if callable(migration.steps):
+                migration.steps(conn)
+            else:
+                for statement in migration.steps:
+                    conn.execute(text(statement))
+            conn.execute(
+                text("INSERT INTO schema_migrations (version, name) VALUES (:version, :name)"),
+                {"version": migration.version, "name": migration.name},
+            )
+            applied_now.append(migration.version)
+
+    if applied_now:
+        logger.success(f"마이그레이션 {len(applied_now)}건 적용 완료: {applied_now}")
+    return applied_now
+
+
+def major_vector_index_name(major: str) -> str:
+    """전공별 부분 인덱스 이름 (전공명은 한글일 수 있으므로 해시 사용)"""
+    return f"ix_users_embedding_cosine_major_{hashlib.sha1(major.encode('utf-8')).hexdigest()[:12]}"
+
+
+def _major_index_targets(conn: Connection, min_rows: int) -> List[Tuple[str, int, str]]:
+    """사용자가 min_rows명 이상인 전공별 부분 인덱스 (이름, 행 수, WHERE 절) 목록"""
+    majors = conn.execute(text(
+        "SELECT major, count(*) FROM users WHERE major IS NOT NULL AND embedding IS NOT NULL "
+        "GROUP BY major HAVING count(*) >= :min_rows"
+    ), {"min_rows": min_rows}).all()
+    targets = []
+    for major, rows in majors:
+        # 부분 인덱스 조건은 바인드 파라미터를 받지 않으므로 리터럴로 렌더링 (따옴표 이스케이프 포함)
+        predicate = literal(major).compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True})
+        targets.append((major_vector_index_name(major), rows, f" WHERE major = {predicate}"))
+    return targets
+
+
+def ensure_major_vector_indexes(engine: Engine, min_rows: int) -> List[str]:
+    """
+    사용자가 min_rows명 이상인 전공마다 WHERE major = '<전공>' 부분 벡터 인덱스를 만듭니다.
+    전공 조건 kNN(neighbor.find_similar_users(major=...))은 이 인덱스로 해당 전공 안에서만 그래프를 탐색하므로
+    필터 때문에 재현율이 떨어지지 않습니다. 전공 목록은 데이터에 따라 달라지므로 버전 마이그레이션이 아니라
+    기동 시 없는 인덱스만 CREATE INDEX CONCURRENTLY로 추가합니다 (쓰기를 막지 않음).
+    IVFFlat은 데이터 적재 후 scripts/build_vector_index.py에서 만들므로 여기서는 건너뜁니다.
+
+    :param engine: 대상 DB 엔진
+    :param min_rows: 부분 인덱스를 만들 전공의 최소 사용자 수 (0 이하: 만들지 않음)
+    :return: 이번에 확인한 인덱스 이름 목록
+    """
+    if min_rows <= 0 or settings.VECTOR_INDEX_TYPE == "ivfflat":
+        return []
+
+    names: List[str] = []
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        # 다른 워커나 재구성 스크립트가 인덱스를 만드는 중이면 기동을 막지 않고 건너뜀
+        if not conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": VECTOR_INDEX_LOCK_KEY}).scalar():
+            return []
+        try:
+            for name, rows, where in _major_index_targets(conn, min_rows):
+                conn.execute(text(
+                    f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON users USING {_vector_index_method(rows)}{where}"
+                ))
+                names.append(name)
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": VECTOR_INDEX_LOCK_KEY})
+
+    if names:
+        logger.info(f"전공별 부분 벡터 인덱스 확인: {len(names)}개 (사용자 {min_rows}명 이상 전공)")
+    return names
+
+
+def _vector_index_stale(conn: Connection, name: str, rows: int, growth_factor: float) -> Optional[str]:
+    """인덱스를 다시 만들어야 하는 이유 (필요 없으면 None)"""
+    row = conn.execute(text(
+        "SELECT pg_get_indexdef(i.indexrelid), i.indisvalid FROM pg_index i "
+        "JOIN pg_class c ON c.oid = i.indexrelid WHERE c.relname = :name"
+    ), {"name": name}).first()
+    if row is None:
+        return "없음"
+    indexdef, valid = row
+    if not valid:
+        return "이전 CONCURRENTLY 생성 실패로 무효 상태"
+    if f"USING {settings.VECTOR_INDEX_TYPE} " not in indexdef:
+        return f"VECTOR_INDEX_TYPE({settings.VECTOR_INDEX_TYPE})와 방식이 다름"
+    if settings.VECTOR_INDEX_TYPE == "ivfflat":
+        match = re.search(r"lists='?(\d+)", indexdef)
+        built = int(match.group(1)) if match else 1
+        if _ivfflat_lists(rows) >= built * growth_factor:
+            return f"행 수 증가 (lists {built} -> {_ivfflat_lists(rows)})"
+    return None
+
+
+def _build_vector_index_concurrently(conn: Connection, name: str, rows: int, where: str = "") -> None:
+    """
+    쓰기를 막지 않도록 새 인덱스를 CONCURRENTLY로 만든 뒤 기존 인덱스와 교체 (autocommit 연결 필요).
+    교체(DROP → RENAME) 사이의 짧은 순간에는 해당 kNN이 순차 스캔으로 실행됩니다.
+    """
+    staging = f"{name}_rebuild"
+    conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {staging}"))
+    conn.execute(text(f"CREATE INDEX CONCURRENTLY {staging} ON users USING {_vector_index_method(rows)}{where}"))
+    conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+    conn.execute(text(f"ALTER INDEX {staging} RENAME TO {name}"))
+
+
+def rebuild_vector_indexes(engine: Engine, min_rows: int, growth_factor: float = 2.0, force: bool = False) -> List[str]:
+    """
+    users.embedding 벡터 인덱스(전체 + 전공별 부분 인덱스)를 CREATE INDEX CONCURRENTLY로 만들거나 다시 만듭니다.
+    데이터 적재(seed_user_vectors.py 등) 후 scripts/build_vector_index.py에서 실행합니다.
+    없거나 무효인 인덱스, 방식이 바뀐 인덱스, 그리고 IVFFlat은 현재 행 수 기준 lists가 만들 때의
+    growth_factor배 이상이 된 인덱스만 다시 만듭니다.
+
+    :param engine: 대상 DB 엔진
+    :param min_rows: 전공별 부분 인덱스를 둘 전공의 최소 사용자 수 (0 이하: 전체 인덱스만)
+    :param growth_factor: IVFFlat 재구성 기준 배수
+    :param force: 조건과 관계없이 모두 다시 만듦
+    :return: 이번에 만든 인덱스 이름 목록
+    """
+    rebuilt: List[str] = []
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": VECTOR_INDEX_LOCK_KEY})
+        try:
+            rows = conn.execute(text("SELECT count(*) FROM users WHERE embedding IS NOT NULL")).scalar() or 0
+            targets = [(USER_EMBEDDING_INDEX, rows, "")]
+            if min_rows > 0:
+                targets += _major_index_targets(conn, min_rows)
+
+            for name, target_rows, where in targets:
+                reason = "강제 재구성" if force else _vector_index_stale(conn, name, target_rows, growth_factor)
+                if reason is None:
+                    continue
+                logger.info(f"벡터 인덱스 생성(CONCURRENTLY): {name}, 행 {target_rows}개, 사유={reason}")
+                _build_vector_index_concurrently(conn, name, target_rows, where)
+                rebuilt.append(name)
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": VECTOR_INDEX_LOCK_KEY})
+
+    logger.success(f"벡터 인덱스 확인 완료: {len(rebuilt)}개 생성 ({settings.VECTOR_INDEX_TYPE})")
+    return rebuilt
@@ -4,19 +4,25 @@ from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 from dotenv import load_dotenv
 from sqlalchemy import text
-from backend.routers import evaluate, courses, users
+from backend.routers import evaluate, evaluate_stream, evaluations, courses, users, metrics, health
 
 load_dotenv()
 
 app = FastAPI()
 
+# 임베딩 모델은 백그라운드에서 로드 + 워밍업 (DB 준비와 겹쳐 진행, /health/ready로 완료 여부 확인)
+@app.on_event("startup")
+def warm_up_embedder():
+    from backend.core.encoder import start_embedder_warmup
+    start_embedder_warmup()
+
 # Startup event to create tables
 @app.on_event("startup")
 def on_startup():
     # Import Base and engine
     from backend.db.database import engine, Base
     # Import models to ensure they are registered with Base
-    from backend.models import course, user
+    from backend.models import course, user, evaluation_cache, evaluation_job
     
     with engine.connect() as conn:
         conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
@@ -24,6 +30,38 @@ def on_startup():
     Base.metadata.create_all(bind=engine)
     print("Database tables created (if not exist).")
 
+    # create_all 이후의 스키마 변경 (벡터 인덱스 등)
+    from backend.db.migrations import run_migrations, ensure_major_vector_indexes
+    from backend.core.config import settings
+    run_migrations(engine)
+    ensure_major_vector_indexes(engine, settings.VECTOR_PARTIAL_INDEX_MIN_ROWS)
+
+    # 메모리 벡터 인덱스를 쓰면 첫 요청 전에 적재
+    if settings.VECTOR_SEARCH_BACKEND == "memory":
+        from backend.core.vector_index import user_vector_index
+        from backend.db.database import SessionLocal
+        db = SessionLocal()
+        try:
+            user_vector_index.load(db)
+        finally:
+            db.close()
+
+    # 프롬프트 버전이 바뀌었다면 이전 버전의 평가 캐시 정리
+    from backend.core.cache import evaluation_cache as cache
+    from backend.core.inference import PROMPT_VERSION
+    cache.purge_stale_versions(PROMPT_VERSION)
+
+# 평가 작업 워커 풀 (테이블 생성 후 시작, 중단된 작업은 시작 시 다시 큐에 넣음)
+@app.on_event("startup")
+async def start_evaluation_workers():
+    from backend.core.jobs import evaluation_workers
+    await evaluation_workers.start()
+
+@app.on_event("shutdown")
+async def stop_evaluation_workers():
+    from backend.core.jobs import evaluation_workers
+    await evaluation_workers.stop()
+
 class ChatRequest(BaseModel):
     prompt: str
 
@@ -37,8 +75,12 @@ async def chat(request: ChatRequest):
     pass
 
 app.include_router(evaluate.router)
+app.include_router(evaluate_stream.router)
+app.include_router(evaluations.router)
 app.include_router(courses.router)
 app.include_router(users.router)
+app.include_router(metrics.router)
+app.include_router(health.router)
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime
+from datetime import datetime
+from backend.db.database import Base
+
+class EvaluationCacheEntry(Base):
+    __tablename__ = "evaluation_cache"
+
+    cache_key = Column(String(64), primary_key=True)
+    course_id = Column(Integer, index=True)
+    model_name = Column(String)
+    prompt_version = Column(String, index=True)
+    response = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, JSON
+from datetime import datetime
+from backend.db.database import Base
+
+# 작업 상태
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+class EvaluationJob(Base):
+    __tablename__ = "evaluation_jobs"
+
+    id = Column(String(32), primary_key=True)  # uuid4 hex
+    status = Column(String(16), index=True, default=JOB_QUEUED)
+    course_ids = Column(JSON)  # 평가 대상 과목 ID 리스트 (요청 순서)
+    request = Column(JSON)  # MultiEvaluateRequest 본문
+    results = Column(JSON, nullable=True)  # 과목별 결과 항목 (course_ids와 같은 순서)
+    error = Column(Text, nullable=True)
+    attempts = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    started_at = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)  # 처리 중인 워커가 주기적으로 갱신 (임대 연장)
+    finished_at = Column(DateTime, nullable=True)
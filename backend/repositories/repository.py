@@ -2,12 +2,20 @@
 Repository layer for database operations.
 Separates data access logic from route handlers.
 """
-from typing import List, Optional
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+import uuid
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from backend.models.course import Course as CourseModel
+from backend.models.evaluation_job import (
+    EvaluationJob as EvaluationJobModel,
+    JOB_QUEUED, JOB_RUNNING, JOB_SUCCEEDED, JOB_FAILED,
+)
 from backend.models.user import User as UserModel, UserCourse as UserCourseModel
 from backend.schemas.course import CourseSummary
 from backend.schemas.user import UserCreate, UserResponse, UserCourseCreate, UserCourseResponse
+from backend.schemas.evaluate_request import MultiEvaluateRequest
 
 
 class CourseRepository:
@@ -33,4 +41,134 @@ class CourseRepository:
 
     def get_course_by_id(self, course_id: int) -> Optional[CourseModel]:
         """Get a single course by ID."""
-        return self.db.query(CourseModel).filter(CourseModel.id == course_id).first()
\ No newline at end of file
+        return self.db.query(CourseModel).filter(CourseModel.id == course_id).first()
+
+    def get_courses_by_ids(self, course_ids: List[int]) -> List[CourseModel]:
+        """Get courses by ID, in the order of course_ids (missing IDs are skipped)."""
+        courses = self.db.query(CourseModel).filter(CourseModel.id.in_(course_ids)).all()
+        by_id = {course.id: course for course in courses}
+        return [by_id[course_id] for course_id in course_ids if course_id in by_id]
+
+
+class EvaluationJobRepository:
+    """Repository for persistent evaluation jobs (evaluation_jobs table)."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def create_job(self, request: MultiEvaluateRequest) -> EvaluationJobModel:
+        """Insert a new queued job for the given request."""
+        job = EvaluationJobModel(
+            id=uuid.uuid4().hex,
+            status=JOB_QUEUED,
+            course_ids=list(request.course_ids),
+            request=request.model_dump(),
+            attempts=0,
+            created_at=datetime.utcnow(),
+        )
+        self.db.add(job)
+        self.db.commit()
+        self.db.refresh(job)
+        return job
+
+    def get_job(self, job_id: str) -> Optional[EvaluationJobModel]:
+        """Get a single job by ID."""
+        return self.db.get(EvaluationJobModel, job_id)
+
+    def claim_next_job(self) -> Optional[EvaluationJobModel]:
+        """
+        Atomically take the oldest queued job and mark it running.
+        FOR UPDATE SKIP LOCKED lets several workers (and processes) claim jobs concurrently
+        without blocking on or double-claiming the same row.
+        """
+        job = (
+            self.db.query(EvaluationJobModel)
+            .filter(EvaluationJobModel.status == JOB_QUEUED)
+            .order_by(EvaluationJobModel.created_at)
+            .with_for_update(skip_locked=True)
+            .first()
+        )
+        if job is None:
+            self.db.rollback()
+            return None
+
+        now = datetime.utcnow()
+        job.status = JOB_RUNNING
+        job.started_at = now
+        job.heartbeat_at = now
+        job.attempts = (job.attempts or 0) + 1
+        self.db.commit()
+        self.db.refresh(job)
+        return job
+
+    def _lease(self, job_id: str, attempt: int):
+        """The running job row as long as it is still held by the worker that claimed the given attempt."""
+        return self.db.query(EvaluationJobModel).filter(
+            EvaluationJobModel.id == job_id,
+            EvaluationJobModel.status == JOB_RUNNING,
+            EvaluationJobModel.attempts == attempt,
+        )
+
+    def renew_lease(self, job_id: str, attempt: int) -> bool:
+        """
+        Extend the lease of a running job (heartbeat).
+        Returns False if the lease was lost (requeued after expiry and possibly claimed again by another worker).
+        """
+        updated = self._lease(job_id, attempt).update({"heartbeat_at": datetime.utcnow()}, synchronize_session=False)
+        self.db.commit()
+        return updated > 0
+
+    def finish_job(self, job_id: str, attempt: int, results: Optional[list], error: Optional[str] = None) -> bool:
+        """
+        Store results and mark a running job succeeded (or failed when error is given).
+        Returns False if the worker no longer holds the lease for this attempt (e.g. it was requeued after its lease expired).
+        """
+        updated = self._lease(job_id, attempt).update({
+            "status": JOB_FAILED if error else JOB_SUCCEEDED,
+            "results": results,
+            "error": error,
+            "finished_at": datetime.utcnow(),
+        }, synchronize_session=False)
+        self.db.commit()
+        return updated > 0
+
+    def requeue_job(self, job_id: str, attempt: int) -> bool:
+        """Put a running job back in the queue (e.g. on worker shutdown)."""
+        updated = self._lease(job_id, attempt).update(
+            {"status": JOB_QUEUED, "started_at": None, "heartbeat_at": None}, synchronize_session=False
+        )
+        self.db.commit()
+        return updated > 0
+
+    def requeue_expired_jobs(self, lease_seconds: float, max_attempts: int) -> Tuple[int, int]:
+        """
+        Recover jobs left running by a crashed or restarted process.
+        Running jobs whose last heartbeat is older than the lease are requeued, or failed once they used up max_attempts.
+
+        Returns:
+            (requeued, failed) counts
+        """
+        expired = (
+            EvaluationJobModel.status == JOB_RUNNING,
+            func.coalesce(EvaluationJobModel.heartbeat_at, EvaluationJobModel.started_at)
+            < datetime.utcnow() - timedelta(seconds=lease_seconds),
+        )
+        failed = (
+            self.db.query(EvaluationJobModel)
+            .filter(*expired, EvaluationJobModel.attempts >= max_attempts)
+            .update({
+                "status": JOB_FAILED,
+                "error": "Job did not finish within its lease after the maximum number of attempts",
+                "finished_at": datetime.utcnow(),
+            }, synchronize_session=False)
+        )
+        requeued = (
+            self.db.query(EvaluationJobModel)
+            .filter(*expired)
+            .update({"status": JOB_QUEUED, "started_at": None, "heartbeat_at": None}, synchronize_session=False)
+        )
+        self.db.commit()
+        return requeued, failed
+
+    def count_jobs(self, status: str) -> int:
+        return self.db.query(EvaluationJobModel).filter(EvaluationJobModel.status == status).count()
@@ -1,37 +1,24 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 import json
 
-from backend.db.database import get_db
+from backend.db.database import get_read_db
 from backend.schemas.evaluate_request import EvaluateRequest
 from backend.core.schema import UserProfile, CourseInfo, CourseHistory, GeminiResponse
-from backend.core.inference import return_total_result
+from backend.core.inference import return_total_result_async
 from backend.repositories.repository import CourseRepository
 
 router = APIRouter(tags=["evaluation"])
 
-@router.post("/courses/{course_id}/evaluate")
-def evaluate_course(course_id: int, request: EvaluateRequest, db: Session = Depends(get_db)):
-    """
-    Evaluates a course for a specific user profile using Gemini AI.
-    """
-
-    # 1) Load course from DB
-    repo = CourseRepository(db)
-    course = repo.get_course_by_id(course_id)
-    if course is None:
-        raise HTTPException(status_code=404, detail="Course not found")
-
-    # Convert to CourseInfo (Gemini format)
-    course_info = CourseInfo.model_validate(course)
-
-    # 2) Convert EvaluateRequest → UserProfile (Gemini format)
+def to_user_profile(request: EvaluateRequest) -> UserProfile:
+    """Convert EvaluateRequest → UserProfile (Gemini format)"""
     taken_courses = [
         CourseHistory(course_id=tc.course_id, grade=tc.grade)
         for tc in request.taken_courses
     ]
 
-    user_profile = UserProfile(
+    return UserProfile(
         taken_courses=taken_courses,
         eval_preference=request.eval_preference,
         interests=request.interests,
@@ -39,26 +26,17 @@ def evaluate_course(course_id: int, request: EvaluateRequest, db: Session = Depe
         attendence_type=request.attendence_type,
     )
 
-    # 3) Call Gemini logic
-    results = return_total_result(
-        count=1,
-        user_profile=user_profile,
-        target_courses=[course_info]
-    )
 
-    # 4) Parse the JSON response
-    if not results or len(results) == 0:
-        raise HTTPException(status_code=500, detail="Failed to get evaluation result")
-    
-    # results[0] is now a dict: {"evaluation": json_str, "recommendation": str}
-    result_item = results[0]
+def build_evaluation_response(course, result_item: dict) -> dict:
+    """
+    Parse one result item of return_total_result into the API spec format.
+    """
+    # result_item: {"course_id", "evaluation": json_str, "recommendation": str, "error", "fallback": bool}
     result_json = json.loads(result_item["evaluation"])
     evaluation_result = GeminiResponse.model_validate(result_json)
-    recommendation = result_item["recommendation"]
 
-    # 5) Return response in API spec format
     return {
-        "course_id": course.course_code or str(course_id),
+        "course_id": course.course_code or str(course.id),
         "course_name": course.course_name,
         "professor": course.professor,
         "credits": course.credits,
@@ -72,5 +50,45 @@ def evaluate_course(course_id: int, request: EvaluateRequest, db: Session = Depe
             for detail in evaluation_result.details
         ],
         "summary": evaluation_result.summary,
-        "recommendation": recommendation
-    }
\ No newline at end of file
+        "recommendation": result_item["recommendation"],
+        "fallback": result_item.get("fallback", False)
+    }
+
+
+@router.post("/courses/{course_id}/evaluate")
+async def evaluate_course(course_id: int, request: EvaluateRequest, db: Session = Depends(get_read_db)):
+    """
+    Evaluates a course for a specific user profile using Gemini AI.
+    Runs on the event loop (Gemini calls go to their own executor), so a burst of
+    evaluations does not hold the shared threadpool used by sync endpoints.
+    """
+
+    # 1) Load course from DB
+    repo = CourseRepository(db)
+    course = await run_in_threadpool(repo.get_course_by_id, course_id)
+    if course is None:
+        raise HTTPException(status_code=404, detail="Course not found")
+
+    # Convert to CourseInfo (Gemini format)
+    course_info = CourseInfo.model_validate(course)
+
+    # 2) Convert EvaluateRequest → UserProfile (Gemini format)
+    user_profile = to_user_profile(request)
+
+    # 3) Call Gemini logic
+    results = await return_total_result_async(
+        count=1,
+        user_profile=user_profile,
+        target_courses=[course_info]
+    )
+
+    # 4) Parse the JSON response
+    if not results or len(results) == 0:
+        raise HTTPException(status_code=500, detail="Failed to get evaluation result")
+    
+    result_item = results[0]
+    if result_item["error"]:
+        raise HTTPException(status_code=502, detail=f"Failed to get evaluation result: {result_item['error']}")
+
+    # 5) Return response in API spec format
+    return build_evaluation_response(course, result_item)
@@ -0,0 +1,94 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from loguru import logger
+from sqlalchemy.orm import Session
+import asyncio
+import json
+import time
+
+from backend.db.database import get_read_db
+from backend.schemas.evaluate_request import MultiEvaluateRequest
+from backend.core.context import build_profile_context
+from backend.core.schema import CourseInfo
+from backend.core.inference import iter_total_results
+from backend.repositories.repository import CourseRepository
+from backend.routers.evaluate import to_user_profile, build_evaluation_response
+
+router = APIRouter(tags=["evaluation"])
+
+
+def format_sse(event: str, data: dict) -> str:
+    """Format one Server-Sent Event frame."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.post("/courses/evaluate/stream")
+async def evaluate_courses_stream(request: MultiEvaluateRequest, db: Session = Depends(get_read_db)):
+    """
+    Evaluates several courses and streams each result as a Server-Sent Event
+    as soon as it is ready, followed by a final summary event.
+    """
+
+    # 1) Load courses from DB (before streaming, so unknown IDs are still a plain 404)
+    repo = CourseRepository(db)
+    courses = await run_in_threadpool(repo.get_courses_by_ids, request.course_ids)
+    found_ids = {course.id for course in courses}
+    missing = [course_id for course_id in request.course_ids if course_id not in found_ids]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Course not found: {missing}")
+
+    course_infos = [CourseInfo.model_validate(course) for course in courses]
+    user_profile = to_user_profile(request)
+
+    # 2) Build the profile context (embedding, kNN, taken-course lookups) before streaming starts.
+    #    It uses the request session, which get_db closes when the response ends; building it inside the
+    #    stream would leave a worker thread querying that Session after a client disconnect.
+    try:
+        context = await asyncio.to_thread(build_profile_context, user_profile)
+    except Exception as e:
+        logger.error(f"프로필 컨텍스트 생성 실패: {e}")
+        raise HTTPException(status_code=502, detail=f"Failed to get evaluation result: {e}")
+
+    async def event_stream():
+        start = time.perf_counter()
+        succeeded = failed = fallbacks = 0
+
+        async for index, result_item in iter_total_results(
+            count=len(course_infos),
+            user_profile=user_profile,
+            target_courses=course_infos,
+            context=context,
+        ):
+            course = courses[index]
+            try:
+                if result_item["error"]:
+                    raise RuntimeError(result_item["error"])
+                payload = build_evaluation_response(course, result_item)
+            except Exception as e:
+                failed += 1
+                yield format_sse("error", {
+                    "index": index,
+                    "course_id": course.course_code or str(course.id),
+                    "detail": f"Failed to get evaluation result: {e}",
+                })
+                continue
+
+            succeeded += 1
+            fallbacks += int(payload["fallback"])
+            yield format_sse("result", {"index": index, **payload})
+
+        yield format_sse("summary", {
+            "total": len(course_infos),
+            "succeeded": succeeded,
+            "failed": failed,
+            "fallback": fallbacks,
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 1),
+        })
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        # 프록시(nginx) 버퍼링을 끄고 이벤트를 즉시 전달
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,82 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from backend.db.database import get_db
+from backend.schemas.evaluate_request import MultiEvaluateRequest
+from backend.schemas.evaluation_job import EvaluationJobResponse
+from backend.core.config import settings
+from backend.core.jobs import evaluation_workers, load_job, FINISHED_STATUSES
+from backend.repositories.repository import CourseRepository
+from backend.routers.evaluate import build_evaluation_response
+
+router = APIRouter(tags=["evaluation"])
+
+
+async def build_job_response(job: dict, repo: CourseRepository) -> EvaluationJobResponse:
+    """Convert a job snapshot into the API response, formatting per-course results when present."""
+    results = None
+    if job["results"] is not None:
+        courses = await run_in_threadpool(repo.get_courses_by_ids, job["course_ids"])
+        courses_by_id = {course.id: course for course in courses}
+        results = []
+        for item in job["results"]:
+            course = courses_by_id.get(item["course_id"])
+            if course is None or item["error"]:
+                results.append({
+                    "course_id": course.course_code if course is not None and course.course_code else str(item["course_id"]),
+                    "error": item["error"] or "Course not found",
+                })
+                continue
+            results.append(build_evaluation_response(course, item))
+
+    return EvaluationJobResponse(
+        job_id=job["id"],
+        status=job["status"],
+        course_ids=job["course_ids"],
+        attempts=job["attempts"] or 0,
+        created_at=job["created_at"],
+        started_at=job["started_at"],
+        finished_at=job["finished_at"],
+        results=results,
+        error=job["error"],
+    )
+
+
+@router.post("/evaluations", response_model=EvaluationJobResponse, status_code=202)
+async def create_evaluation(
+    request: MultiEvaluateRequest,
+    response: Response,
+    wait: float = Query(0, ge=0, description="Seconds to wait for the job to finish before returning (capped by EVAL_JOB_MAX_WAIT_SECONDS)"),
+    db: Session = Depends(get_db),
+):
+    """
+    Enqueues an evaluation job and returns its ID (202 Accepted).
+    With ?wait=N the request blocks up to N seconds and returns the finished job (200 OK) if it completes in time.
+    """
+    repo = CourseRepository(db)
+    courses = await run_in_threadpool(repo.get_courses_by_ids, request.course_ids)
+    found_ids = {course.id for course in courses}
+    missing = [course_id for course_id in request.course_ids if course_id not in found_ids]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Course not found: {missing}")
+
+    job = await evaluation_workers.enqueue(request)
+    if wait > 0:
+        job = await evaluation_workers.wait(job["id"], min(wait, settings.EVAL_JOB_MAX_WAIT_SECONDS)) or job
+
+    response.headers["Location"] = f"/evaluations/{job['id']}"
+    if job["status"] in FINISHED_STATUSES:
+        response.status_code = 200
+    return await build_job_response(job, repo)
+
+
+@router.get("/evaluations/{job_id}", response_model=EvaluationJobResponse)
+async def read_evaluation(job_id: str, db: Session = Depends(get_db)):
+    """
+    Returns the status of an evaluation job, and its results once finished.
+    """
+    job = await run_in_threadpool(load_job, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Evaluation job not found")
+    return await build_job_response(job, CourseRepository(db))
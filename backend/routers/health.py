@@ -0,0 +1,23 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from backend.core.encoder import embedder_ready, embedder_status
+
+router = APIRouter(tags=["health"])
+
+@router.get("/health/live")
+def liveness():
+    """
+    Liveness probe: the process is up and serving requests.
+    """
+    return {"status": "ok"}
+
+@router.get("/health/ready")
+def readiness():
+    """
+    Readiness probe: 200 once the embedding model is loaded and warmed up, 503 before that
+    (or if loading failed), so a load balancer does not route evaluations to a cold worker.
+    """
+    status = embedder_status()
+    body = {"status": "ready" if embedder_ready() else "not_ready", "embedder": status}
+    return JSONResponse(status_code=200 if embedder_ready() else 503, content=body)
@@ -0,0 +1,20 @@
+from fastapi import APIRouter
+
+from backend.core import metrics
+from backend.core.cache import evaluation_cache
+from backend.core.encoder import embedding_cache
+from backend.db.database import pool_stats
+
+router = APIRouter(tags=["metrics"])
+
+@router.get("/metrics")
+def read_metrics():
+    """
+    Returns in-process metrics (counters, gauges, histograms) of this worker.
+    """
+    return {
+        "metrics": metrics.snapshot(),
+        "evaluation_cache": evaluation_cache.stats(),
+        "embedding_cache": embedding_cache.stats() if embedding_cache is not None else None,
+        "db_pool": pool_stats(),
+    }
@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 from typing import List
 
 from backend.db.database import get_db
+from backend.core.vector_index import user_vector_index
 from backend.models.user import User as UserModel, UserCourse as UserCourseModel
 from backend.schemas.user import UserCreate, UserResponse, UserCourseCreate, UserCourseResponse
 
@@ -24,6 +25,8 @@ def create_user(user: UserCreate, db: Session = Depends(get_db)):
     db.add(new_user)
     db.commit()
     db.refresh(new_user)
+    # 메모리 벡터 인덱스를 쓰는 경우 새 임베딩을 바로 검색 대상에 포함
+    user_vector_index.sync_user(new_user)
     return new_user
 
 @router.get("/users/{student_id}", response_model=UserResponse)
@@ -14,3 +14,6 @@ class EvaluateRequest(BaseModel):
     team_preference: int = Field(default=3, description="Team project preference (1: strongly dislike ~ 5: strongly like)")
     attendence_type: List[str] = Field(default_factory=list, description="Preferred attendance methods (e.g., ['online', 'offline', 'hybrid'])")
 
+
+class MultiEvaluateRequest(EvaluateRequest):
+    course_ids: List[int] = Field(..., min_length=1, description="IDs of the courses to evaluate (integer primary keys)")
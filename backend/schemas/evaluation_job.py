@@ -0,0 +1,19 @@
+from datetime import datetime
+from typing import List, Optional
+from pydantic import BaseModel, Field
+
+
+class EvaluationJobResponse(BaseModel):
+    job_id: str = Field(description="Job ID")
+    status: str = Field(description="queued | running | succeeded | failed")
+    course_ids: List[int] = Field(description="IDs of the courses to evaluate, in request order")
+    attempts: int = Field(default=0, description="Number of times a worker picked up this job")
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    results: Optional[List[dict]] = Field(
+        default=None,
+        description="Per-course results in course_ids order (same body as POST /courses/{course_id}/evaluate, "
+                    "or {course_id, error} for a course that failed). Present once the job has finished.",
+    )
+    error: Optional[str] = Field(default=None, description="Error message when the whole job failed")
@@ -0,0 +1,166 @@
+"""
+Embedding Backend Benchmark
+
+PyTorch(SentenceTransformer)와 ONNX Runtime(int8 동적 양자화) 임베딩 백엔드를 같은 입력으로 비교합니다.
+
+보고 항목:
+- 정확도: 같은 텍스트에 대한 두 백엔드 임베딩의 코사인 유사도 (평균/최소/p1)
+- kNN 일치도: 각 텍스트의 top-k 이웃 집합이 PyTorch 기준과 겹치는 비율
+- 처리량: 배치 크기별 texts/s
+
+임베딩 모델(./model/)을 찾을 수 있도록 backend 디렉터리에서 실행합니다.
+"""
+
+from typing import Callable, Dict, List
+from loguru import logger
+import argparse
+import json
+import random
+import sys
+import os
+import time
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import numpy as np
+
+from backend.core.config import settings
+from backend.core.encoder import LOCAL_MODEL_PATH
+from backend.core.onnx_encoder import export_onnx, OnnxEncoder, ONNX_FILE, QUANTIZED_ONNX_FILE
+
+INTERESTS = ["인공지능", "데이터베이스", "웹 개발", "보안", "네트워크", "그래픽스", "로보틱스", "경영", "통계", "디자인"]
+COURSES = ["자료구조", "알고리즘", "운영체제", "컴퓨터네트워크", "데이터베이스", "기계학습", "선형대수", "확률과통계", "컴파일러", "웹프로그래밍"]
+ATTENDANCE_TYPES = ["대면", "비대면", "녹화 강의", "실시간 온라인"]
+
+
+def build_texts(count: int, seed: int) -> List[str]:
+    """
+    seed_user_vectors.py의 프로필 텍스트와 비슷한 형식의 입력을 길이를 섞어서 생성합니다.
+    """
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(count):
+        taken = rng.sample(COURSES, k=rng.randint(0, len(COURSES)))
+        courses_text = ", ".join(f"{name}: {rng.choice([2.5, 3.0, 3.5, 4.0, 4.5]):.1f}" for name in taken) or "없음"
+        texts.append(
+            f"평가 방식 선호도: {rng.randint(1, 5)} (1:시험선호, 5:과제선호), "
+            f"관심 분야: {', '.join(rng.sample(INTERESTS, k=rng.randint(1, 3)))}, "
+            f"팀 프로젝트 선호도: {rng.randint(1, 5)} (1:매우싫음, 5:매우좋음), "
+            f"선호 출석 방식: {', '.join(rng.sample(ATTENDANCE_TYPES, k=rng.randint(1, 2)))}, "
+            f"수강 과목: {courses_text}"
+        )
+    return texts
+
+
+def throughput(encode: Callable[[List[str], int], np.ndarray], texts: List[str], batch_size: int, repeat: int) -> float:
+    """texts 전체를 batch_size 단위로 repeat번 인코딩한 처리량 (texts/s). 첫 배치로 워밍업"""
+    encode(texts[:batch_size], batch_size)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        encode(texts, batch_size)
+    return len(texts) * repeat / (time.perf_counter() - start)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+
+
+def accuracy(reference: np.ndarray, candidate: np.ndarray, k: int) -> Dict[str, float]:
+    """행별 코사인 유사도와, 코사인 기준 top-k 이웃 집합의 평균 일치율"""
+    ref, cand = _normalize(reference), _normalize(candidate)
+    cosine = (ref * cand).sum(axis=1)
+
+    k = min(k, len(ref) - 1)
+    overlap = None
+    if k > 0:
+        ref_sim, cand_sim = ref @ ref.T, cand @ cand.T
+        np.fill_diagonal(ref_sim, -np.inf)
+        np.fill_diagonal(cand_sim, -np.inf)
+        ref_top = np.argpartition(-ref_sim, k - 1, axis=1)[:, :k]
+        cand_top = np.argpartition(-cand_sim, k - 1, axis=1)[:, :k]
+        overlap = float(np.mean([len(set(a) & set(b)) / k for a, b in zip(ref_top, cand_top)]))
+
+    return {
+        "cosine_mean": float(cosine.mean()),
+        "cosine_min": float(cosine.min()),
+        "cosine_p1": float(np.percentile(cosine, 1)),
+        f"top{k}_overlap": overlap,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare PyTorch and ONNX Runtime embedding backends (accuracy + throughput)",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  cd backend
+  python scripts/benchmark_encoder.py
+  python scripts/benchmark_encoder.py --texts 1000 --batch-sizes 1 8 32 --threads 4
+  python scripts/benchmark_encoder.py --export --no-quantize --output onnx_fp32.json
+        """
+    )
+    parser.add_argument("--texts", type=int, default=256, help="비교에 사용할 텍스트 수 (default: 256)")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32], help="처리량을 잴 배치 크기 (default: 1 8 32)")
+    parser.add_argument("--repeat", type=int, default=2, help="배치 크기별 반복 횟수 (default: 2)")
+    parser.add_argument("--threads", type=int, default=settings.EMBEDDING_INTRA_OP_THREADS,
+                        help="두 백엔드의 intra-op 스레드 수 (0: 라이브러리 기본값)")
+    parser.add_argument("--onnx-dir", default=settings.EMBEDDING_ONNX_DIR, help=f"ONNX 파일 디렉터리 (default: {settings.EMBEDDING_ONNX_DIR})")
+    parser.add_argument("--no-quantize", action="store_true", help="int8 양자화 없이 fp32 ONNX 모델을 비교")
+    parser.add_argument("--export", action="store_true", help="이미 내보낸 파일이 있어도 다시 내보내기")
+    parser.add_argument("--top-k", type=int, default=10, help="kNN 일치도를 잴 이웃 수 (default: 10)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="결과를 JSON 파일로 저장")
+    args = parser.parse_args()
+
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    quantize = not args.no_quantize
+    onnx_path = os.path.join(args.onnx_dir, QUANTIZED_ONNX_FILE if quantize else ONNX_FILE)
+    if args.export or not os.path.exists(onnx_path):
+        onnx_path = export_onnx(LOCAL_MODEL_PATH, args.onnx_dir, quantize=quantize)
+
+    if args.threads > 0:
+        torch.set_num_threads(args.threads)
+    torch_model = SentenceTransformer(LOCAL_MODEL_PATH)
+    onnx_model = OnnxEncoder(LOCAL_MODEL_PATH, onnx_path, intra_op_threads=args.threads)
+
+    backends = {
+        "torch": lambda texts, batch_size: torch_model.encode(texts, batch_size=batch_size, convert_to_tensor=False),
+        "onnx": lambda texts, batch_size: onnx_model.encode(texts, batch_size=batch_size),
+    }
+
+    texts = build_texts(args.texts, args.seed)
+    logger.info(f"텍스트 {len(texts)}건으로 비교: ONNX={onnx_path}, 스레드={args.threads or '기본값'}")
+
+    reference = backends["torch"](texts, 32)
+    candidate = backends["onnx"](texts, 32)
+    report = {
+        "onnx_path": onnx_path,
+        "quantized": quantize,
+        "accuracy": accuracy(reference, candidate, args.top_k),
+        "throughput_texts_per_s": {
+            name: {batch_size: throughput(encode, texts, batch_size, args.repeat) for batch_size in args.batch_sizes}
+            for name, encode in backends.items()
+        },
+    }
+
+    print("=" * 72)
+    print(f"정확도 (torch 기준): {report['accuracy']}")
+    print(f"{'batch':>8}{'torch':>14}{'onnx':>14}{'speedup':>10}")
+    for batch_size in args.batch_sizes:
+        torch_tps = report["throughput_texts_per_s"]["torch"][batch_size]
+        onnx_tps = report["throughput_texts_per_s"]["onnx"][batch_size]
+        print(f"{batch_size:>8}{torch_tps:>14.1f}{onnx_tps:>14.1f}{onnx_tps / torch_tps:>9.2f}x")
+    print("=" * 72)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        logger.info(f"결과 저장: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Vector Index Builder
+
+users.embedding 벡터 인덱스(전체 + 전공별 부분 인덱스)를 CREATE INDEX CONCURRENTLY로 만들거나 다시 만듭니다.
+쓰기를 막지 않으므로 서비스 중에도 실행할 수 있습니다.
+
+- VECTOR_INDEX_TYPE=ivfflat: 기동 시에는 인덱스를 만들지 않으므로 사용자 임베딩 적재(seed_user_vectors.py) 후 실행합니다.
+  lists는 현재 행 수로 정해지며, 이후 행 수가 늘어 적정 lists가 --growth-factor배 이상이 되면 다시 실행 시 재구성합니다.
+- VECTOR_INDEX_TYPE=hnsw: 없거나 무효(CONCURRENTLY 생성 실패)인 인덱스, 방식이 바뀐 인덱스만 다시 만듭니다.
+"""
+
+import argparse
+import sys
+import os
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.core.config import settings
+from backend.db.database import engine
+from backend.db.migrations import rebuild_vector_indexes
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Build or rebuild the users.embedding vector indexes concurrently",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python backend/scripts/seed_user_vectors.py
+  VECTOR_INDEX_TYPE=ivfflat python backend/scripts/build_vector_index.py
+  python backend/scripts/build_vector_index.py --force
+        """
+    )
+    parser.add_argument("--growth-factor", type=float, default=2.0,
+                        help="IVFFlat: 적정 lists가 기존 값의 이 배수 이상이면 재구성 (default: 2.0)")
+    parser.add_argument("--force", action="store_true", help="조건과 관계없이 모든 벡터 인덱스를 다시 만듦")
+    args = parser.parse_args()
+
+    rebuilt = rebuild_vector_indexes(
+        engine, settings.VECTOR_PARTIAL_INDEX_MIN_ROWS, growth_factor=args.growth_factor, force=args.force
+    )
+    print(f"Rebuilt {len(rebuilt)} vector index(es): {', '.join(rebuilt) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
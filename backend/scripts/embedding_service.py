@@ -0,0 +1,53 @@
+"""
+Embedding Service Launcher
+
+임베딩 모델을 소유한 워커 프로세스 풀을 띄웁니다. API 서버는 EMBEDDING_SERVICE_ADDRESS를
+같은 주소로 설정하면 인코딩을 이 서비스에 맡기고, 서비스에 연결할 수 없으면 프로세스 내 인코딩으로 폴백합니다.
+
+임베딩 모델(./model/)을 찾을 수 있도록 backend 디렉터리에서 실행합니다.
+"""
+
+import argparse
+import sys
+import os
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.core.config import settings
+from backend.core.embedding_service import serve
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run the out-of-process embedding worker pool",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  cd backend
+  export EMBEDDING_SERVICE_AUTHKEY=$(python -c "import secrets; print(secrets.token_hex(32))")
+  python scripts/embedding_service.py --address 127.0.0.1:8790 --workers 2
+  python scripts/embedding_service.py --address /tmp/embedding.sock --workers 1 --threads 4
+
+  # API 서버 쪽 (같은 EMBEDDING_SERVICE_AUTHKEY 사용)
+  EMBEDDING_SERVICE_ADDRESS=127.0.0.1:8790 python -m uvicorn backend.main:app
+        """
+    )
+    parser.add_argument("--address", default=settings.EMBEDDING_SERVICE_ADDRESS or "127.0.0.1:8790",
+                        help="'host:port' 또는 Unix 소켓 경로 (default: EMBEDDING_SERVICE_ADDRESS 또는 127.0.0.1:8790)")
+    parser.add_argument("--workers", type=int, default=settings.EMBEDDING_SERVICE_WORKERS,
+                        help=f"모델을 소유할 워커 프로세스 수 (default: {settings.EMBEDDING_SERVICE_WORKERS})")
+    parser.add_argument("--threads", type=int, default=None, help="워커당 intra-op 스레드 수 (default: CPU 코어 수 / workers)")
+    args = parser.parse_args()
+
+    if not settings.EMBEDDING_SERVICE_AUTHKEY:
+        parser.error("EMBEDDING_SERVICE_AUTHKEY 환경 변수를 설정해야 합니다 (API 서버와 같은 값).")
+
+    serve(
+        args.address, settings.EMBEDDING_SERVICE_AUTHKEY, workers=args.workers, threads=args.threads,
+        handshake_timeout=settings.EMBEDDING_SERVICE_TIMEOUT,
+    )
+
+
+if __name__ == "__main__":
+    main()
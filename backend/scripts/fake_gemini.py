@@ -0,0 +1,108 @@
+"""
+Fake Gemini client for local load testing
+
+inference.client 자리에 끼워 넣어 실제 Gemini 할당량을 쓰지 않고 평가 경로를 구동합니다.
+지연 시간 분포(평균 + 로그정규 지터), 일반 오류율(5xx), 스로틀링 비율(429)을 주입할 수 있습니다.
+응답은 요청 프롬프트의 '과목 ID'를 읽어 GeminiResponse(또는 배치 시 List[GeminiResponse]) 형식으로 만듭니다.
+"""
+from threading import Lock
+from typing import Optional
+import json
+import math
+import random
+import re
+import time
+import zlib
+
+from google.genai import errors
+
+COURSE_ID_PATTERN = re.compile(r"과목 ID: (\d+)")
+CRITERIA = ["평가 방식 적합도", "관심 분야 적합도", "팀 프로젝트 적합도", "출석 방식 적합도", "선수 지식 적합도"]
+
+
+class FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeModels:
+    """
+    :param latency_ms: 평균 응답 지연 (ms)
+    :param jitter: 로그정규 분포의 sigma. 0이면 고정 지연
+    :param error_rate: 503 오류를 반환할 확률
+    :param throttle_rate: 429 오류를 반환할 확률
+    :param seed: 난수 시드 (재현 가능한 부하 테스트용)
+    """
+
+    def __init__(
+        self,
+        latency_ms: float = 800.0,
+        jitter: float = 0.3,
+        error_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        seed: Optional[int] = None,
+    ):
+        self.latency_ms = latency_ms
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self._random = random.Random(seed)
+        self._lock = Lock()
+
+        self.calls = 0
+        self.errors = 0
+        self.throttled = 0
+
+    def _sample(self) -> tuple:
+        with self._lock:
+            self.calls += 1
+            if self.jitter > 0:
+                # 평균이 latency_ms가 되도록 mu 보정
+                mu = math.log(max(self.latency_ms, 1e-3)) - self.jitter ** 2 / 2
+                delay_ms = self._random.lognormvariate(mu, self.jitter)
+            else:
+                delay_ms = self.latency_ms
+            roll = self._random.random()
+        return delay_ms / 1000, roll
+
+    def generate_content(self, model: str, contents: str, config=None) -> FakeResponse:
+        delay, roll = self._sample()
+        time.sleep(delay)
+
+        if roll < self.throttle_rate:
+            with self._lock:
+                self.throttled += 1
+            raise errors.ClientError(429, {"error": {"code": 429, "message": "Resource exhausted (fake)", "status": "RESOURCE_EXHAUSTED"}})
+        if roll < self.throttle_rate + self.error_rate:
+            with self._lock:
+                self.errors += 1
+            raise errors.ServerError(503, {"error": {"code": 503, "message": "Service unavailable (fake)", "status": "UNAVAILABLE"}})
+
+        course_ids = [int(cid) for cid in COURSE_ID_PATTERN.findall(contents)] or [0]
+        items = [self._evaluation(course_id, contents) for course_id in course_ids]
+
+        schema = getattr(config, "response_schema", None)
+        if getattr(schema, "__origin__", None) is list:
+            return FakeResponse(json.dumps(items, ensure_ascii=False))
+        return FakeResponse(json.dumps(items[0], ensure_ascii=False))
+
+    @staticmethod
+    def _evaluation(course_id: int, contents: str) -> dict:
+        # 같은 프롬프트에는 같은 점수 (캐시/single-flight 동작 확인이 쉽도록)
+        seed = zlib.crc32(f"{course_id}:{contents}".encode("utf-8"))
+        rng = random.Random(seed)
+        return {
+            "course_id": course_id,
+            "details": [
+                {"criteria": criteria, "score": rng.randint(1, 5), "reason": f"{criteria}에 대한 가짜 평가입니다."}
+                for criteria in CRITERIA
+            ],
+            "summary": "부하 테스트용 가짜 평가 결과입니다.",
+        }
+
+
+class FakeGeminiClient:
+    """genai.Client와 같은 모양 (client.models.generate_content)"""
+
+    def __init__(self, **kwargs):
+        self.models = FakeModels(**kwargs)
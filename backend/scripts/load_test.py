@@ -0,0 +1,280 @@
+"""
+Load Test Harness for the Evaluate Path
+
+FastAPI 앱을 로컬(시드된 Postgres + pgvector)에 띄우고, inference.client를
+FakeGeminiClient로 교체한 뒤 N명의 가상 사용자가 POST /courses/{id}/evaluate를 동시에 호출합니다.
+
+보고 항목:
+- 클라이언트 측 지연 시간 p50/p95/p99, 처리량(req/s), 상태 코드 분포
+- 서버 측 단계별 소요 시간 (/metrics의 stage.* 히스토그램)
+- 가짜 Gemini 호출/오류/스로틀링 수, 평가 캐시/single-flight 카운터
+
+사전 준비: DATABASE_URL이 시드된 DB를 가리키고(import_courses.py, import_dummy_data.py,
+seed_user_vectors.py), 임베딩 모델(./model/)을 찾을 수 있도록 backend 디렉터리에서 실행합니다.
+"""
+
+from typing import Dict, List, Optional
+from loguru import logger
+import argparse
+import asyncio
+import json
+import math
+import random
+import sys
+import os
+import threading
+import time
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import httpx
+import uvicorn
+
+from backend.scripts.fake_gemini import FakeGeminiClient
+
+INTERESTS = ["인공지능", "데이터베이스", "웹 개발", "보안", "네트워크", "그래픽스", "로보틱스", "경영", "통계", "디자인"]
+ATTENDANCE_TYPES = ["대면", "비대면", "녹화 강의", "실시간 온라인"]
+GRADES = ["A+", "A0", "B+", "B0", "C+"]
+
+
+def build_profiles(count: int, course_ids: List[int], seed: int) -> List[dict]:
+    """
+    가상 사용자 요청 본문(EvaluateRequest) 풀을 생성합니다.
+    풀이 작을수록 같은 프로필이 반복되어 평가 캐시/single-flight 적중이 늘어납니다.
+    """
+    rng = random.Random(seed)
+    profiles = []
+    for _ in range(count):
+        taken = rng.sample(course_ids, k=min(len(course_ids), rng.randint(0, 5)))
+        profiles.append({
+            "taken_courses": [{"course_id": cid, "grade": rng.choice(GRADES)} for cid in taken],
+            "eval_preference": rng.randint(1, 5),
+            "interests": rng.sample(INTERESTS, k=rng.randint(1, 3)),
+            "team_preference": rng.randint(1, 5),
+            "attendence_type": rng.sample(ATTENDANCE_TYPES, k=rng.randint(1, 2)),
+        })
+    return profiles
+
+
+def load_course_ids(limit: int) -> List[int]:
+    from backend.db.database import SessionLocal
+    from backend.models.course import Course
+
+    db = SessionLocal()
+    try:
+        return [row[0] for row in db.query(Course.id).order_by(Course.id).limit(limit).all()]
+    finally:
+        db.close()
+
+
+def start_server(host: str, port: int) -> uvicorn.Server:
+    """uvicorn을 백그라운드 스레드에서 실행하고 기동될 때까지 대기"""
+    from backend.main import app
+
+    config = uvicorn.Config(app, host=host, port=port, log_level="warning", access_log=False)
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, name="load-test-server", daemon=True)
+    thread.start()
+
+    deadline = time.monotonic() + 60
+    while not server.started:
+        if not thread.is_alive() or time.monotonic() > deadline:
+            raise RuntimeError("API 서버 기동 실패")
+        time.sleep(0.1)
+    return server
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """정렬된 값에서 최근접 순위(nearest-rank) 분위수"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(q * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def virtual_user(
+    client: httpx.AsyncClient,
+    profiles: List[dict],
+    course_ids: List[int],
+    requests_per_user: int,
+    stop_at: Optional[float],
+    rng: random.Random,
+    samples: List[dict],
+) -> None:
+    sent = 0
+    while sent < requests_per_user or stop_at is not None:
+        if stop_at is not None and time.monotonic() >= stop_at:
+            break
+        course_id = rng.choice(course_ids)
+        body = rng.choice(profiles)
+
+        start = time.perf_counter()
+        try:
+            response = await client.post(f"/courses/{course_id}/evaluate", json=body)
+            status = response.status_code
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        samples.append({"latency_ms": (time.perf_counter() - start) * 1000, "status": status})
+        sent += 1
+
+
+async def run_load(args, base_url: str, profiles: List[dict], course_ids: List[int]) -> dict:
+    samples: List[dict] = []
+    stop_at = time.monotonic() + args.duration if args.duration else None
+    limits = httpx.Limits(max_connections=args.users, max_keepalive_connections=args.users)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            virtual_user(client, profiles, course_ids, args.requests, stop_at, random.Random(args.seed + i), samples)
+            for i in range(args.users)
+        ))
+        elapsed = time.perf_counter() - start
+        server_metrics = (await client.get("/metrics")).json()
+
+    return {"samples": samples, "elapsed": elapsed, "server_metrics": server_metrics}
+
+
+def summarize(result: dict, fake_client: FakeGeminiClient) -> Dict:
+    samples = result["samples"]
+    elapsed = result["elapsed"]
+    latencies = [s["latency_ms"] for s in samples if s["status"] == 200]
+
+    status_counts: Dict[str, int] = {}
+    for s in samples:
+        status_counts[str(s["status"])] = status_counts.get(str(s["status"]), 0) + 1
+
+    metrics = result["server_metrics"].get("metrics", {})
+    stages = {
+        name: {key: metric.get(key) for key in ("count", "avg", "p50", "p95", "p99", "max")}
+        for name, metric in metrics.items()
+        if name.startswith(("stage.", "batcher.")) or name == "gemini.limiter_wait_ms"
+    }
+    counters = {
+        name: metric["value"]
+        for name, metric in metrics.items()
+        if metric.get("type") == "counter"
+    }
+
+    return {
+        "requests": len(samples),
+        "succeeded": len(latencies),
+        "elapsed_seconds": elapsed,
+        "throughput_rps": len(samples) / elapsed if elapsed else None,
+        "latency_ms": {
+            "p50": percentile(latencies, 0.50),
+            "p95": percentile(latencies, 0.95),
+            "p99": percentile(latencies, 0.99),
+            "max": max(latencies) if latencies else None,
+            "mean": sum(latencies) / len(latencies) if latencies else None,
+        },
+        "status_counts": status_counts,
+        "stages_ms": stages,
+        "counters": counters,
+        "fake_gemini": {
+            "calls": fake_client.models.calls,
+            "errors": fake_client.models.errors,
+            "throttled": fake_client.models.throttled,
+        },
+        "evaluation_cache": result["server_metrics"].get("evaluation_cache"),
+    }
+
+
+def _fmt(value) -> str:
+    return "-" if value is None else f"{value:.1f}"
+
+
+def print_report(report: dict) -> None:
+    latency = report["latency_ms"]
+    print("=" * 72)
+    print(f"요청 {report['requests']}건 (성공 {report['succeeded']}건), 소요 {report['elapsed_seconds']:.2f}s, "
+          f"처리량 {_fmt(report['throughput_rps'])} req/s")
+    print(f"지연 시간(ms): p50={_fmt(latency['p50'])} p95={_fmt(latency['p95'])} "
+          f"p99={_fmt(latency['p99'])} max={_fmt(latency['max'])} mean={_fmt(latency['mean'])}")
+    print(f"상태 코드: {report['status_counts']}")
+    print("-" * 72)
+    print(f"{'stage':<32}{'count':>8}{'avg':>9}{'p50':>9}{'p95':>9}{'p99':>9}")
+    for name, stage in sorted(report["stages_ms"].items()):
+        print(f"{name:<32}{stage['count'] or 0:>8}{_fmt(stage['avg']):>9}{_fmt(stage['p50']):>9}"
+              f"{_fmt(stage['p95']):>9}{_fmt(stage['p99']):>9}")
+    print("-" * 72)
+    print(f"가짜 Gemini: {report['fake_gemini']}")
+    print(f"평가 캐시: {report['evaluation_cache']}")
+    for name, value in sorted(report["counters"].items()):
+        print(f"  {name}: {value}")
+    print("=" * 72)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Load test POST /courses/{id}/evaluate against a fake Gemini backend",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  cd backend
+  python scripts/load_test.py --users 20 --requests 10
+  python scripts/load_test.py --users 50 --duration 60 --latency-ms 1500 --error-rate 0.02
+  python scripts/load_test.py --profiles 5 --throttle-rate 0.05 --output baseline.json
+        """
+    )
+    parser.add_argument("--users", type=int, default=10, help="동시 가상 사용자 수 (default: 10)")
+    parser.add_argument("--requests", type=int, default=10, help="가상 사용자당 요청 수 (default: 10)")
+    parser.add_argument("--duration", type=float, default=None, help="지정 시 요청 수 대신 이 시간(초) 동안 부하 유지")
+    parser.add_argument("--profiles", type=int, default=100, help="요청 프로필 풀 크기. 작을수록 캐시 적중 증가 (default: 100)")
+    parser.add_argument("--courses", type=int, default=20, help="평가 대상으로 사용할 과목 수 (default: 20)")
+    parser.add_argument("--latency-ms", type=float, default=800.0, help="가짜 Gemini 평균 지연 (default: 800)")
+    parser.add_argument("--jitter", type=float, default=0.3, help="지연 로그정규 sigma, 0이면 고정 (default: 0.3)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="503 오류 확률 (default: 0)")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="429 오류 확률 (default: 0)")
+    parser.add_argument("--no-cache", action="store_true", help="평가 캐시 비활성화")
+    parser.add_argument("--timeout", type=float, default=120.0, help="요청 타임아웃(초) (default: 120)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="결과를 JSON 파일로 저장 (기준선 비교용)")
+    args = parser.parse_args()
+
+    from backend.core import inference
+    from backend.core.config import settings
+
+    if args.no_cache:
+        settings.EVAL_CACHE_ENABLED = False
+
+    fake_client = FakeGeminiClient(
+        latency_ms=args.latency_ms,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        seed=args.seed,
+    )
+    inference.client = fake_client
+
+    course_ids = load_course_ids(args.courses)
+    if not course_ids:
+        logger.error("courses 테이블이 비어 있습니다. import_courses.py로 먼저 시드하세요.")
+        sys.exit(1)
+    profiles = build_profiles(args.profiles, course_ids, args.seed)
+
+    logger.info(f"API 서버 기동: http://{args.host}:{args.port}")
+    server = start_server(args.host, args.port)
+    try:
+        logger.info(f"부하 시작: 가상 사용자 {args.users}명, "
+                    + (f"{args.duration}초" if args.duration else f"사용자당 {args.requests}건"))
+        result = asyncio.run(run_load(args, f"http://{args.host}:{args.port}", profiles, course_ids))
+    finally:
+        server.should_exit = True
+
+    report = summarize(result, fake_client)
+    report["config"] = vars(args)
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        logger.info(f"결과 저장: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -17,7 +17,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspa
 
 from backend.db.database import SessionLocal
 from backend.models.user import User, UserCourse
-from backend.core.encoder import generate_embeddings
+from backend.core.encoder import generate_embeddings_array
 
 
 def create_user_profile_text(user: User, courses: List[UserCourse]) -> str:
@@ -105,7 +105,8 @@ def seed_user_vectors(batch_size: int = 10, user_limit: int = None):
             try:
                 # Generate embeddings for the batch
                 logger.debug(f"Generating embeddings for batch {batch_num}...")
-                embeddings = generate_embeddings(profile_texts, batch_size=len(profile_texts))
+                # (batch, 768) float32 행렬. 각 행을 그대로 pgvector 컬럼에 대입 (파이썬 float 리스트 변환 없음)
+                embeddings = generate_embeddings_array(profile_texts, batch_size=len(profile_texts))
                 
                 if len(embeddings) != len(batch):
                     logger.error(f"Embedding count mismatch: expected {len(batch)}, got {len(embeddings)}")
@@ -2,14 +2,16 @@ print("Starting test script...")
 
 import sys
 import os
-from unittest.mock import MagicMock, patch
+import json
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
 from sqlalchemy.orm import Session
 
 # Add backend to sys.path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from backend.routers.evaluate import evaluate_course
-from backend.schemas.student_form import StudentForm
+from backend.schemas.evaluate_request import EvaluateRequest
 
 def test_evaluate_course_integration():
     # Mock Database Session
@@ -50,49 +52,47 @@ def test_evaluate_course_integration():
     # We need to mock the chain: db.query().filter().first()
     mock_db.query.return_value.filter.return_value.first.return_value = mock_course
     
-    # Create a dummy StudentForm
-    form_data = {
-        "사전지식": {
-            "completed_subjects": [{"id": "PRE101", "grade": "A"}]
-        },
-        "평가방식": {
-            "exam_vs_assignment": 3
-        },
-        "적성": {
-            "preferred_fields": ["AI"]
-        },
-        "협력 정도": {
-            "team_project_tolerance": 4
-        },
-        "수업 출석 방식": {
-            "attendance_method_preference": ["Online"]
-        },
-        "선택한 과목": [1]
-    }
-    form = StudentForm(**form_data)
+    # Create a dummy EvaluateRequest
+    request = EvaluateRequest(
+        taken_courses=[{"course_id": 2, "grade": "A"}],
+        eval_preference=3,
+        interests=["AI"],
+        team_preference=4,
+        attendence_type=["Online"],
+    )
     
-    # Mock return_total_result response
-    mock_results = ['{"course_id": "TEST101", "summary": "Good"}']
+    # Mock return_total_result response (one result item per target course)
+    evaluation = {
+        "course_id": 1,
+        "details": [{"criteria": "관심 분야 적합도", "score": 4, "reason": "Good"}],
+        "summary": "Good",
+    }
+    mock_results = [{
+        "course_id": 1,
+        "evaluation": json.dumps(evaluation),
+        "recommendation": "PRE101",
+        "error": None,
+    }]
     
-    # Patch return_total_result in backend.routers.evaluate
-    with patch('backend.routers.evaluate.return_total_result') as mock_inference:
+    # Patch return_total_result_async in backend.routers.evaluate
+    with patch('backend.routers.evaluate.return_total_result_async', new_callable=AsyncMock) as mock_inference:
         mock_inference.return_value = mock_results
         
-        # Call the function
-        response = evaluate_course(course_id=1, form=form, db=mock_db)
+        # Call the (async) route function
+        response = asyncio.run(evaluate_course(course_id=1, request=request, db=mock_db))
         
         # Verify results
         print("Successfully called evaluate_course!")
         print(f"Response: {response}")
         
-        assert response["course_id"] == 1
-        assert response["evaluation"] == mock_results
+        assert response["course_id"] == "TEST101"
+        assert response["summary"] == "Good"
+        assert response["details"][0]["score"] == 4
+        assert response["recommendation"] == "PRE101"
         
-        # Verify return_total_result was called with correct arguments
+        # Verify return_total_result_async was called with correct arguments
+        # return_total_result_async(count=1, user_profile=..., target_courses=...)
         args, kwargs = mock_inference.call_args
-        # args[0] is count, args[1] is user_profile, args[2] is target_courses (or kwargs)
-        # Check kwargs if used, or args position
-        # return_total_result(count=1, user_profile=..., target_courses=...)
         
         call_kwargs = kwargs
         assert call_kwargs['count'] == 1
@@ -0,0 +1,123 @@
+"""
+Parity test: in-process NumPy vector index vs. pgvector kNN.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pytest
+from sqlalchemy import text
+
+from backend.db.database import SessionLocal
+from backend.models.user import User as UserModel
+from backend.core.vector_index import VectorIndex
+
+
+def database_reachable() -> bool:
+    """DATABASE_URL의 Postgres에 연결할 수 있는지 (없으면 DB 정합성 테스트는 건너뜀)"""
+    db = SessionLocal()
+    try:
+        db.execute(text("SELECT 1"))
+        return True
+    except Exception:
+        return False
+    finally:
+        db.close()
+
+
+def pgvector_exact_top_k(db, query_vector, k):
+    """인덱스 스캔을 끈 정확한(순차 스캔) pgvector 검색 결과 (id, 코사인 거리)"""
+    db.execute(text("SET LOCAL enable_indexscan = off"))
+    rows = (
+        db.query(UserModel.id, UserModel.embedding.cosine_distance(query_vector))
+        .filter(UserModel.embedding.isnot(None))
+        .order_by(UserModel.embedding.cosine_distance(query_vector))
+        .limit(k)
+        .all()
+    )
+    db.rollback()
+    return [row[0] for row in rows], np.array([row[1] for row in rows], dtype=np.float32)
+
+
+@pytest.mark.skipif(not database_reachable(), reason="Postgres (DATABASE_URL) is not reachable")
+def test_vector_index_parity():
+    """메모리 인덱스의 top-k가 pgvector 정확 검색과 같은 사용자/거리를 돌려주는지 확인"""
+    db = SessionLocal()
+    k = 5
+
+    try:
+        index = VectorIndex()
+        loaded = index.load(db)
+        if loaded == 0:
+            print("No user embeddings found in database")
+            return
+
+        rng = np.random.default_rng(42)
+        stored = db.query(UserModel.embedding).filter(UserModel.embedding.isnot(None)).limit(10).all()
+        queries = [np.asarray(row[0], dtype=np.float32) for row in stored]
+        queries += [rng.standard_normal(len(queries[0])).astype(np.float32) for _ in range(10)]
+
+        for query in queries:
+            expected_ids, expected_distances = pgvector_exact_top_k(db, query, k)
+            ids, distances = index.search(query, k)
+
+            # 거리는 float32 연산 오차 범위에서 같아야 함
+            np.testing.assert_allclose(distances, expected_distances, atol=1e-4)
+            # 거리가 사실상 같은(동점) 경우를 제외하면 순서까지 같아야 함
+            for i, (got, want) in enumerate(zip(ids.tolist(), expected_ids)):
+                if got != want:
+                    assert abs(float(distances[i]) - float(expected_distances[i])) < 1e-4, (ids, expected_ids)
+
+        print(f"Parity OK: {len(queries)} queries over {loaded} users (k={k})")
+    finally:
+        db.close()
+
+
+def test_vector_index_incremental_update():
+    """upsert/remove 후 검색 결과가 바로 반영되는지 확인 (DB 없이)"""
+    index = VectorIndex(initial_capacity=2)
+    index._loaded = True
+    vectors = np.eye(4, dtype=np.float32)
+
+    with index._lock:
+        index._upsert([1, 2, 3], vectors[:3], [("CSE", 4), ("CSE", 2), ("MAT", 4)])
+    ids, distances = index.search(vectors[1], k=1)
+    assert ids.tolist() == [2] and abs(float(distances[0])) < 1e-6
+
+    # 기존 사용자 임베딩 변경 + 삭제
+    with index._lock:
+        index._upsert([1], vectors[3:4], [("CSE", 4)])
+        index._remove(2)
+    assert len(index) == 2
+    assert index.search(vectors[3], k=1)[0].tolist() == [1]
+    assert 2 not in index.search(vectors[1], k=3)[0].tolist()
+
+    # 전공/학년 조건: 조건에 맞는 사용자만, 가장 가까운 사용자가 걸러져도 결과 수는 유지
+    assert index.search(vectors[2], k=1, major="CSE")[0].tolist() == [1]
+    assert index.search(vectors[3], k=2, max_grade_level=3)[0].tolist() == []
+    assert index.search(vectors[3], k=2, major="MAT", min_grade_level=4)[0].tolist() == [3]
+
+
+def test_vector_index_remove_keeps_search_snapshot():
+    """삭제가 진행 중인 검색이 잡은 배열(행 번호 → ID)을 바꾸지 않는지 확인 (copy-on-write)"""
+    index = VectorIndex(initial_capacity=4)
+    index._loaded = True
+    vectors = np.eye(4, dtype=np.float32)
+    with index._lock:
+        index._upsert([1, 2, 3, 4], vectors, [("CSE", 1)] * 4)
+
+    # search_many가 잠금 안에서 잡는 스냅샷과 같은 참조
+    matrix, ids = index._matrix, index._ids
+    with index._lock:
+        index._remove(1)
+    assert ids[:4].tolist() == [1, 2, 3, 4]
+    np.testing.assert_array_equal(matrix[:4], vectors)
+    assert index.search(vectors[3], k=1)[0].tolist() == [4]
+    assert 1 not in index.search(vectors[0], k=4)[0].tolist()
+
+
+if __name__ == "__main__":
+    test_vector_index_incremental_update()
+    test_vector_index_remove_keeps_search_snapshot()
+    test_vector_index_parity()